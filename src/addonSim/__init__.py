@@ -12,17 +12,26 @@ bl_info = {
     "category": "Development",
 }
 
-from . import handlers
-from . import preferences
-from . import properties_global
-from . import properties
-from . import operators
-from . import panels
-from . import mw_fract
+# NOTE:: the simulation core (mw_core_*) can be imported headless, so only load the addon modules inside blender
+try:
+    import bpy
+except ImportError:
+    bpy = None
 
 from .utils_dev import DEV
-preferences.ADDON._bl_info = bl_info.copy()
-preferences.ADDON._bl_name = __name__
+if bpy is not None:
+    from . import handlers
+    from . import preferences
+    from . import properties_global
+    from . import properties
+    from . import operators
+    from . import panels
+    from . import mw_fract
+    from . import mw_overlay
+    from . import mw_fract_cache
+
+    preferences.ADDON._bl_info = bl_info.copy()
+    preferences.ADDON._bl_name = __name__
 
 
 #-------------------------------------------------------------------
@@ -35,8 +44,10 @@ submodules = [
     preferences,
     operators,
     panels,
-    mw_fract
-]
+    mw_fract,
+    mw_overlay,
+    mw_fract_cache
+] if bpy is not None else []
 _name = f"{__name__}  (...{__file__[-DEV.logs_cutpath:]})"
 
 def register():
@@ -54,5 +65,6 @@ def unregister():
 
 
 loaded = True
-preferences.ADDON._bl_loaded = True
-DEV.log_msg(f"{_name}", {"ADDON", "PARSED"})
+if bpy is not None:
+    preferences.ADDON._bl_loaded = True
+    DEV.log_msg(f"{_name}", {"ADDON", "PARSED"})
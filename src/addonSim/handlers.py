@@ -6,7 +6,6 @@ from .properties_utils import getProps_namesFiltered
 from .utils_dev import DEV
 
 
-# IDEA:: probably save_post to store some json for some sim
 # OPT:: probably lists are unloaded on new files? @persistent is only for functions
 #-------------------------------------------------------------------
 
@@ -127,6 +126,18 @@ def callback_loadFile(scene=None):
 callback_loadFile_actions = Actions()
 """ Function actions to be called on callback undo: c(scene, fileName) """
 
+@persistent
+def callback_saveFile(scene=None):
+    """ Post saved the current file """
+    name = bpy.data.filepath
+    DEV.log_msg(f"callback_saveFile: {name}", {"CALLBACK", "SAVE"})
+
+    global callback_saveFile_actions
+    callback_saveFile_actions.dispatch([scene, name])
+
+callback_saveFile_actions = Actions()
+""" Function actions to be called on callback save: c(scene, fileName) """
+
 
 #-------------------------------------------------------------------
 # Blender events
@@ -137,6 +148,7 @@ def register():
     if DEV.CALLBACK_REGISTER_ALL: registerAllHandlers()
 
     bpy.app.handlers.load_post.append(callback_loadFile)
+    bpy.app.handlers.save_post.append(callback_saveFile)
     bpy.app.handlers.depsgraph_update_post.append(callback_updatePost)
     bpy.app.handlers.undo_post.append(callback_undo)
     bpy.app.handlers.redo_post.append(callback_redo)
@@ -146,6 +158,7 @@ def unregister():
     if DEV.CALLBACK_REGISTER_ALL: unregisterAllHandlers()
 
     bpy.app.handlers.load_post.remove(callback_loadFile)
+    bpy.app.handlers.save_post.remove(callback_saveFile)
     bpy.app.handlers.depsgraph_update_post.remove(callback_updatePost)
     bpy.app.handlers.undo_post.remove(callback_undo)
     bpy.app.handlers.redo_post.remove(callback_redo)
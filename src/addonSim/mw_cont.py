@@ -1,6 +1,7 @@
 import bpy
 import bpy.types as types
 from mathutils import Vector
+import numpy as np
 
 from .preferences import getPrefs
 from .properties_global import (
@@ -11,6 +12,10 @@ from .properties_global import (
 # Using tess voro++ adaptor
 from tess import Container as VORO_Container
 
+from .mw_links_store import CSR
+from .mw_voro_cache import voro_cache, VoroContData
+from .mw_core_cont import CoreCont, faces_geometry, CELL_ERROR_ENUM, CELL_STATE_ENUM, neigh_key_t, neighFaces_key_t
+
 from . import utils_geo, utils_scene
 from .utils_dev import DEV
 from .stats import getStats
@@ -18,72 +23,27 @@ from .stats import getStats
 
 #-------------------------------------------------------------------
 
-neigh_key_t      = tuple[int, int]
-neighFaces_key_t = tuple[int, int]
-
-class CELL_ERROR_ENUM:
-    """ Use leftover indices between cont boundaries and custom walls for filler error idx?
-        # NOTE:: could be using any number, sequentiality not used
-        # OPT:: sequential check of id in all, so in case of slow process just use a unique error etc
-    """
-    # could use original ID to preserve it? anyway need to be either very high or between 7-9 (walls id)
-    _zerosForHighlight = 1000000
-
-    MISSING = -1 *_zerosForHighlight
-    """ Missing a whole cell / object """
-    ASYMMETRY = -2 *_zerosForHighlight
-    """ Missing connection at in the supposed neighbour """
-    DELETED = -3 *_zerosForHighlight
-    """ Deleted from the scene """
-    #IGNORED = -4 *_zerosForHighlight
-    #""" Model debug ignored """
-
-    all = { MISSING, ASYMMETRY, DELETED }
-    build_process = { MISSING, ASYMMETRY }
-
-    @classmethod
-    def str(cls, idx):
-        if idx == cls.MISSING:   return "MISSING"
-        if idx == cls.ASYMMETRY: return "ASYMMETRY"
-        if idx == cls.DELETED:   return "DELETED"
-        #if idx == cls.IGNORED:   return "IGNORED"
-        return "unknown"
-
-class CELL_STATE_ENUM:
-    """ Current cell state, preserves some sequentiality"""
-    SOLID = 0
-    AIR = 1
-    CORE = 2
-
-    all = { SOLID, AIR, CORE }
-
-    @classmethod
-    def to_str(cls, e:int):
-        if e == cls.SOLID:  return "SOLID"
-        if e == cls.AIR:    return "AIR"
-        if e == cls.CORE:   return "CORE"
-        if e in CELL_ERROR_ENUM.all: return "ERROR_ENUM"
-        return "none"
-        #raise ValueError(f"CELL_STATE_ENUM: {e} is not in {cls.all}")
-    @classmethod
-    def from_str(cls, s:str):
-        if s == "SOLID":    return cls.SOLID
-        if s == "AIR":      return cls.AIR
-        if s == "CORE":     return cls.CORE
-        raise ValueError(f"CELL_STATE_ENUM: {s} is not in { set(CELL_STATE_ENUM.to_str(s) for s in cls.all) }")
-
-#-------------------------------------------------------------------
-
-class MW_Cont:
+class MW_Cont(CoreCont):
+    """ Blender adapter of the container: builds voro++ and references the cell objects, the plain data lives in CoreCont """
 
     def __init__(self, root :types.Object, points: list[Vector], bb: list[Vector, 6], faces4D: list[Vector], precision: int):
+        super().__init__()
         self.initialized = False
         """ Set to true after succesfully inserted all points in the voro cointainer """
+        self.precalculated_voro = False
+        """ Set to true after precalculating the data that only depends on voro++ (neighs, faces geometry and maps) """
+        self.precalculated_maps = False
+        """ Set to true while the per cell maps used to build the links are available, a cache loaded cont rebuilds them on demand """
+        self.cache_maps : dict[str, np.ndarray] = None
         self.precalculated = False
         """ Set to true after succesfully precalculated all the data """
 
         self.root = root
         """ Shortcut to fracture root object """
+        self.cells_singleMesh : types.Object = None
+        """ Object with all the cells in a single mesh, faces map to cells with the cell_id attribute (same order as faces_cell) """
+        self.cells_state_scene : np.ndarray = None
+        """ Cells state as last applied to the scene, so updates only touch the changed cells. None means never applied """
 
         # construct voro++ cont
         self.voro_cont = self.build_voro(points, bb, faces4D, precision)
@@ -93,8 +53,8 @@ class MW_Cont:
         if self.voro_cont:
             self.initialized = True
 
-    def precalculations(self, cells_list : list[types.Object]):
-        """ Precalculate/query data such as valid neighbours and mapping faces, also adds storage and cell id to cell objects """
+    def precalculations_voro(self):
+        """ Precalculate data only from voro++: valid neighbours, faces geometry and face maps. Does not require the cell objects """
         stats = getStats()
 
         # init wall dict with just empty lists (some will remain empty)
@@ -132,36 +92,22 @@ class MW_Cont:
         if self.missingId: msg += f" {str(self.missingId[:20])}"
         stats.logDt(msg) # uncut=True
 
-        # retrieve objs, meshes -> dicts per cell
-        self.cells_objs        : list[types.Object|int] = [CELL_ERROR_ENUM.MISSING]* len(self.voro_cont)
-        self.cells_meshes      : list[types.Mesh|int]   = [CELL_ERROR_ENUM.MISSING]* len(self.voro_cont)
-        self.cells_meshes_FtoF : list[dict|int]         = [CELL_ERROR_ENUM.MISSING]* len(self.voro_cont)
-        self.cells_state       : list[types.Object|int] = [CELL_ERROR_ENUM.MISSING]* len(self.voro_cont)
-        prefs = getPrefs()
-        self.cells_root = utils_scene.get_child(self.root, prefs.names.cells)
-        self.cells_root_core = utils_scene.get_child(self.root, prefs.names.cells_core)
-        self.cells_root_air = utils_scene.get_child(self.root, prefs.names.cells_air)
+        # NOTE:: cells state is a numpy array so the simulation can evaluate batches of links at once
+        self.cells_state       : np.ndarray             = np.full(len(self.voro_cont), CELL_ERROR_ENUM.MISSING, dtype=np.int32)
+        self.cells_state[self.foundId] = CELL_STATE_ENUM.SOLID
 
-        for idx_found, obj_cell in enumerate(cells_list):
-            # asign idx cell managing missing ones
-            idx_cell = self.foundId[idx_found]
-            self.cells_objs[idx_cell] = obj_cell
+        # faces world geometry and FtoF in a single pass, same faces order as the generated meshes
+        self.cells_meshes_FtoF : list[CSR|int]          = [CELL_ERROR_ENUM.MISSING]* len(self.voro_cont)
+        cells_found = [ self.voro_cont[idx_cell] for idx_cell in self.foundId ]
+        pos, dir, area, FtoF = faces_geometry([ c.vertices() for c in cells_found ], [ c.face_vertices() for c in cells_found ])
+        for idx_cell, cell_FtoF in zip(self.foundId, FtoF):
+            self.cells_meshes_FtoF[idx_cell] = cell_FtoF
+        numFaces = [ len(f) for f in FtoF ]
+        self.faces_cell = np.repeat(np.array(self.foundId, dtype=np.int32), numFaces)
+        self.faces_idx = np.concatenate([ np.arange(n, dtype=np.int32) for n in numFaces ]) if numFaces else np.empty(0, np.int32)
+        self.faces_pos, self.faces_dir, self.faces_area = pos, dir, area
 
-            # asign data to the scene object too, including the storage id
-            obj_cell.mw_id.cell_id = idx_cell
-            obj_cell.mw_id.storage_id = self.root.mw_id.storage_id
-
-            # initial state is SOLD
-            self.cells_state[idx_cell] = CELL_STATE_ENUM.SOLID
-            obj_cell.mw_id.cell_state = CELL_STATE_ENUM.SOLID
-
-            # store mesh and faces map
-            mesh = obj_cell.data
-            self.cells_meshes[idx_cell] = mesh
-            #self.cells_meshes_FtoF[idx_cell] = utils_geo.get_meshDicts(mesh)["FtoF"]
-            self.cells_meshes_FtoF[idx_cell] = utils_geo.map_FtoF(mesh)
-
-        stats.logDt("calculated cells mesh dicts (interleaved missing cells)")
+        stats.logDt("calculated cells faces geometry and maps from voro (interleaved missing cells)")
 
         # build symmetric face map of the found cells
         self.neighs_keys_asymmetry : list[neigh_key_t]   = []
@@ -202,18 +148,127 @@ class MW_Cont:
             # add the merged list of faces
             self.neighs_faces[idx_cell] = faces
 
+        # same face map flattened along faces_cell/faces_idx, so the links can gather it in bulk
+        self.faces_neighFace = np.concatenate([ np.array(self.neighs_faces[idx_cell][:len(self.neighs[idx_cell])], dtype=np.int32) for idx_cell in self.foundId ]) if self.foundId else np.empty(0, np.int32)
+
         stats.logDt(f"calculated cell neighs faces: {len(self.neighs_keys_missing)} broken due missing")
         msg =       f"      ...found {len(self.neighs_keys_asymmetry)} asymmetries"
         if self.neighs_keys_asymmetry: msg += f": {str(self.neighs_keys_asymmetry[:10])}"
         stats.logDt(msg) # uncut=True
+        self.precalculated_voro = True
+        self.precalculated_maps = True
+
+    def precalculations_maps(self):
+        """ Rebuild the per cell maps (neighs, neighs_faces, FtoF and prefilled keys_perCell) from the flat arrays of cache_arrays
+            * Only required to build the links again, the cache loaded links and the sim do not use them
+        """
+        data = self.cache_maps
+        bases = np.append(np.searchsorted(self.faces_cell, self.foundId), len(self.faces_cell))
+        FtoF = CSR(data["FtoF_offsets"], data["FtoF_indices"]).split(bases)
+        neighs = data["faces_neigh"].tolist()
+        neighFaces = data["faces_neighFace"].tolist()
+
+        self.keys_perWall = { id: list() for id in self.wallsId }
+        self.keys_perCell = { idx_cell: CELL_ERROR_ENUM.MISSING for idx_cell in self.missingId }
+        self.neighs            = [CELL_ERROR_ENUM.MISSING]*len(self.cells_state)
+        self.neighs_faces      = [CELL_ERROR_ENUM.MISSING]*len(self.cells_state)
+        self.cells_meshes_FtoF = [CELL_ERROR_ENUM.MISSING]*len(self.cells_state)
+        for i, idx_cell in enumerate(self.foundId):
+            neighs_cell = neighs[bases[i]:bases[i+1]]
+            self.neighs[idx_cell] = neighs_cell
+            # same layout as precalculations_voro: walls appended after the per face entries
+            self.neighs_faces[idx_cell] = neighFaces[bases[i]:bases[i+1]] + [ n for n in neighs_cell if n < 0 and n not in CELL_ERROR_ENUM.all ]
+            self.cells_meshes_FtoF[idx_cell] = FtoF[i]
+            # prefilled keys as the voro precalculations left them, the links fill the valid ones
+            self.keys_perCell[idx_cell] = [ (CELL_ERROR_ENUM.MISSING if n == CELL_ERROR_ENUM.MISSING else CELL_ERROR_ENUM.ASYMMETRY, idx_cell) for n in neighs_cell ]
+
+        getStats().logDt("rebuilt cells maps from the cache arrays")
+        self.precalculated_maps = True
+
+    def get_faces_neigh(self) -> np.ndarray:
+        """ Neighbour per face concatenated along faces_cell (walls and error ids included) """
+        return np.concatenate([ np.array(self.neighs[idx_cell], dtype=np.int32) for idx_cell in self.foundId ]) if self.foundId else np.empty(0, np.int32)
+
+    def precalculations(self, cells_list : list[types.Object]):
+        """ Precalculate/query data such as valid neighbours and mapping faces, also adds storage and cell id to cell objects """
+        stats = getStats()
+        if not self.precalculated_voro:
+            self.precalculations_voro()
+
+        # retrieve objs, meshes -> dicts per cell
+        self.cells_objs        : list[types.Object|int] = [CELL_ERROR_ENUM.MISSING]* len(self.cells_state)
+        self.cells_meshes      : list[types.Mesh|int]   = [CELL_ERROR_ENUM.MISSING]* len(self.cells_state)
+        prefs = getPrefs()
+        self.cells_root = utils_scene.get_child(self.root, prefs.names.cells)
+        self.cells_root_core = utils_scene.get_child(self.root, prefs.names.cells_core)
+        self.cells_root_air = utils_scene.get_child(self.root, prefs.names.cells_air)
+
+        for idx_found, obj_cell in enumerate(cells_list):
+            # asign idx cell managing missing ones
+            idx_cell = self.foundId[idx_found]
+            self.cells_objs[idx_cell] = obj_cell
+
+            # asign data to the scene object too, including the storage id
+            obj_cell.mw_id.cell_id = idx_cell
+            obj_cell.mw_id.storage_id = self.root.mw_id.storage_id
+
+            # initial state is SOLD
+            obj_cell.mw_id.cell_state = CELL_STATE_ENUM.SOLID
+
+            # store mesh, the faces maps are already computed from voro
+            # OPT:: map_FtoF_batch over the meshes is still available when the meshes are edited
+            self.cells_meshes[idx_cell] = obj_cell.data
+
+        stats.logDt("retrieved cells objects (interleaved missing cells)")
+
+        self.setCells_stateApplied()
+        self.precalculated = True
+
+    def precalculations_singleMesh(self, obj_cells : types.Object):
+        """ Same as precalculations but all cells are faces of a single mesh object, referenced per cell too """
+        stats = getStats()
+        if not self.precalculated_voro:
+            self.precalculations_voro()
+
+        self.cells_singleMesh = obj_cells
+        obj_cells.mw_id.storage_id = self.root.mw_id.storage_id
+        self.cells_objs        : list[types.Object|int] = [CELL_ERROR_ENUM.MISSING]* len(self.cells_state)
+        self.cells_meshes      : list[types.Mesh|int]   = [CELL_ERROR_ENUM.MISSING]* len(self.cells_state)
+        for idx_cell in self.foundId:
+            self.cells_objs[idx_cell] = obj_cells
+            self.cells_meshes[idx_cell] = obj_cells.data
+
+        # the scene mesh could be from a previous generation, so check it matches the voro faces
+        attr = obj_cells.data.attributes.get("cell_id")
+        if attr is None or len(attr.data) != len(self.faces_cell):
+            DEV.log_msg(f"Single mesh cells do not match the voro faces", {"CONT", "ERROR"})
+            return
+        cell_id = np.empty(len(attr.data), dtype=np.int32)
+        attr.data.foreach_get("value", cell_id)
+        if not np.array_equal(cell_id, self.faces_cell):
+            DEV.log_msg(f"Single mesh cells do not match the voro faces", {"CONT", "ERROR"})
+            return
+
+        stats.logDt("retrieved single mesh cells")
         self.precalculated = True
 
     def build_voro(self, points: list[Vector], bb: list[Vector, 6], faces4D: list[Vector], precision: int):
-        """ Build a voro++ container using the points and the faces as walls """
+        """ Build a voro++ container using the points and the faces as walls
+            * Identical inputs reuse the cached cells (see mw_voro_cache), so it returns either a tess container or a VoroContData
+        """
 
         # Container bounds expected as tuples
         bb_tuples = [ p.to_tuple() for p in bb ]
 
+        # skip voro++ entirely when the exact same inputs were already computed
+        if not DEV.LEGACY_CONT_GEN:
+            key = voro_cache.get_key(points, bb_tuples, faces4D, precision)
+            voro_data = voro_cache.get(key)
+            if voro_data is not None:
+                getStats().logDt(f"reused cached voro container: {key[:16]}")
+                DEV.log_msg(f"Found {len(voro_data)} cells (cached, {len(faces4D)} faces)", {"CALC", "CONT"})
+                return voro_data
+
         #Legacy cont some tests mid operator
         if DEV.LEGACY_CONT_GEN:
             voro_cont = VORO_Container(points=points, limits=bb_tuples)
@@ -239,7 +294,12 @@ class MW_Cont:
             logType = {"CALC", "CONT"}
             if not len(voro_cont): logType |= {"ERROR"}
             DEV.log_msg(f"Found {len(voro_cont)} cells ({len(voro_cont.walls)} walls from {len(faces4D)} faces)", logType)
-            return voro_cont
+
+            # copy to flat arrays once, all later queries work over the copy whether it was cached or not
+            voro_data = VoroContData.from_voro(voro_cont)
+            voro_cache.put(key, voro_data)
+            getStats().logDt(f"cached voro container: {key[:16]}")
+            return voro_data
 
         except Exception as e:
             DEV.log_msg(f"exception cont >> {str(e)}", {"CALC", "CONT", "ERROR"})
@@ -247,6 +307,71 @@ class MW_Cont:
 
     #-------------------------------------------------------------------
 
+    def cache_arrays(self) -> dict[str, np.ndarray]:
+        """ Plain arrays to rebuild the container without voro++, see from_cache
+            # NOTE:: the per cell maps (neighs, neighs_faces, FtoF, keys_perCell) are stored flat, rebuilt only when building the links again
+        """
+        FtoF = CSR.merge([ self.cells_meshes_FtoF[idx_cell] for idx_cell in self.foundId ])
+        return {
+            "cells_state" : self.cells_state,
+            "foundId"     : np.array(self.foundId, dtype=np.int32),
+            "deletedId"   : np.array(self.deletedId, dtype=np.int32),
+            "wallsId"     : np.array(self.wallsId, dtype=np.int32),
+            "faces_cell"  : self.faces_cell,
+            "faces_idx"   : self.faces_idx,
+            "faces_pos"   : self.faces_pos,
+            "faces_dir"   : self.faces_dir,
+            "faces_area"  : self.faces_area,
+            "singleMesh"  : np.array(self.cells_singleMesh is not None),
+            "faces_neigh"     : self.get_faces_neigh(),
+            "faces_neighFace" : self.faces_neighFace,
+            "FtoF_offsets"    : FtoF.offsets,
+            "FtoF_indices"    : FtoF.indices,
+        }
+
+    @classmethod
+    def from_cache(cls, root: types.Object, data: dict[str, np.ndarray]):
+        """ Rebuild the container from cache_arrays (no voro++ container), then bind the scene cells with sanitize """
+        cont : MW_Cont = cls.__new__(cls)
+        CoreCont.__init__(cont)
+        cont.root = root
+        cont.voro_cont = None
+        cont.cells_singleMesh = None
+        cont.cells_state_scene = None
+
+        cont.cells_state = np.array(data["cells_state"], dtype=np.int32)
+        cont.foundId = data["foundId"].tolist()
+        cont.missingId = np.flatnonzero(cont.cells_state == CELL_ERROR_ENUM.MISSING).tolist()
+        cont.deletedId = data["deletedId"].tolist()
+        cont.deletedId_prev = cont.deletedId.copy()
+        cont.wallsId = data["wallsId"].tolist()
+        numWalls = len(cont.wallsId)
+        cont.wallsId_edges = [ (cont.wallsId[i], cont.wallsId[(i+1)%numWalls] ) for i in range(numWalls) ]
+        cont.keys_perWall = { id: list() for id in cont.wallsId }
+        cont.keys_perCell = dict()
+        # the faces arrays are read only, so keep referencing them (memory mapped)
+        for name in ("faces_cell", "faces_idx", "faces_pos", "faces_dir", "faces_area", "faces_neighFace"):
+            setattr(cont, name, np.asarray(data[name]))
+        cont.initialized = True
+        cont.precalculated_voro = True
+        cont.precalculated_maps = False
+        cont.cache_maps = { name: data[name] for name in ("faces_neigh", "faces_neighFace", "FtoF_offsets", "FtoF_indices") }
+
+        # reference the scene cells, the state is read back from the scene
+        cont.cells_objs        : list[types.Object|int] = [CELL_ERROR_ENUM.MISSING]* len(cont.cells_state)
+        cont.cells_meshes      : list[types.Mesh|int]   = [CELL_ERROR_ENUM.MISSING]* len(cont.cells_state)
+        cells_root = utils_scene.get_child(root, getPrefs().names.cells)
+        if bool(data["singleMesh"]):
+            cont.precalculations_singleMesh(cells_root)
+        else:
+            cont.precalculated = True
+        if not cont.precalculated:
+            raise ValueError("cached cells do not match the scene cells")
+        cont.sanitize(root)
+        return cont
+
+    #-------------------------------------------------------------------
+
     def sanitize(self, root):
         """ Query all objects references from the scene again, sometimes just in case """
         cleaned = self.root != root
@@ -256,6 +381,23 @@ class MW_Cont:
         # query cell roots and their children
         prefs = getPrefs()
         self.cells_root = utils_scene.get_child(self.root, prefs.names.cells)
+
+        # single mesh: just query the object and read the state from its faces
+        if self.cells_singleMesh is not None:
+            self.cells_singleMesh = self.cells_root
+            mesh = self.cells_root.data
+            for idx_cell in self.foundId:
+                self.cells_objs[idx_cell] = self.cells_root
+                self.cells_meshes[idx_cell] = mesh
+            faces_state = np.empty(len(mesh.polygons), dtype=np.int32)
+            mesh.attributes["cell_state"].data.foreach_get("value", faces_state)
+            cells_state = self.cells_state.copy()
+            cells_state[self.faces_cell] = faces_state
+            cleaned |= not np.array_equal(cells_state, self.cells_state)
+            self.cells_state = cells_state
+            self.setCells_stateApplied()
+            return cleaned
+
         self.cells_root_core = utils_scene.get_child(self.root, prefs.names.cells_core)
         self.cells_root_air = utils_scene.get_child(self.root, prefs.names.cells_air)
         cells_list = self.cells_root.children + self.cells_root_core.children + self.cells_root_air.children
@@ -276,6 +418,7 @@ class MW_Cont:
         ok, broken, error = self.getCells_splitID_needsSanitize()
         self.setCells_missing(broken)
         cleaned |= self.deletedId != self.deletedId_prev
+        self.setCells_stateApplied()
         return cleaned
 
     def getCells_splitID_needsSanitize(self):
@@ -302,20 +445,6 @@ class MW_Cont:
 
         return ok, broken+broken_prev, error
 
-    def getCells_splitID_state(self):
-        """ Split cells by state
-            # OPT:: store and only update?
-        """
-        stateMap = {
-            state : [] for state in CELL_STATE_ENUM.all
-        }
-
-        for id in self.foundId:
-            state = self.cells_state[id]
-            stateMap[state].append(id)
-
-        return stateMap
-
     #-------------------------------------------------------------------
 
     def setCells_missing(self, broken:list[int]):
@@ -328,33 +457,37 @@ class MW_Cont:
             self.cells_meshes[id] = CELL_ERROR_ENUM.DELETED
             self.cells_state[id] = CELL_STATE_ENUM.AIR
 
+    def getCells_stateChanged(self) -> np.ndarray:
+        """ Cells whose state differs from the one applied to the scene (all found when never applied) """
+        if self.cells_state_scene is None:
+            return np.array(self.foundId, dtype=np.int64)
+        return np.flatnonzero(self.cells_state != self.cells_state_scene)
+
+    def setCells_stateApplied(self, idx_list:list[int] = None):
+        """ Mark the current state as applied to the scene, all cells when None """
+        if self.cells_state_scene is None or idx_list is None:
+            self.cells_state_scene = self.cells_state.copy()
+        else:
+            self.cells_state_scene[idx_list] = self.cells_state[idx_list]
+
     def setCell_state(self, idx:int, state:int):
-        """ Mark both the array and the cell object """
-        self.cells_objs[idx].mw_id.cell_state = state
+        """ Mark both the array and the cell object (single mesh faces are written in bulk by update_cellsState) """
+        if self.cells_singleMesh is None:
+            self.cells_objs[idx].mw_id.cell_state = state
         self.cells_state[idx] = state
 
     # OPT:: snake case or no? links getters?
     def setCells_state(self, idx_list:list[int], state:int):
-        """ Mark both the array and the cell object """
+        """ Mark both the array and the cell object (single mesh faces are written in bulk by update_cellsState) """
+        if self.cells_singleMesh is not None:
+            self.cells_state[idx_list] = state
+            return
         for idx in idx_list:
             self.cells_objs[idx].mw_id.cell_state = state
             self.cells_state[idx] = state
 
     #-------------------------------------------------------------------
 
-    # OPT:: reduce stored amoun instead of the whole array
-    def backupState(self):
-        self.backup_cells_state = self.cells_state.copy()
-
-    def backupState_restore(self):
-        self.cells_state = self.backup_cells_state.copy()
-
-    def reset(self):
-        for id in self.foundId:
-            self.cells_state[id] = CELL_STATE_ENUM.SOLID
-
-    #-------------------------------------------------------------------
-
     def getCells(self, idx: list[int]|int) -> list[types.Object]|types.Object:
         """ returns an object or list of objects given idx  """
         try:
@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field, fields, asdict
+
+# NOTE:: no blender imports here, plain config so the simulation core can run headless (or be pickled to other processes)
+#-------------------------------------------------------------------
+
+@dataclass
+class SimConfig:
+    """ Plain copy of MW_sim_cfg used by the simulation core
+        * Defaults match the blender properties, except logging and seed regen (quiet and reproducible when headless)
+    """
+
+    # step params
+    step_infiltrations          : int   = 100
+    step_maxDepth               : int   = -1
+    step_stopBreak              : bool  = True
+    step_stopBreak_event        : set   = field(default_factory=lambda: {"LINK"})
+
+    # water start and abs
+    water__start                : float = 1.0
+    water_deg                   : float = 0.25
+    water_abs_air               : float = 0.05
+    water_abs_solid             : float = 0.10
+
+    # simple link deg
+    link_deg                    : float = 0.5
+    link_resist_weight          : float = 0.75
+
+    # dir aligments
+    dir_entry                   : tuple = (1, -0.5, -0.5)
+    dir_entry_minAlign          : float = 0.05
+    dir_next                    : tuple = (0, 0, -1)
+    dir_next_minAlign           : float = 0.05
+
+    # random events
+    water_rnd_abs_minCheck      : float = 0.25
+    water_rnd_abs_continueProb  : float = 0.9
+    water_rnd_abs_damage        : float = 0.75
+    link_rnd_break_minCheck     : float = 0.4
+    link_rnd_break_resistProb   : float = 0.9
+    link_next_dir_weight        : float = 0.75
+    link_next_exit_avoidance    : float = 0.75
+
+    # flattened RND_config
+    seed                        : int   = 64
+    seed_mod                    : int   = 0
+    seed_regen                  : bool  = False
+
+    # cfg logging
+    debug_log                   : bool  = False
+    debug_log_lastIters         : int   = 10
+    debug_log_everyIters        : int   = 0
+    debug_log_path              : bool  = True
+    debug_log_trace             : bool  = False
+    debug_log_trace_candidates  : bool  = False
+
+    # custom sim/vis
+    debug_skip_entry_area       : bool  = False
+    debug_skip_next_maxResist   : bool  = False
+    debug_util_rndState         : bool  = False
+    debug_util_uniformDeg       : bool  = False
+
+    @classmethod
+    def from_props(cls, props) -> "SimConfig":
+        """ Copy the values of a MW_sim_cfg property group (vectors to tuples and enum flags to sets) """
+        values = {}
+        for f in fields(cls):
+            if f.name in ("seed", "seed_mod", "seed_regen"):
+                values[f.name] = getattr(props.debug_rnd, f.name)
+            elif f.type is tuple:
+                values[f.name] = tuple(getattr(props, f.name))
+            elif f.type is set:
+                values[f.name] = set(getattr(props, f.name))
+            else:
+                values[f.name] = getattr(props, f.name)
+        return cls(**values)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
@@ -0,0 +1,195 @@
+import numpy as np
+
+from .mw_links_store import CSR
+
+# NOTE:: no blender nor voro++ imports here, the precalculated container data is plain python/numpy
+#-------------------------------------------------------------------
+
+neigh_key_t      = tuple[int, int]
+neighFaces_key_t = tuple[int, int]
+
+class CELL_ERROR_ENUM:
+    """ Use leftover indices between cont boundaries and custom walls for filler error idx?
+        # NOTE:: could be using any number, sequentiality not used
+        # OPT:: sequential check of id in all, so in case of slow process just use a unique error etc
+    """
+    # could use original ID to preserve it? anyway need to be either very high or between 7-9 (walls id)
+    _zerosForHighlight = 1000000
+
+    MISSING = -1 *_zerosForHighlight
+    """ Missing a whole cell / object """
+    ASYMMETRY = -2 *_zerosForHighlight
+    """ Missing connection at in the supposed neighbour """
+    DELETED = -3 *_zerosForHighlight
+    """ Deleted from the scene """
+    #IGNORED = -4 *_zerosForHighlight
+    #""" Model debug ignored """
+
+    all = { MISSING, ASYMMETRY, DELETED }
+    build_process = { MISSING, ASYMMETRY }
+
+    @classmethod
+    def str(cls, idx):
+        if idx == cls.MISSING:   return "MISSING"
+        if idx == cls.ASYMMETRY: return "ASYMMETRY"
+        if idx == cls.DELETED:   return "DELETED"
+        #if idx == cls.IGNORED:   return "IGNORED"
+        return "unknown"
+
+class CELL_STATE_ENUM:
+    """ Current cell state, preserves some sequentiality"""
+    SOLID = 0
+    AIR = 1
+    CORE = 2
+
+    all = { SOLID, AIR, CORE }
+
+    @classmethod
+    def to_str(cls, e:int):
+        if e == cls.SOLID:  return "SOLID"
+        if e == cls.AIR:    return "AIR"
+        if e == cls.CORE:   return "CORE"
+        if e in CELL_ERROR_ENUM.all: return "ERROR_ENUM"
+        return "none"
+        #raise ValueError(f"CELL_STATE_ENUM: {e} is not in {cls.all}")
+    @classmethod
+    def from_str(cls, s:str):
+        if s == "SOLID":    return cls.SOLID
+        if s == "AIR":      return cls.AIR
+        if s == "CORE":     return cls.CORE
+        raise ValueError(f"CELL_STATE_ENUM: {s} is not in { set(CELL_STATE_ENUM.to_str(s) for s in cls.all) }")
+
+#-------------------------------------------------------------------
+
+class CoreCont:
+    """ Container data required by the links and the simulation: cells state, found/missing/deleted ids and walls
+        * MW_Cont fills it from the voro++ container and the scene objects
+        * Headless code can fill it directly from plain arrays, see from_arrays
+    """
+
+    def __init__(self):
+        self.cells_state    : np.ndarray            = np.zeros(0, dtype=np.int32)
+        self.foundId        : list[int]             = []
+        self.missingId      : list[int]             = []
+        self.deletedId      : list[int]             = []
+        self.deletedId_prev : list[int]             = []
+        self.wallsId        : list[int]             = []
+        self.wallsId_edges  : list[neigh_key_t]     = []
+
+        # faces of the found cells concatenated in foundId order (world space), see faces_geometry
+        self.faces_cell     : np.ndarray            = None
+        self.faces_idx      : np.ndarray            = None
+        self.faces_pos      : np.ndarray            = None
+        self.faces_dir      : np.ndarray            = None
+        self.faces_area     : np.ndarray            = None
+        self.faces_neighFace: np.ndarray            = None
+        """ Face index at the neighbour end (error ids for walls, missing and asymmetries) """
+
+    @classmethod
+    def from_arrays(cls, cells_state:np.ndarray, foundId:list[int], wallsId:list[int], deletedId:list[int] = None):
+        """ Build the container data without blender, e.g. from a snapshot of a fracture """
+        cont = cls()
+        cont.cells_state = np.array(cells_state, dtype=np.int32)
+        cont.foundId = list(foundId)
+        cont.missingId = np.flatnonzero(cont.cells_state == CELL_ERROR_ENUM.MISSING).tolist()
+        cont.deletedId = list(deletedId) if deletedId else []
+        cont.deletedId_prev = cont.deletedId.copy()
+        cont.wallsId = list(wallsId)
+        numWalls = len(cont.wallsId)
+        cont.wallsId_edges = [ (cont.wallsId[i], cont.wallsId[(i+1)%numWalls] ) for i in range(numWalls) ]
+        return cont
+
+    def snapshot(self) -> dict:
+        """ Plain data to rebuild the container headless with from_arrays """
+        return {
+            "cells_state" : self.cells_state,
+            "foundId"     : self.foundId,
+            "wallsId"     : self.wallsId,
+            "deletedId"   : self.deletedId,
+        }
+
+    #-------------------------------------------------------------------
+
+    def getCells_splitID_state(self):
+        """ Split cells by state
+            # OPT:: store and only update?
+        """
+        stateMap = {
+            state : [] for state in CELL_STATE_ENUM.all
+        }
+
+        for id in self.foundId:
+            state = self.cells_state[id]
+            stateMap[state].append(id)
+
+        return stateMap
+
+    def getFaces_rows(self, cells:np.ndarray, faces:np.ndarray) -> np.ndarray:
+        """ Rows of the (cell, face) pairs in the concatenated faces arrays """
+        cells_found, first = np.unique(self.faces_cell, return_index=True)
+        base = np.full(len(self.cells_state), -1, dtype=np.int64)
+        base[cells_found] = first
+        return base[cells] + faces
+
+    def setCell_state(self, idx:int, state:int):
+        self.cells_state[idx] = state
+
+    def setCells_state(self, idx_list:list[int], state:int):
+        self.cells_state[idx_list] = state
+
+    #-------------------------------------------------------------------
+
+    # OPT:: reduce stored amoun instead of the whole array
+    def backupState(self):
+        self.backup_cells_state = self.cells_state.copy()
+
+    def backupState_restore(self):
+        self.cells_state = self.backup_cells_state.copy()
+
+    def reset(self):
+        self.cells_state[self.foundId] = CELL_STATE_ENUM.SOLID
+
+#-------------------------------------------------------------------
+
+def faces_geometry(verts:list[np.ndarray], faces:list[list[list[int]]]) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[CSR]]:
+    """ Faces center, normal and area plus the FtoF per cell, in one concatenated pass over polygons (e.g. voro++ cells)
+        * Centers are the mean of the vertices, normal and area from Newell's method (same as blender polygons)
+        * Normals always point outwards, regardless of the faces winding
+    """
+    numVerts = np.array([ len(v) for v in verts ], dtype=np.int64)
+    numFaces = np.array([ len(f) for f in faces ], dtype=np.int64)
+    baseVerts = np.concatenate([[0], np.cumsum(numVerts)])
+    baseFaces = np.concatenate([[0], np.cumsum(numFaces)])
+    V = np.concatenate(verts).astype(np.float64).reshape(-1,3) if len(verts) else np.empty((0,3))
+
+    # per loop global vertex, face and next vertex in the same face
+    l_vert = np.fromiter(( v + baseVerts[i] for i,fs in enumerate(faces) for f in fs for v in f ), dtype=np.int64)
+    l_count = np.fromiter(( len(f) for fs in faces for f in fs ), dtype=np.int64, count=int(baseFaces[-1]))
+    l_face = np.repeat(np.arange(len(l_count)), l_count)
+    l_start = np.repeat(np.cumsum(l_count) - l_count, l_count)
+    l_next = l_vert[l_start + (np.arange(len(l_vert)) - l_start + 1) % np.repeat(l_count, l_count)]
+
+    # accumulate per face
+    nf = len(l_count)
+    pos = np.stack([ np.bincount(l_face, weights=V[l_vert,k], minlength=nf) for k in range(3) ], axis=1)
+    pos /= np.maximum(l_count, 1)[:,None]
+    cross = np.cross(V[l_vert], V[l_next])
+    newell = np.stack([ np.bincount(l_face, weights=cross[:,k], minlength=nf) for k in range(3) ], axis=1)
+    length = np.linalg.norm(newell, axis=1)
+    dir = newell / np.where(length > 0, length, 1.0)[:,None]
+    area = 0.5 * length
+
+    # voro++ faces winding ends up reversed, so orient the normals outwards from the (convex) cell vertices mean
+    l_cellFaces = np.repeat(np.arange(len(verts)), numFaces)
+    v_cell = np.repeat(np.arange(len(verts)), numVerts)
+    center = np.stack([ np.bincount(v_cell, weights=V[:,k], minlength=len(verts)) for k in range(3) ], axis=1)
+    center /= np.maximum(numVerts, 1)[:,None]
+    inwards = np.einsum("fi,fi->f", dir, pos - center[l_cellFaces]) < 0
+    dir[inwards] *= -1
+
+    # faces sharing an edge (vertex pair) are neighbours
+    nv = max(len(V), 1)
+    keys = np.minimum(l_vert, l_next) * nv + np.maximum(l_vert, l_next)
+    FtoF = CSR.from_shared_keys(l_face, keys, nf).split(baseFaces)
+    return pos, dir, area, FtoF
+
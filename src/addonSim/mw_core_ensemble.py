@@ -0,0 +1,157 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, get_context
+
+from .mw_core_cfg import SimConfig
+from .mw_core_cont import CoreCont
+from .mw_core_links import CoreLinks
+from .mw_core_sim import CoreSim, SIM_EXIT_FLAG
+
+from .utils_dev import DEV
+from .stats import getStats
+
+# NOTE:: no blender imports here, workers are plain python processes that only import the core modules
+# NOTE:: inside blender the spawned workers need a python executable, see multiprocessing.set_executable
+#-------------------------------------------------------------------
+
+class FractSnapshot:
+    """ Static fracture arrays (container + links) placed in shared memory once, workers attach without copies """
+
+    def __init__(self, cont: CoreCont, links: CoreLinks):
+        self.cont_data = cont.snapshot()
+        self.links_data = links.snapshot()
+        self.shm : list[shared_memory.SharedMemory] = []
+        self.desc : dict = None
+
+    def share(self) -> dict:
+        """ Copy the arrays to shared memory blocks, returns the picklable descriptor for the workers """
+        arrays = {}
+        for name, arr in self.links_data.items():
+            arr = np.ascontiguousarray(arr)
+            block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+            self.shm.append(block)
+            arrays[name] = (block.name, arr.shape, arr.dtype.str)
+
+        cont_data = dict(self.cont_data)
+        cont_data["cells_state"] = np.array(cont_data["cells_state"])
+        self.desc = { "links": arrays, "cont": cont_data }
+        return self.desc
+
+    def release(self):
+        for block in self.shm:
+            block.close()
+            block.unlink()
+        self.shm = []
+
+    def __enter__(self):
+        self.share()
+        return self
+    def __exit__(self, *args):
+        self.release()
+
+#-------------------------------------------------------------------
+# worker side: one rebuilt fracture per process
+
+_worker : dict = None
+
+def _worker_init(desc: dict):
+    global _worker
+    blocks, snap = [], {}
+    for name, (shm_name, shape, dtype) in desc["links"].items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(block)
+        snap[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    # from_snapshot copies the arrays, so the shared blocks stay read only
+    cont = CoreCont.from_arrays(**desc["cont"])
+    links = CoreLinks.from_snapshot(cont, snap)
+    cont.backupState()
+    _worker = {
+        "blocks": blocks, "cont": cont, "links": links,
+        # dir flips on link break and is not part of the sim state backup
+        "dir": links.store.dir.copy(), "dir_from": links.store.dir_from.copy(),
+    }
+
+def _worker_reset():
+    cont : CoreCont = _worker["cont"]
+    links : CoreLinks = _worker["links"]
+    links.store.backupState_restore()
+    links.store.dir[:] = _worker["dir"]
+    links.store.dir_from[:] = _worker["dir_from"]
+    cont.backupState_restore()
+    links.comps_recalc()
+
+def _worker_run(seeds: list[int], cfg_values: dict, steps: int) -> dict:
+    """ Run a chunk of seeds and return the partial sums, avoids sending per link arrays per seed """
+    links : CoreLinks = _worker["links"]
+    n = len(links.store)
+    acc = {
+        "life_sum": np.zeros(n), "life_sumsq": np.zeros(n),
+        "picks_sum": np.zeros(n), "picks_entry_sum": np.zeros(n),
+        "broken_sum": np.zeros(n), "runs": [],
+    }
+    for seed in seeds:
+        _worker_reset()
+        cfg = SimConfig(**cfg_values)
+        cfg.seed, cfg.seed_mod, cfg.seed_regen = seed, 0, False
+        sim = CoreSim(_worker["cont"], links, cfg)
+        sim.rnd_store()
+        steps_run = sim.run_batch(steps, keep_paths=0)
+
+        store = links.store
+        life = store.life_clamped()
+        acc["life_sum"] += life
+        acc["life_sumsq"] += life * life
+        acc["picks_sum"] += store.picks
+        acc["picks_entry_sum"] += store.picks_entry
+        broken = store.state != store.state_initial
+        acc["broken_sum"] += broken
+        acc["runs"].append({
+            "seed": seed, "steps": steps_run, "exit_flag": sim.exit_flag,
+            "broken_links": int(np.count_nonzero(broken)), "comps": links.comps_len,
+        })
+    return acc
+
+#-------------------------------------------------------------------
+
+def run_ensemble(cont: CoreCont, links: CoreLinks, cfg: SimConfig, seeds: list[int], steps: int = None, max_workers: int = None, chunk: int = None) -> dict:
+    """ Run one independent simulation per seed starting from the current fracture state, in a process pool
+        * The fracture is snapshotted once in shared memory and rebuilt once per worker
+        * Returns per link mean/std life, mean picks/entries and break frequency, plus a summary per run
+    """
+    stats = getStats()
+    steps = cfg.step_infiltrations if steps is None else steps
+    cfg_values = cfg.to_dict()
+    seeds = list(seeds)
+    if not seeds:
+        raise ValueError("run_ensemble: no seeds given")
+
+    ctx = get_context("spawn")
+    max_workers = max_workers or ctx.cpu_count()
+    chunk = chunk or max(1, len(seeds) // (4*max_workers))
+    chunks = [ seeds[i:i+chunk] for i in range(0, len(seeds), chunk) ]
+    DEV.log_msg(f"Ensemble: {len(seeds)} seeds x {steps} steps, {len(chunks)} chunks over {max_workers} workers", {"SIM", "ENSEMBLE"})
+
+    with FractSnapshot(cont, links) as snap:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, initializer=_worker_init, initargs=(snap.desc,)) as pool:
+            parts = list(pool.map(_worker_run, chunks, [cfg_values]*len(chunks), [steps]*len(chunks)))
+    stats.logDt(f"ensemble completed: {len(seeds)} runs")
+
+    # aggregate the partial sums
+    total = len(seeds)
+    keys = ("life_sum", "life_sumsq", "picks_sum", "picks_entry_sum", "broken_sum")
+    sums = { k: np.sum([ p[k] for p in parts ], axis=0) for k in keys }
+    life_mean = sums["life_sum"] / total
+    life_var = np.maximum(sums["life_sumsq"] / total - life_mean*life_mean, 0)
+    runs = [ r for p in parts for r in p["runs"] ]
+
+    return {
+        "runs"            : runs,
+        "life_mean"       : life_mean,
+        "life_std"        : np.sqrt(life_var),
+        "picks_mean"      : sums["picks_sum"] / total,
+        "picks_entry_mean": sums["picks_entry_sum"] / total,
+        "broken_freq"     : sums["broken_sum"] / total,
+        "exit_flags"      : { SIM_EXIT_FLAG.to_str(f): sum(r["exit_flag"] == f for r in runs) for f in { r["exit_flag"] for r in runs } },
+    }
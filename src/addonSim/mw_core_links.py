@@ -0,0 +1,944 @@
+import networkx as nx
+import numpy as np
+import itertools
+
+from .mw_core_cont import CoreCont, CELL_ERROR_ENUM, CELL_STATE_ENUM, neigh_key_t, neighFaces_key_t
+from .mw_links_store import LinkStore, CSR
+from .unionfind import UnionFind
+
+from .utils_dev import DEV
+from .stats import getStats
+
+# NOTE:: no blender imports here, the links graph logic works over the store arrays and the core container
+#-------------------------------------------------------------------
+
+class LINK_STATE_ENUM:
+    """ Current links state, preserves some sequentiality """
+    SOLID = 0
+    AIR = 1
+    WALL = 2
+
+    all = { SOLID, AIR, WALL }
+
+    @classmethod
+    def to_str(cls, e:int):
+        if e == cls.SOLID:  return "SOLID"
+        if e == cls.AIR:    return "AIR"
+        if e == cls.WALL:   return "WALL"
+        return "none"
+        #raise ValueError(f"CELL_STATE_ENUM: {e} is not in {cls.all}")
+    @classmethod
+    def from_str(cls, s:str):
+        if s == "SOLID":    return cls.SOLID
+        if s == "AIR":      return cls.AIR
+        if s == "WALL":     return cls.WALL
+        raise ValueError(f"CELL_STATE_ENUM: {s} is not in {set(LINK_STATE_ENUM.to_str(s) for s in cls.all)}")
+
+class Link():
+    """ Thin view over a single link id of the CoreLinks.store arrays (LinkStore)
+        # NOTE:: pos/dir return a new array copy, modify the store arrays (or the dir setter) instead
+    """
+    __slots__ = ("store", "id")
+
+    def __init__(self, store: LinkStore, id: int):
+        self.store = store
+        self.id = id
+
+    # no directionality but tuple key instead of set
+    @property
+    def key_cells(self) -> neigh_key_t:
+        return self.store.keys[self.id]
+    @property
+    def key_faces(self) -> neighFaces_key_t:
+        k = self.store.key_faces[self.id]
+        return (int(k[0]), int(k[1]))
+
+    # properties in world space
+    @property
+    def pos(self) -> np.ndarray:
+        return self.store.pos[self.id].copy()
+    @property
+    def dir(self) -> np.ndarray:
+        return self.store.dir[self.id].copy()
+    @dir.setter
+    def dir(self, v):
+        self.store.dir[self.id] = v
+    @property
+    def dir_from(self) -> int:
+        return int(self.store.dir_from[self.id])
+    @dir_from.setter
+    def dir_from(self, v):
+        self.store.dir_from[self.id] = v
+
+    # properties to later normalize or divide by avg
+    @property
+    def area(self) -> float:
+        return float(self.store.area[self.id])
+    @property
+    def areaFactor(self) -> float:
+        return float(self.store.areaFactor[self.id])
+
+    # NOTE:: resistance atm defined by 2D field -> potentially already normalized so no need for factor
+    @property
+    def resistance(self) -> float:
+        return float(self.store.resistance[self.id])
+    @resistance.setter
+    def resistance(self, v):
+        self.store.resistance[self.id] = v
+
+    # sim props
+    @property
+    def state_initial(self) -> int:
+        return int(self.store.state_initial[self.id])
+    @property
+    def state(self) -> int:
+        return int(self.store.state[self.id])
+    @state.setter
+    def state(self, v):
+        self.store.state[self.id] = v
+    @property
+    def life(self) -> float:
+        return float(self.store.life[self.id])
+    @life.setter
+    def life(self, v):
+        self.store.life[self.id] = v
+    @property
+    def picks(self) -> int:
+        return int(self.store.picks[self.id])
+    @picks.setter
+    def picks(self, v):
+        self.store.picks[self.id] = v
+    @property
+    def picks_entry(self) -> int:
+        return int(self.store.picks_entry[self.id])
+    @picks_entry.setter
+    def picks_entry(self, v):
+        self.store.picks_entry[self.id] = v
+
+    def reset(self, life=1.0, picks=0, picks_entry=0):
+        """ Reset simulation parameters """
+        self.state = self.state_initial
+        self.life = life
+        self.picks = picks
+        self.picks_entry = picks_entry
+
+    def dir_str(self, ndigits=2) -> str:
+        return str(tuple( round(float(v), ndigits) for v in self.store.dir[self.id] ))
+
+    def __str__(self):
+        #a({self.area:.2f}), p({self.picks},{self.picks_entry}),
+        if self.state == LINK_STATE_ENUM.WALL:
+            return f"W{self.key_cells[0]} entries({self.picks_entry}), dir{self.dir_str()}"
+        elif self.state == LINK_STATE_ENUM.AIR:
+            return f"A{self.key_cells} entries({self.picks_entry}), picks({self.picks}), dir{self.dir_str()}"
+        else:
+            #return f"K{self.key_cells}: life({self.life:.3f}), dir{self.dir_str()}"
+            return f"k{self.key_cells} life({self.life:.3f}), picks({self.picks})"
+
+    #-------------------------------------------------------------------
+
+    def set_broken(self):
+        self.state = LINK_STATE_ENUM.AIR
+        self.life = 0
+        #self.picks = 0
+
+    def flip_dir(self):
+        self.store.dir[self.id] *= -1
+        k1, k2 = self.key_cells
+        if self.dir_from == k1:
+            self.dir_from = k2
+        else:
+            self.dir_from = k1
+
+    def degrade(self, deg):
+        """ Degrade link life, no clamping """
+        self.store.life[self.id] -= deg
+
+    @property
+    def life_clamped(self):
+        """ Get link life clamped [0,1] """
+        return min( max(self.life, 0), 1)
+
+    def clamp(self):
+        """ Clamp link life [0,1] """
+        self.life = self.life_clamped
+
+    def key_cells_other(self, cell_id):
+        k1, k2 = self.key_cells
+        if k1 == cell_id:
+            return k2
+        assert(k2 == cell_id)
+        return k1
+
+    def key_faces_other(self, face_id):
+        f1, f2 = self.key_faces
+        if f1 == face_id:
+            return f2
+        assert(f2 == face_id)
+        return f1
+
+#-------------------------------------------------------------------
+
+class CoreLinks():
+    """ Links graph and components logic over a LinkStore
+        * MW_Links builds the store from the cell meshes, headless code can use from_snapshot
+    """
+
+    def __init__(self, cont: CoreCont):
+        self.initialized = False
+        """ Set to true after succesfully computed the link map """
+
+        self.log = True
+        """ Affects some logs, not all"""
+
+        self.cont = cont
+        """ Shortcut to container """
+
+        self.cells_graph = nx.Graph()
+        """ Graph connecting the cells to find connected components, also adds walls with negative indices
+            # NOTE:: edges for a given node are not returned sorted by face, use faceKey inside the link to get the actual face index
+            # NOTE:: adding edges creates nodes, but added edges might swap the indices order! use getKey_swap to make sure
+            # NOTE:: removing nodes from the graphs takes all their edges too (use subgraphs)
+        """
+
+        self.comps = []
+        """ List of sets with connected components cells id """
+        self.comps_subgraph = nx.Graph()    # used to leave cells_graph untouched (edges get removed along nodes)
+        self.comps_len = 1                  # initial expected
+        self.comps_cell : dict[int, set] = dict()
+        """ Cell id to its component set (same object as in comps), updated incrementally on link breaks """
+
+        self.air_graph = nx.Graph()
+        """ Used to determine air bubbles inside the model, debug only (see air_recalc_graph) """
+        self.air_comps = []
+        self.air_comps_len = 1
+        self.air_uf : UnionFind = None
+        """ Air cells components, grows along the erosion. The last element is a virtual node for all the walls (outside) """
+        self.air_uf_outside = -1
+        self.air_members : dict[int, list[int]] = dict()
+        """ Cells per air bubble root, the outside component is tracked with air_outside instead """
+
+        self.links_graph = nx.Graph()
+        """ Graph connecting links! Links connect with other links from adjacent faces from both cells
+            # NOTE:: only built by the blender adapter, the simulation and headless code use neighs_csr
+        """
+        self.store : LinkStore = None
+        """ Structure of arrays with all links data, indexed by link id. Graph nodes/edges only store the id """
+        self.neighs_csr : CSR = None
+        """ Frozen links_graph adjacency by link id, used in the simulation hot path instead of networkx """
+        self.external_count : np.ndarray = None
+        """ Per link id times it is external: AIR/WALL to CELL, mainly used as entry points in the simulation """
+        self.external_version : int = 0
+        """ Incremented each time the frontier is recalculated, so cached samplers and lists know when to update """
+        self.internal_count : np.ndarray = None
+        """ Per link id times it is internal: CELL to CELL (once per solid cell), mainly used for rendering of the links """
+        self._frontier_lists : tuple[int, list[Link], list[Link]] = (-1, [], [])
+
+        self.air_outside : np.ndarray = None
+        """ Per cell flag of AIR cells connected to the container walls, the rest of AIR cells are bubbles """
+        self.frontier_full = True
+        """ Force a full frontier rebuild, e.g. after resets or cells going back to SOLID """
+        self.frontier_pending_cells : set[int] = set()
+        self.frontier_pending_links : set[int] = set()
+
+        self.links_len = 0
+        self.min_pos = np.full(3, np.inf)
+        self.max_pos = np.full(3, -np.inf)
+        self.min_area,  self.max_area, self.avg_area = np.inf, -np.inf, 1
+        self.min_resistance,  self.max_resistance, self.avg_resistance = np.inf, -np.inf, 1
+
+    def init_from_store(self, store: LinkStore, neighs_csr: CSR, recalc_areaFactor = True, comps: dict[str, np.ndarray] = None):
+        """ Finish the initialization once the store and the neighbours are built, returns the initialized flag
+            * The cells graph is built from the links keys when empty (edges in link id order)
+            * Components are restored from a comps_snapshot matching the state when given, otherwise recalculated
+        """
+        self.store = store
+        self.neighs_csr = neighs_csr
+        if not self.cells_graph.number_of_edges():
+            self.cells_graph.add_edges_from( (k1, k2, {"id": lid}) for lid,(k1,k2) in enumerate(store.keys) )
+
+        self.internal_count = np.zeros(len(store), dtype=np.int8)
+        self.external_count = np.zeros(len(store), dtype=np.int8)
+        self.air_outside = np.zeros(len(self.cont.cells_state), dtype=bool)
+
+        # count the links and calculate limits and averages
+        self.links_len = len(store)
+        self.update_limits()
+
+        # calculate area factor relative to avg area (avg wont be zero when there are links)
+        if recalc_areaFactor:
+            store.areaFactor[:] = store.area / self.avg_area
+            #store.resistanceFactor[:] = store.resistance / self.avg_resistance
+
+        # initial components subgraph calculation
+        if comps is None:
+            self.comps_recalc()
+        else:
+            self.comps_restore(comps)
+
+        # init when found at least a link
+        self.initialized = bool(self.links_len)
+        return self.initialized
+
+    def snapshot(self, picks = False) -> dict[str, np.ndarray]:
+        """ Plain arrays to rebuild the links headless: store columns, current sim state and neighbours CSR (optionally the picks counters too) """
+        store = self.store
+        snap = {
+            "key_cells"     : store.key_cells,
+            "key_faces"     : store.key_faces,
+            "pos"           : store.pos,
+            "dir"           : store.dir,
+            "dir_from"      : store.dir_from,
+            "area"          : store.area,
+            "areaFactor"    : store.areaFactor,
+            "resistance"    : store.resistance,
+            "state_initial" : store.state_initial,
+            "state"         : store.state,
+            "life"          : store.life,
+            "neighs_offsets": self.neighs_csr.offsets,
+            "neighs_indices": self.neighs_csr.indices,
+        }
+        if picks:
+            snap["picks"] = store.picks
+            snap["picks_entry"] = store.picks_entry
+        return snap
+
+    @classmethod
+    def from_snapshot(cls, cont: CoreCont, snap: dict[str, np.ndarray], view_cls = None):
+        """ Rebuild the links from a snapshot (arrays are copied), the container state should match it """
+        links = cls(cont)
+        links.log = False
+        links.init_from_snapshot(snap, view_cls or Link)
+        return links
+
+    def init_from_snapshot(self, snap: dict[str, np.ndarray], view_cls = None, copy = True, comps: dict[str, np.ndarray] = None):
+        """ Same as init_from_store but the store and neighbours come from a snapshot (static arrays only referenced when copy is False) """
+        array = np.array if copy else np.asarray
+        store = LinkStore(snap["key_cells"], snap["key_faces"], snap["pos"], snap["dir"], snap["dir_from"],
+                          snap["area"], snap["resistance"], snap["state_initial"], view_cls=view_cls, copy=copy)
+        store.areaFactor[:] = snap["areaFactor"]
+        store.state[:] = snap["state"]
+        store.life[:] = snap["life"]
+        if "picks" in snap:
+            store.picks[:] = snap["picks"]
+            store.picks_entry[:] = snap["picks_entry"]
+        store.backupState()
+        csr = CSR(array(snap["neighs_offsets"]), array(snap["neighs_indices"]))
+        return self.init_from_store(store, csr, recalc_areaFactor=False, comps=comps)
+
+    def update_limits(self):
+        """ Calculate min/max pos, area and resistance plus the averages over the store arrays """
+        store = self.store
+        if not self.links_len:
+            return
+        self.min_pos = store.pos.min(axis=0)
+        self.max_pos = store.pos.max(axis=0)
+        self.min_area, self.max_area = float(store.area.min()), float(store.area.max())
+        self.avg_area = float(store.area.mean(dtype=np.float64))
+        self.min_resistance, self.max_resistance = float(store.resistance.min()), float(store.resistance.max())
+        self.avg_resistance = float(store.resistance.mean(dtype=np.float64))
+
+    #-------------------------------------------------------------------
+
+    def sanitize(self, root):
+        """ Remove deleted cells from the graph and recalculate comps
+            # OPT:: due to potential UNDO/REDO making cells reapear all foundID are added again
+        """
+        # TODO:: undo/redo not fully working + exepcts with deleted cells?
+        cleaned = False
+        if not self.cont.deletedId or self.cont.deletedId == self.cont.deletedId_prev:
+            return cleaned
+        DEV.log_msg(f"Sanitizing links", {"LINKS", "SANITIZE"})
+
+        ## detect changes -> not ok cause removing nodes removes past edges
+        #curr = set(self.cont.deletedId)
+        #prev = set(self.cont.deletedId_prev)
+        #newDeleted = curr - prev
+        #newAdded = prev - curr
+        ## add / remove cells
+        #self.cells_graph.add_nodes_from(newAdded)
+        #self.cells_graph.remove_nodes_from(newDeleted)
+
+        # recalculate the components
+        self.comps_recalc()
+        return cleaned
+
+    def comps_recalc(self, recalcGraph = True):
+        """ Recalc cell connected componentes, return true when new split """
+        if self.log: DEV.log_msg(f"Recalc COMPS", {"COMPS"})
+        prevLen = self.comps_len
+
+        # recalc subgraph, the state might have been restored externally so rebuild the frontier too
+        if recalcGraph:
+            self.comps_recalc_subgraph()
+            self.frontier_full = True
+        # OPT:: shared statemaps across methods, or keep uptodate
+        # OPT:: too much link/id interchange and requery too..
+
+        # recount components
+        self.comps_count()
+        newSplit = prevLen != self.comps_len
+        if newSplit:
+            getStats().logDt(f"calculated COMPS: [new SPLIT] from {prevLen}")
+
+        # potential detach of cells
+        if newSplit and self.comps_len > 1:
+            self.comps_detach_frontier()
+            self.comps_count()
+
+        # recalc frontier even for no new splits -> cells turned to AIR changes the front
+        self.comps_recalc_frontier()
+
+        return newSplit
+
+    def comps_snapshot(self) -> dict[str, np.ndarray]:
+        """ Components, air and frontier state as arrays, restored with comps_restore instead of comps_recalc """
+        n = len(self.cont.cells_state)
+        comps_label = np.full(n, -1, dtype=np.int32)
+        for i, comp in enumerate(self.comps):
+            comps_label[list(comp)] = i
+        air_root = np.full(n, -1, dtype=np.int32)
+        for r, members in self.air_members.items():
+            air_root[members] = r
+        return {
+            "comps_label"   : comps_label,
+            "air_root"      : air_root,
+            "air_outside"   : self.air_outside.copy(),
+            "internal_count": self.internal_count.copy(),
+            "external_count": self.external_count.copy(),
+        }
+
+    def comps_restore(self, snap: dict[str, np.ndarray]):
+        """ Rebuild the components from a comps_snapshot matching the current cells/links state
+            * The subgraph edges are filtered from the store arrays, no connected components, detach nor air union search
+        """
+        cells_state = self.cont.cells_state
+        store = self.store
+        n = len(cells_state)
+
+        # same subgraph as comps_recalc_subgraph: solid/core found cells and their non AIR links
+        valid = np.zeros(n, dtype=bool)
+        valid[self.cont.foundId] = True
+        valid &= (cells_state == CELL_STATE_ENUM.SOLID) | (cells_state == CELL_STATE_ENUM.CORE)
+        k1, k2 = store.key_cells[:,0], store.key_cells[:,1]
+        edges = (k1 >= 0) & (store.state != LINK_STATE_ENUM.AIR)
+        edges &= valid[np.maximum(k1, 0)] & valid[k2]
+        self.comps_subgraph = nx.Graph()
+        self.comps_subgraph.add_nodes_from(np.flatnonzero(valid).tolist())
+        self.comps_subgraph.add_edges_from(zip(k1[edges].tolist(), k2[edges].tolist()))
+
+        # components grouped by label, same order
+        comps_label = snap["comps_label"]
+        cells = np.flatnonzero(comps_label >= 0)
+        order = cells[np.argsort(comps_label[cells], kind="stable")]
+        splits = np.flatnonzero(np.diff(comps_label[order])) + 1
+        self.comps = [ set(group.tolist()) for group in np.split(order, splits) ] if len(order) else []
+        self.comps_len = len(self.comps)
+        self.comps_cell = { c: comp for comp in self.comps for c in comp }
+
+        # air union-find flattened: outside cells point to the walls node, bubbles to their root
+        air_root = snap["air_root"]
+        self.air_outside[:] = snap["air_outside"]
+        self.air_uf = uf = UnionFind(n+1)
+        self.air_uf_outside = n
+        parents = np.arange(n+1)
+        parents[:n][self.air_outside] = n
+        bubbles = np.flatnonzero(air_root >= 0)
+        parents[bubbles] = air_root[bubbles]
+        uf.parents = parents.tolist()
+        uf.num_components = int(np.count_nonzero(parents == np.arange(n+1)))
+        self.air_members = dict()
+        for c, r in zip(bubbles.tolist(), air_root[bubbles].tolist()):
+            self.air_members.setdefault(r, []).append(c)
+        self.air_comps_len = len(self.air_members) + 1
+
+        # frontier counts as they were
+        self.internal_count[:] = snap["internal_count"]
+        self.external_count[:] = snap["external_count"]
+        self.external_version += 1
+        self.frontier_full = False
+        self.frontier_pending_cells.clear()
+        self.frontier_pending_links.clear()
+        getStats().logDt(f"restored COMPS: {self.comps_len} (air {self.air_comps_len})")
+
+    def comps_recalc_subgraph(self):
+        """ Recalculate component subgraph """
+        if self.log: DEV.log_msg(f"Recalc COMPS subgraph", {"COMPS"})
+
+        # create a subgraph with no air, no missing cells and no additional walls
+        stateMap = self.cont.getCells_splitID_state()
+        valid = stateMap[CELL_STATE_ENUM.SOLID] + stateMap[CELL_STATE_ENUM.CORE]
+        # copy the read only subgraph, cannot copy and remove because there are extra edges from virtual wall cells
+        self.comps_subgraph : nx.Graph = self.cells_graph.subgraph(valid).copy()
+
+        # remove missing links too
+        stateMap_links = self.get_link_splitID_state()
+        removed_links = stateMap_links[LINK_STATE_ENUM.AIR] # + stateMap_links[LINK_STATE_ENUM.WALL] already dropped with stateMap not AIR
+        self.comps_subgraph.remove_edges_from(removed_links)
+
+        ## TEST:: subgraphs
+        #stateMap = self.cont.getCells_splitID_state()
+        #air_graph : nx.Graph = self.cells_graph.subgraph(stateMap[CELL_STATE_ENUM.AIR]+self.cont.wallsId)
+        #comps = list(nx.connected_components(air_graph))
+        #stateMap_links = self.get_link_splitID_state()
+        #airlinks_subgraph_view : nx.Graph = self.links_graph.subgraph(stateMap_links[LINK_STATE_ENUM.WALL] + stateMap_links[LINK_STATE_ENUM.AIR])
+        #comps_links = list(nx.connected_components(airlinks_subgraph_view))
+
+    def comps_count(self):
+        self.comps = list(nx.connected_components(self.comps_subgraph))
+        self.comps_len = len(self.comps)
+        self.comps_cell = { c: comp for comp in self.comps for c in comp }
+        getStats().logDt(f"count COMPS: {self.comps_len}")
+
+    def comps_split_check(self, c1:int, c2:int) -> set|None:
+        """ Bidirectional BFS expanding the smaller side, returns the smaller fragment when c1 and c2 are disconnected
+            * Cost is proportional to the smaller fragment, not to the whole component
+        """
+        adj = self.comps_subgraph.adj
+        if c1 not in adj or c2 not in adj:
+            return None
+
+        seen = [{c1}, {c2}]
+        fronts = [[c1], [c2]]
+        while fronts[0] and fronts[1]:
+            side = 0 if len(seen[0]) <= len(seen[1]) else 1
+            seen_side, seen_other = seen[side], seen[1-side]
+            front = []
+            for u in fronts[side]:
+                for v in adj[u]:
+                    if v in seen_other:
+                        return None
+                    if v not in seen_side:
+                        seen_side.add(v)
+                        front.append(v)
+            fronts[side] = front
+
+        # the exhausted side is the complete fragment
+        return seen[0] if not fronts[0] else seen[1]
+
+    def comps_split_apply(self, fragment:set):
+        """ Move the fragment to a new component, then detach and recalc the frontier like comps_recalc """
+        prevLen = self.comps_len
+        comp = self.comps_cell[next(iter(fragment))]
+        comp -= fragment
+        self.comps.append(fragment)
+        for c in fragment:
+            self.comps_cell[c] = fragment
+        self.comps_len = len(self.comps)
+        getStats().logDt(f"calculated COMPS: [new SPLIT] from {prevLen} (fragment {len(fragment)})")
+
+        # potential detach of cells, whole components turn to air so just drop them
+        if self.comps_len > 1:
+            detached = self.comps_detach_frontier()
+            if detached:
+                detached_ids = { id(comp) for comp in detached }
+                self.comps = [ comp for comp in self.comps if id(comp) not in detached_ids ]
+                self.comps_len = len(self.comps)
+                for comp in detached:
+                    for c in comp:
+                        self.comps_cell.pop(c, None)
+
+        # recalc frontier -> cells turned to AIR changes the front
+        self.comps_recalc_frontier()
+
+    def comps_merge(self, c1:int, c2:int):
+        """ Merge the components of both cells (smaller into larger) when a link is restored """
+        comp1, comp2 = self.comps_cell.get(c1), self.comps_cell.get(c2)
+        if comp1 is None or comp2 is None or comp1 is comp2:
+            return
+        if len(comp1) < len(comp2):
+            comp1, comp2 = comp2, comp1
+        comp1 |= comp2
+        for c in comp2:
+            self.comps_cell[c] = comp1
+        self.comps = [ comp for comp in self.comps if comp is not comp2 ]
+        self.comps_len = len(self.comps)
+
+    def comps_recalc_frontier(self):
+        """ Check new internal and external links, also changes cells state to air
+            * Incremental over the cells turned AIR since the last recalc: only their links and the bubbles they open are visited
+            * Full rebuild after resets, restores or cells going back to SOLID
+        """
+        if self.log: DEV.log_msg(f"Recalc FRONT", {"COMPS"})
+        self.external_version += 1
+
+        if DEV.SKIP_BUBBLE_CHECK:
+            # all solid are internal (once), external pick only the ones with at least a solid at the other side
+            state = self.store.state
+            solid = state == LINK_STATE_ENUM.SOLID
+            self.internal_count[:] = solid
+            self.external_count[:] = ~solid & self.solid_link_check_ids()
+
+        elif self.frontier_full:
+            # union all air cells with the walls as a single node -> detecting air bubbles
+            self.air_recalc_union()
+            self.frontier_update_links()
+
+        else:
+            # new air cells may merge bubbles with the outside, then only update their links
+            flooded = self.air_add_cells(self.frontier_pending_cells)
+            adj = self.cells_graph.adj
+            ids = set(self.frontier_pending_links)
+            for c in itertools.chain(self.frontier_pending_cells, flooded):
+                ids.update( e["id"] for e in adj[c].values() )
+            self.frontier_update_links(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+
+        self.frontier_full = False
+        self.frontier_pending_cells.clear()
+        self.frontier_pending_links.clear()
+
+    def frontier_update_links(self, ids:np.ndarray = None):
+        """ Recompute the internal/external counts of the links (all when None) from the cells state and outside air
+            * Solid links are internal once per solid cell
+            * Other links are external per solid cell when the other side is a wall or outside air, otherwise internal (bubble)
+        """
+        store = self.store
+        if ids is None: ids = slice(None)
+        cells_state = self.cont.cells_state
+        key_cells = store.key_cells[ids]
+
+        # walls have negative id, only the first key can be a wall
+        wall = key_cells[:,0] < 0
+        c1 = np.where(wall, 0, key_cells[:,0])
+        c2 = key_cells[:,1]
+        s1 = ~wall & ((cells_state[c1] == CELL_STATE_ENUM.SOLID) | (cells_state[c1] == CELL_STATE_ENUM.CORE))
+        s2 = (cells_state[c2] == CELL_STATE_ENUM.SOLID) | (cells_state[c2] == CELL_STATE_ENUM.CORE)
+        o1 = wall | (~wall & self.air_outside[c1])
+        o2 = self.air_outside[c2]
+
+        solid = store.state[ids] == LINK_STATE_ENUM.SOLID
+        self.internal_count[ids] = np.where(solid, s1.astype(np.int8) + s2, (s1 & ~o2).astype(np.int8) + (s2 & ~o1))
+        self.external_count[ids] = np.where(solid, 0, (s1 & o2).astype(np.int8) + (s2 & o1))
+
+    def frontier_lists(self) -> tuple[list[Link], list[Link]]:
+        """ Internal and external links as views (repeated like the counts), built lazily once per recalc """
+        version, internal, external = self._frontier_lists
+        if version != self.external_version and self.store is not None:
+            views = self.store.views
+            ids = np.arange(len(views))
+            internal = [ views[i] for i in np.repeat(ids, self.internal_count).tolist() ]
+            external = [ views[i] for i in np.repeat(ids, self.external_count).tolist() ]
+            self._frontier_lists = (self.external_version, internal, external)
+        return internal, external
+
+    @property
+    def internal(self) -> list[Link]:
+        return self.frontier_lists()[0]
+    @property
+    def external(self) -> list[Link]:
+        return self.frontier_lists()[1]
+
+    def air_recalc_union(self):
+        """ Rebuild the air union-find from scratch, the walls are joined in a single virtual node """
+        cells_state = self.cont.cells_state
+        adj = self.cells_graph.adj
+        n = len(cells_state)
+        self.air_uf = uf = UnionFind(n+1)
+        self.air_uf_outside = n
+
+        air = np.flatnonzero(cells_state == CELL_STATE_ENUM.AIR).tolist()
+        for c in air:
+            for nb in adj[c]:
+                if nb < 0: uf.union(n, c)
+                elif cells_state[nb] == CELL_STATE_ENUM.AIR: uf.union(c, nb)
+
+        # split the outside from the bubbles
+        root_outside = uf.find_parent(n)
+        self.air_outside[:] = False
+        self.air_members = dict()
+        for c in air:
+            r = uf.find_parent(c)
+            if r == root_outside: self.air_outside[c] = True
+            else: self.air_members.setdefault(r, []).append(c)
+
+        self.air_comps_len = len(self.air_members) + 1
+        getStats().logDt(f"count AIR COMPS: {self.air_comps_len}")
+
+    def air_add_cells(self, new_air:set[int]) -> list[int]:
+        """ Merge the new air cells with their air neighbours (or the walls), returns the cells that became outside
+            * Air only grows while eroding, cells going back to solid require air_recalc_union
+        """
+        cells_state = self.cont.cells_state
+        adj = self.cells_graph.adj
+        outside = self.air_uf_outside
+        flooded = []
+
+        # register all first, new air cells may be neighbours between them
+        new_air = [ x for x in new_air if cells_state[x] == CELL_STATE_ENUM.AIR and not self.air_outside[x] and x not in self.air_members ]
+        for x in new_air:
+            self.air_members[x] = [x]
+
+        for x in new_air:
+            for nb in adj[x]:
+                if nb < 0: self.air_union(x, outside, flooded)
+                elif cells_state[nb] == CELL_STATE_ENUM.AIR: self.air_union(x, nb, flooded)
+
+        self.air_comps_len = len(self.air_members) + 1
+        return flooded
+
+    def air_union(self, a:int, b:int, flooded:list[int]):
+        """ Union of two air components, a bubble merged with the outside moves its cells to flooded """
+        uf = self.air_uf
+        ra, rb = uf.find_parent(a), uf.find_parent(b)
+        if ra == rb: return
+        ro = uf.find_parent(self.air_uf_outside)
+
+        # keep as root the outside or the larger bubble, less cells to move
+        if rb == ro or (ra != ro and len(self.air_members[ra]) < len(self.air_members[rb])):
+            ra, rb = rb, ra
+        uf.union(ra, rb)
+
+        moved = self.air_members.pop(rb)
+        if ra == ro:
+            self.air_outside[moved] = True
+            flooded.extend(moved)
+        else:
+            self.air_members[ra].extend(moved)
+
+    def air_check_outside(self, cell_id:int) -> bool:
+        """ Check if an air cell is connected to the container walls """
+        uf = self.air_uf
+        return uf.find_parent(cell_id) == uf.find_parent(self.air_uf_outside)
+
+    # NOTE:: networkx version of the air components, not used by the frontier anymore but handy to debug
+    def air_recalc_graph(self, stateMap):
+        self.air_graph = nx.Graph()
+        self.air_graph.add_edges_from( self.cont.wallsId_edges )
+
+        # now add air links and connect only the valid edges
+        self.air_graph.add_nodes_from( stateMap[CELL_STATE_ENUM.AIR] )
+        for cell_id in stateMap[CELL_STATE_ENUM.AIR]:
+            links = self.get_cell_linksKeys(cell_id)
+            for lk in links:
+                if self.air_graph.has_node(lk[0]) and self.air_graph.has_node(lk[1]):
+                    self.air_graph.add_edge(*lk)
+
+    def air_comps_count(self):
+        self.air_comps = list(nx.connected_components(self.air_graph))
+        self.air_comps_len = len(self.air_comps)
+
+        # find wall comp
+        self.air_comps_wall_id = -1
+        sampleWall = self.cont.wallsId[0]
+        for i,comp in enumerate(self.air_comps):
+            if sampleWall in comp:
+                self.air_comps_wall_id = i
+                break
+        assert(self.air_comps_wall_id != -1)
+
+        getStats().logDt(f"count AIR COMPS: {self.air_comps_len}")
+
+    def comps_detach_frontier(self) -> list[set]:
+        """ Turn to air the components without core cells (or all but the largest), returns the detached ones """
+        if self.log: DEV.log_msg(f"Recalc DETACH", {"COMPS"})
+
+        # split by core comps
+        cores, nonCores = [],[]
+        for i, comp_cells in enumerate(self.comps):
+            # iterate cells and check for any mark as core
+            foundCore = False
+            for cell_id in comp_cells:
+                if self.cont.cells_state[cell_id] == CELL_STATE_ENUM.CORE:
+                    cores.append(i)
+                    foundCore = True
+                    break
+            # no cell was core
+            if not foundCore:
+                nonCores.append(i)
+
+        # all core, do nothing
+        if not nonCores:
+            return []
+
+        # list of candidate comps (not individual cells)
+        candidates = [ self.comps[i] for i in nonCores ]
+
+        # if there was at least a single non core one, then flatten the list of candidates and remove all
+        if len(nonCores) != len(self.comps):
+            detached = candidates
+
+        # otherwise remove the smaller candidate
+        else:
+            candidates = sorted(candidates, key=len)
+            detached = candidates[:-1]
+
+        # set links as air which will trigger link removeal etc
+        new_air_cells = list(itertools.chain.from_iterable(detached))
+        self.setState_cells_check(new_air_cells, LINK_STATE_ENUM.AIR, False)
+        return detached
+
+    #-------------------------------------------------------------------
+
+    def solid_link_check(self, l):
+        """ Check if any of the referenced cells is solid (or core) """
+        c1,c2 = l.key_cells
+
+        # the second ID is always a cell ID
+        s2 = self.cont.cells_state[c2]
+        if s2 != CELL_STATE_ENUM.AIR:
+            return True
+
+        # walls have negative id and there is no cell associated, so s1 only check for non walls
+        if l.state != LINK_STATE_ENUM.WALL:
+            s1 = self.cont.cells_state[c1]
+            if s1 != CELL_STATE_ENUM.AIR:
+                return True
+
+        return False
+
+    def solid_link_check_ids(self, ids:np.ndarray = None) -> np.ndarray:
+        """ Vectorized solid_link_check over link ids (all when None) """
+        store = self.store
+        if ids is None: ids = slice(None)
+        cells_state = self.cont.cells_state
+        key_cells = store.key_cells[ids]
+        notWall = store.state[ids] != LINK_STATE_ENUM.WALL
+        c1 = np.where(notWall, key_cells[:,0], 0)
+        return (cells_state[key_cells[:,1]] != CELL_STATE_ENUM.AIR) | (notWall & (cells_state[c1] != CELL_STATE_ENUM.AIR))
+
+    def setState_link_check(self, key, state:LINK_STATE_ENUM, recalc=True):
+        """ Set state, modify graph, returns True when recalc """
+        if self.log: DEV.log_msg(f"Check link AIR {key}", {"COMPS", "LINK"})
+        l = self.get_link(key)
+
+        # ignore already set
+        if l.state == state:
+            return False
+        self.frontier_pending_links.add(l.id)
+
+        # broke the link? change graph etc
+        if state == LINK_STATE_ENUM.AIR:
+            # ignore walls and break solid links
+            if l.state == LINK_STATE_ENUM.WALL:
+                return False
+            l.set_broken()
+
+            # remove link edges, alredy removed when coming from an setState_cell_check
+            self.comps_subgraph.remove_edges_from([l.key_cells])
+
+            # potentially flip normals so than visualization goes towards outside
+            if self.cont.cells_state[l.dir_from] != CELL_STATE_ENUM.SOLID:
+                l.flip_dir()
+
+        # link back to solid
+        else:
+            # reset even wall links (number of picks), but for those nothing else to do
+            l.reset()
+            if l.state == LINK_STATE_ENUM.WALL:
+                return False
+
+            # readd the link, cells should be added beforehand
+            self.comps_subgraph.add_edges_from([l.key_cells])
+
+        breaking = False
+        if recalc:
+            c1,c2 = l.key_cells
+            if DEV.SKIP_PATH_CHECK:
+                breaking = True
+                self.comps_recalc(False)
+
+            # recalc on link break only when a path between cells ceases to exist, only the smaller side is explored
+            elif state == LINK_STATE_ENUM.AIR:
+                fragment = self.comps_split_check(c1, c2)
+                breaking = fragment is not None
+                if breaking:
+                    self.comps_split_apply(fragment)
+
+            # restored links can only merge components
+            else:
+                self.comps_merge(c1, c2)
+
+        return breaking
+
+    def setState_cell_check(self, idx, state:CELL_STATE_ENUM, recalc = True):
+        """ Set state, modify graph and also set links, returns True when recalc """
+        if self.log: DEV.log_msg(f"Check cell AIR {idx}", {"COMPS", "CELL"})
+        cell_state = self.cont.cells_state[idx]
+
+        # ignore already set
+        if cell_state == state:
+            return False
+        self.cont.setCell_state(idx, state)
+        if state == CELL_STATE_ENUM.AIR: self.frontier_pending_cells.add(idx)
+        else: self.frontier_full = True
+
+        # cell to air? change graph and also set the links
+        if state == CELL_STATE_ENUM.AIR:
+            # remove cell and attached link
+            self.comps_subgraph.remove_nodes_from([idx]) # direcly removes edges tho
+            for key in self.get_cell_linksKeys(idx):
+                self.setState_link_check(key, LINK_STATE_ENUM.AIR, False)
+
+        # cell back to solid
+        else:
+            # add cell back and recover links
+            self.comps_subgraph.add_nodes_from([idx])
+            for key in self.get_cell_linksKeys(idx):
+                self.setState_link_check(key, LINK_STATE_ENUM.SOLID, False)
+
+        if recalc:
+            self.comps_recalc(False)
+        return recalc
+
+    def setState_cells_check(self, idx_list, state:CELL_STATE_ENUM, recalc_afterAll = True):
+        """ Set state, modify graph and also set links, returns True when recalc """
+        for idx in idx_list:
+            self.setState_cell_check(idx, state, False)
+
+        # recalc without building the graph as setState_cell_check already removes/adds missing nodes
+        if recalc_afterAll:
+            self.comps_recalc(False)
+
+    #-------------------------------------------------------------------
+
+    def get_link(self, key:neigh_key_t) -> Link:
+        return self.store.views[self.store.key_to_id[key]]
+    def get_links(self, keys:list[neigh_key_t]) -> list [Link]:
+        return [ self.store.views[self.store.key_to_id[k]] for k in keys ]
+    def get_ids(self, links:list[Link]) -> np.ndarray:
+        """ Link ids to index the store arrays """
+        return np.fromiter((l.id for l in links), dtype=np.int64, count=len(links))
+
+    def get_link_neighsId(self, key:neigh_key_t) -> list[neigh_key_t]:
+        """ The links neighs ID unordered by face or anything """
+        keys = self.store.keys
+        return [ keys[i] for i in self.neighs_csr[self.store.key_to_id[key]] ]
+    def get_link_neighs(self, key:neigh_key_t) -> list[Link]:
+        """ The links neighs unordered by face or anything """
+        views = self.store.views
+        return [ views[i] for i in self.neighs_csr[self.store.key_to_id[key]] ]
+    def get_link_neighs_ids(self, lid:int) -> np.ndarray:
+        """ The links neighs as a slice of link ids (no copy) """
+        return self.neighs_csr[lid]
+
+    def get_cell_linksKeys(self, idx:int) -> list[Link]:
+        """ The links ID from a given cell with properly sorted keys """
+        return [ self.getKey_swap(k[0],k[1])[0] for k in self.cells_graph.edges(idx) ]
+
+    def get_cell_links(self, idx:int) -> list[Link]:
+        """ The links from a given cell """
+        return self.get_links(self.get_cell_linksKeys(idx))
+
+    def get_link_splitID_state(self):
+        """ Split links ID by state """
+        keys = self.store.keys
+        return { s: [ keys[i] for i in ids ] for s,ids in self.store.split_state(LINK_STATE_ENUM.all).items() }
+
+    def get_link_split_state(self):
+        """ Split links by state """
+        views = self.store.views
+        return { s: [ views[i] for i in ids ] for s,ids in self.store.split_state(LINK_STATE_ENUM.all).items() }
+
+    #-------------------------------------------------------------------
+
+    # key is always sorted numerically -> negative walls id go at the beginning
+    # tuples are inmutable so need to return a new one
+    @staticmethod
+    def getKey_swap(k1,k2) -> tuple[neigh_key_t,bool]:
+        swap = k1 > k2
+        key = (k1, k2) if not swap else (k2, k1)
+        return key,swap
+    @staticmethod
+    def getKey(k1,k2, swap) -> neigh_key_t:
+        key = (k1, k2) if not swap else (k2, k1)
+        return key
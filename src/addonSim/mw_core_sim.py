@@ -0,0 +1,824 @@
+import random as rnd
+import numpy as np
+
+from .mw_core_cfg import SimConfig
+from .mw_core_cont import CoreCont, CELL_STATE_ENUM, neigh_key_t
+from .mw_core_links import CoreLinks, Link, LINK_STATE_ENUM
+from .mw_links_store import FenwickTree
+
+from .utils_dev import DEV
+from .stats import getStats
+
+# NOTE:: no blender imports here, MW_Sim is the adapter reading the config from the scene
+#-------------------------------------------------------------------
+# IDEA:: bridges neighbours? too aligned wall links, vertically aligned internal -> when broken? cannot go though?
+
+class SIM_EXIT_FLAG:
+    STILL_RUNNING      = -1
+    MAX_DEPTH          = 0
+    NO_WATER           = 1
+    NO_WATER_RND       = 2
+    NO_NEXT_LINK       = 3
+    NO_NEXT_LINK_WALL  = 4
+    NO_ENTRY_LINK      = 5
+    STOP_ON_LINK_BREAK = 6
+    STOP_ON_CELL_BREAK = 7
+
+    all = { MAX_DEPTH, NO_WATER, NO_WATER_RND, NO_NEXT_LINK, NO_NEXT_LINK_WALL, NO_ENTRY_LINK }
+
+    @classmethod
+    def to_str(cls, e:int):
+        if e == cls.STILL_RUNNING:      return "STILL_RUNNING"
+        if e == cls.MAX_DEPTH:          return "MAX_DEPTH"
+        if e == cls.NO_WATER:           return "NO_WATER"
+        if e == cls.NO_WATER_RND:       return "NO_WATER_RND"
+        if e == cls.NO_NEXT_LINK:       return "NO_NEXT_LINK"
+        if e == cls.NO_NEXT_LINK_WALL:  return "NO_NEXT_LINK_WALL"
+        if e == cls.NO_ENTRY_LINK:      return "NO_ENTRY_LINK"
+        if e == cls.STOP_ON_LINK_BREAK: return "STOP_ON_LINK_BREAK"
+        if e == cls.STOP_ON_CELL_BREAK: return "STOP_ON_CELL_BREAK"
+        return "none"
+        #raise ValueError(f"SIM_EXIT_FLAG: {e} is not in {cls.all}")
+    @classmethod
+    def from_str(cls, s:str):
+        if s == "STILL_RUNNING":        return cls.STILL_RUNNING
+        if s == "MAX_DEPTH":            return cls.MAX_DEPTH
+        if s == "NO_WATER":             return cls.NO_WATER
+        if s == "NO_WATER_RND":         return cls.NO_WATER_RND
+        if s == "NO_NEXT_LINK":         return cls.NO_NEXT_LINK
+        if s == "NO_NEXT_LINK_WALL":    return cls.NO_NEXT_LINK_WALL
+        if s == "NO_ENTRY_LINK":        return cls.NO_ENTRY_LINK
+        if s == "STOP_ON_LINK_BREAK":   return cls.STOP_ON_LINK_BREAK
+        if s == "STOP_ON_CELL_BREAK":   return cls.STOP_ON_CELL_BREAK
+        raise ValueError(f"SIM_EXIT_FLAG: {s} is not in {set(SIM_EXIT_FLAG.to_str(s) for s in cls.all)}")
+
+class SubStepData:
+    """ Information per sub step """
+    def __init__(self):
+        self.currentL             : Link        = None
+        self.currentL_deg         : float       = None
+        self.currentL_life        : float       = None
+        self.currentL_candidates  : list[Link]  = None
+        self.currentL_candidatesW : list[float] = None
+        self.water_abs            : float       = None
+        self.water                : float       = None
+
+class StepData:
+    """ Information per step """
+    def __init__(self):
+        self.subs               : list[SubStepData] = list()
+        self.entryL             : Link              = None
+        self.entryL_candidates  : list[Link]        = None
+        self.entryL_candidatesW : list[float]       = None
+        self.exitL              : Link              = None
+        self.break_flag         : int               = SIM_EXIT_FLAG.STILL_RUNNING
+
+#-------------------------------------------------------------------
+
+def rnd_reset_seed(s:int = None, mod:int = None) -> int:
+    """ Same as utils.rnd_reset_seed but only for the python random module """
+    if s is None or s < 0:
+        s = rnd.randint(0,10000)
+    rnd.seed(s)
+
+    # mod generates a few numbers to add change
+    if mod:
+        for i in range(mod):
+            rnd.random()
+    return s
+
+def normalized(v) -> np.ndarray:
+    """ Normalize any sequence as a float64 array, zero length returns zeros like Vector.normalized """
+    v = np.asarray(v, dtype=np.float64)
+    n = np.linalg.norm(v)
+    return v / n if n > 0 else np.zeros_like(v)
+
+#-------------------------------------------------------------------
+
+class SimCheckpoint:
+    """ Named copy of the simulation state arrays: links sim props, dir flips and cells state, plus the derived components
+        * Arrays equal to the previous checkpoint are shared (read only), the rest are copied
+        * Delta mode only stores the changed rows against the previous checkpoint (base), resolved on restore
+    """
+    names = ("state", "life", "picks", "picks_entry", "dir", "dir_from", "cells_state")
+
+    def __init__(self, name:str, step_id:int, arrays:dict[str, np.ndarray], comps:dict[str, np.ndarray], prev:"SimCheckpoint" = None, delta = False):
+        self.name = name
+        self.step_id = step_id
+        self.comps = comps
+        self.base : SimCheckpoint = prev if prev and delta else None
+        self.full  : dict[str, np.ndarray] = dict()
+        self.delta : dict[str, tuple[np.ndarray, np.ndarray]] = dict()
+
+        for k, arr in arrays.items():
+            if self.base:
+                prev_arr = prev.get(k)
+                changed = np.flatnonzero((arr != prev_arr).reshape(len(arr), -1).any(axis=1))
+                self.delta[k] = (changed, arr[changed].copy())
+            elif prev and k in prev.full and np.array_equal(prev.full[k], arr):
+                self.full[k] = prev.full[k]
+            else:
+                self.full[k] = arr.copy()
+                self.full[k].flags.writeable = False
+
+    def get(self, k:str) -> np.ndarray:
+        """ Full array of the checkpoint (read only view when not delta encoded) """
+        if k in self.full:
+            return self.full[k]
+        ids, values = self.delta[k]
+        arr = self.base.get(k).copy()
+        arr[ids] = values
+        return arr
+
+    def copy_to(self, k:str, dst:np.ndarray):
+        """ Restore in place, the deltas are applied over the base directly """
+        if k in self.full:
+            dst[:] = self.full[k]
+        else:
+            ids, values = self.delta[k]
+            self.base.copy_to(k, dst)
+            dst[ids] = values
+
+    def materialize(self):
+        """ Drop the dependency on the base checkpoint, e.g. before removing it """
+        if not self.base: return
+        for k in list(self.delta.keys()):
+            self.full[k] = self.get(k)
+            self.full[k].flags.writeable = False
+        self.delta = dict()
+        self.base = None
+
+    def nbytes(self) -> int:
+        return sum( a.nbytes for a in self.full.values() ) + sum( i.nbytes + v.nbytes for i,v in self.delta.values() )
+
+#-------------------------------------------------------------------
+
+class CoreSim:
+    """ Water infiltration simulation over the core container/links, config as a plain SimConfig """
+
+    def __init__(self, cont: CoreCont, links: CoreLinks, cfg: SimConfig):
+        self.cfg : SimConfig = cfg
+        self.cont : CoreCont = cont
+        self.links : CoreLinks = links
+
+        # path scratch buffers (link ids and water), grown on demand and reused by all steps
+        self.path_ids   : np.ndarray = np.zeros(0, dtype=np.int32)
+        self.path_water : np.ndarray = np.zeros(0, dtype=np.float64)
+        self.batch_paths : list[list[tuple[neigh_key_t, float]]] = []
+
+        # entry distribution is cached and incrementally updated
+        self.entry_sampler     : FenwickTree = None
+        self.entry_sampler_key : tuple       = None
+
+        # named checkpoints in creation order, see checkpoint_save
+        self.checkpoints : dict[str, SimCheckpoint] = dict()
+        self.checkpoints_max = 16
+
+        # empty trace data
+        self.step_reset()
+        self.step_reset_trace()
+
+    #-------------------------------------------------------------------
+
+    def rnd_store(self):
+        #self.rndState = rnd.getstate()
+        s = None if self.cfg.seed_regen else self.cfg.seed
+        self.cfg.seed = rnd_reset_seed(s)
+
+    def rnd_restore(self):
+        # NOTE:: just call some amount of randoms to modify seed, could modify state but requires copying a 600 elemnt tuple
+        #rnd.setstate(self.rndState)
+        self.cfg.seed = rnd_reset_seed(self.cfg.seed, self.cfg.seed_mod)
+
+    def backup_state(self):
+        # delegate backup to the links store (array copies)
+        self.links.store.backupState()
+
+        # store cells state too
+        self.cont.backupState()
+
+        # store random too
+        self.rnd_store()
+
+        # store some sim props
+        self.back_step_id = self.step_id
+
+    def backup_state_restore(self):
+        # restore all
+        self.links.store.backupState_restore()
+        self.cont.backupState_restore()
+        self.rnd_restore()
+
+        # global recalculation including graphs
+        self.links.comps_recalc()
+
+        # restore some sim props
+        self.step_id = self.back_step_id
+
+    #-------------------------------------------------------------------
+
+    def checkpoint_save(self, name:str = None, delta = False) -> str:
+        """ Store the current state as a named checkpoint (replaces the one with the same name), defaults to the step id
+            * The oldest checkpoints are dropped over checkpoints_max
+        """
+        if name is None:
+            name = f"step_{self.step_id}"
+        if name in self.checkpoints:
+            self.checkpoint_remove(name)
+
+        store = self.links.store
+        arrays = {
+            "state": store.state, "life": store.life, "picks": store.picks, "picks_entry": store.picks_entry,
+            "dir": store.dir, "dir_from": store.dir_from, "cells_state": self.cont.cells_state,
+        }
+        prev = next(reversed(self.checkpoints.values()), None)
+        self.checkpoints[name] = cp = SimCheckpoint(name, self.step_id, arrays, self.links.comps_snapshot(), prev, delta)
+
+        while len(self.checkpoints) > self.checkpoints_max:
+            self.checkpoint_remove(next(iter(self.checkpoints)))
+
+        getStats().logDt(f"saved checkpoint {name}: {cp.nbytes()} bytes")
+        return name
+
+    def checkpoint_restore(self, name:str):
+        """ Copy back the checkpoint arrays in place and the components as they were, no comps_recalc
+            # NOTE:: the random state is not stored, the sim just continues with the current one
+        """
+        cp = self.checkpoints[name]
+        store = self.links.store
+        for k in ("state", "life", "picks", "picks_entry", "dir", "dir_from"):
+            cp.copy_to(k, getattr(store, k))
+        cp.copy_to("cells_state", self.cont.cells_state)
+        self.links.comps_restore(cp.comps)
+
+        self.step_reset()
+        self.step_id = cp.step_id
+        getStats().logDt(f"restored checkpoint {name}")
+
+    def checkpoint_remove(self, name:str):
+        """ Remove a checkpoint, the ones delta encoded against it become full """
+        cp = self.checkpoints.pop(name)
+        for other in self.checkpoints.values():
+            if other.base is cp: other.materialize()
+
+    def checkpoint_clear(self):
+        self.checkpoints = dict()
+
+    #-------------------------------------------------------------------
+
+    def reset(self, rnd = False):
+        # reset links and cells
+        if rnd: self.state_reset_rnd()
+        else: self.state_reset()
+
+        self.step_reset()
+        self.step_reset_trace()
+
+    def state_reset(self, life=1.0, picks=0):
+        # modify links arrays direclty
+        self.links.store.reset(life, picks)
+
+        # reset cells
+        self.cont.reset()
+
+        # global recalculation including graphs
+        self.links.comps_recalc()
+
+    def state_reset_rnd(self, min_val=0, max_val=1, max_picks = 8, max_entry = 8):
+        # modify links direclty
+        for l in self.links.store.views:
+            r = lambda : rnd.random() * (max_val-min_val) + min_val
+            life = r()
+            picks = int(r()*max_picks)
+            entry = int(r()*self.get_entryProbability(l)*max_entry)
+            l.reset(life, picks, entry)
+
+        # reset cells normally
+        self.cont.reset()
+
+        # global recalculation including graphs
+        self.links.comps_recalc()
+
+    def step_reset(self):
+        self.currentL   : Link  = None
+        self.prevL      : Link  = None
+        self.water      : float = self.cfg.water__start
+        self.water_abs  : float = 0
+
+        self.entryL     : Link  = None
+        self.exit_flag  : int   = SIM_EXIT_FLAG.STILL_RUNNING
+        self.step_path  : list[tuple[neigh_key_t, float]] = []
+        self.path_len   : int   = 0
+
+    def step_reset_trace(self):
+        self.step_id = self.step_depth = -1
+        self.trace_on   : bool           = False
+        self.trace_data : list[StepData] = list()
+        self.step_trace : StepData       = None
+        self.sub_trace  : SubStepData    = None
+
+    def step_log_ui(self):
+        s = f"({self.step_id},{self.step_depth}) : {SIM_EXIT_FLAG.to_str(self.exit_flag)} - w:{self.water:.2f}"
+        return s
+
+    #-------------------------------------------------------------------
+
+    def step_degradeAll(self):
+        # internal counts solid links once per cell, so degrade repeated ones more
+        self.links.store.life -= self.cfg.link_deg * self.links.internal_count
+
+    def step(self, log_step):
+        self.step_reset()
+        self.step_id += 1
+
+        # LOG: config/limit logs
+        self.logs_cutmsg_disabled_prev = DEV.logs_cutmsg_disabled
+        self.log = log_step
+        self.log_trace = self.log and self.cfg.debug_log_trace
+        self.trace_on = self.log_trace
+        log_links_prev = self.links.log
+        self.links.log = self.log
+        DEV.logs_cutmsg_disabled = True
+
+        # LOG: initial water
+        if self.log:
+            DEV.log_msg_sep(DEV.logs_cutmsg * 0.75)
+            DEV.log_msg(f" > ({self.step_id}) : starting water {self.water}", {"SIM", "STEP"})
+
+        # TRACE: writing the full trace slows down the process, even more when print to console!
+        if (self.log_trace):
+            self.step_trace = StepData()
+            self.trace_data.append(self.step_trace)
+
+
+        # get entry
+        self.get_entryLink()
+        if not self.check_start():
+            return
+
+        # LOG: entry
+        if self.log:
+            DEV.log_msg(f" > ({self.step_id}) : {self.currentL}", {"SIM", "ENTRY" })
+        # TRACE: log entry
+        if self.log_trace:
+            DEV.log_msg(f" >>> ENTRY CANDIDATES len({len(self.step_trace.entryL_candidates)})", {"SIM", "ENTRY"})
+            for (l,w) in zip(self.step_trace.entryL_candidates, self.step_trace.entryL_candidatesW):
+                DEV.log_msg(f"      [{w:.2f}] {l}", {"SIM", "ENTRY", "TRACE"})
+
+
+        # main loop with a break condition
+        self.infiltration_loop()
+        self.step_path = self.path_materialize()
+
+
+        # LOG: exit
+        if self.log:
+            DEV.log_msg(f" >>> ({self.step_id}) : exit {SIM_EXIT_FLAG.to_str(self.exit_flag)} : {self.currentL}", {"SIM", "EXIT"})
+            DEV.log_msg(f" >>> PATH len({len(self.step_path)})", {"SIM", "PATH"})
+            if self.cfg.debug_log_path:
+                for i,(k,w) in enumerate(self.step_path):
+                    DEV.log_msg(f"      [{i}] {self.links.get_link(k)} - w:{w:.2f}", {"SIM", "PATH"})
+
+        # TRACE: exitL
+        if self.trace_on:
+            self.step_trace.exitL = self.currentL
+
+        # LOG: exit cfg
+        if self.log:
+            DEV.log_msg_sep(DEV.logs_cutmsg * 0.75)
+        self.links.log = log_links_prev
+        DEV.logs_cutmsg_disabled = self.logs_cutmsg_disabled_prev
+
+    def run_batch(self, n:int, keep_paths=1, log_lastIters=0, log_everyIters=0) -> int:
+        """ Run n infiltrations with minimal bookkeeping, returns the amount of steps run
+            * Only the last log_lastIters steps go through the logged step, the rest skip logs and trace entirely
+            * Paths stay in the scratch buffers, only materialized for the last keep_paths steps (kept in batch_paths)
+            * Stops on the same exit flags as the step operator: no entry link or stop on break
+        """
+        log_from = n - log_lastIters
+        keep_from = n - keep_paths
+        self.batch_paths = []
+        self.step_path = []
+
+        log_links_prev = self.links.log
+        self.links.log = False
+        steps = 0
+        for step_id in range(n):
+            # still alive msg
+            if log_everyIters and step_id%log_everyIters == 0:
+                DEV.log_msg(f"// ({step_id}) running...", {'SIM'})
+
+            if step_id >= log_from: self.step(True)
+            else: self.step_fast()
+            steps += 1
+
+            # also keep the path of the step that stops the batch
+            stop = self.exit_flag == SIM_EXIT_FLAG.NO_ENTRY_LINK or self.exit_flag >= SIM_EXIT_FLAG.STOP_ON_LINK_BREAK
+            if step_id >= keep_from or stop:
+                if not self.step_path: self.step_path = self.path_materialize()
+                self.batch_paths.append(self.step_path)
+            if stop:
+                break
+
+        self.links.log = log_links_prev
+        return steps
+
+    def step_fast(self):
+        """ Same simulation as step but without logs, trace nor path list allocations """
+        self.currentL = self.prevL = self.entryL = None
+        self.water = self.cfg.water__start
+        self.water_abs = 0
+        self.exit_flag = SIM_EXIT_FLAG.STILL_RUNNING
+        self.path_len = 0
+        self.step_path = []
+        self.step_id += 1
+        self.log = self.log_trace = self.trace_on = False
+
+        # get entry and run the main loop
+        self.get_entryLink()
+        if not self.check_start():
+            return
+        self.infiltration_loop()
+
+    def infiltration_buildPath(self):
+        if self.currentL:
+            if self.path_len == len(self.path_ids):
+                self.path_grow()
+            self.path_ids[self.path_len] = self.currentL.id
+            self.path_water[self.path_len] = self.water
+            self.path_len += 1
+
+    def path_grow(self):
+        """ Double the path buffers, only happens until reaching the max depth reached so far """
+        size = max(2*len(self.path_ids), 64)
+        self.path_ids = np.resize(self.path_ids, size)
+        self.path_water = np.resize(self.path_water, size)
+
+    def path_materialize(self) -> list[tuple[neigh_key_t, float]]:
+        """ Build the step path list (link keys and water) from the buffers """
+        keys = self.links.store.keys
+        ids = self.path_ids[:self.path_len].tolist()
+        water = self.path_water[:self.path_len].tolist()
+        return [ (keys[i], w) for i,w in zip(ids, water) ]
+
+    def infiltration_loop(self):
+        self.step_depth = -1
+        while self.check_continue():
+            self.step_depth += 1
+
+            # TRACE: build step
+            if self.trace_on:
+                self.sub_trace = SubStepData()
+                self.step_trace.subs.append(self.sub_trace)
+
+            # choose next link to propagate
+            self.get_nextLink()
+
+            # apply degradation etc
+            if self.currentL:
+                self.water_degradation()
+                self.link_degradation()
+
+                # TRACE: log step
+                if self.log_trace:
+                    DEV.log_msg(f" > ({self.step_id},{self.step_depth})"
+                                f" : {self.sub_trace.currentL}, n{len(self.sub_trace.currentL_candidates)}"
+                                f" - dw({self.sub_trace.water_abs:.3f}) dl({self.sub_trace.currentL_deg:.3f}) : w({self.sub_trace.water:.3f})"
+                                #f" : n{len(self.sub_trace.currentL_candidates)} {self.sub_trace.currentL_candidatesW[:32]}"
+                                ,{"SIM", "NEXT", "TRACE"})
+                    if self.cfg.debug_log_trace_candidates:
+                        for (l,w) in zip(self.sub_trace.currentL_candidates, self.sub_trace.currentL_candidatesW):
+                            DEV.log_msg(f"      [{w:.2f}] {l}", {"SIM", "NEXT", "TRACE"})
+
+    #-------------------------------------------------------------------
+    #  https://docs.python.org/dev/library/random.html#random.choices
+
+    def get_entryLink(self):
+        sampler = self.get_entrySampler()
+
+        # candidates not found or all prob_weights being null
+        pick = sampler.sample(rnd.random()) if self.links.external_count.any() else -1
+        if pick == -1:
+            self.entryL = None
+        else:
+            self.entryL = self.links.store.views[pick]
+            self.entryL.picks_entry +=1
+
+        # found an entry
+        if self.entryL:
+            self.currentL = self.entryL
+
+        self.infiltration_buildPath()
+
+        # TRACE: build entry
+        if self.trace_on:
+            candidates = self.links.external
+            self.step_trace.entryL = self.entryL
+            self.step_trace.entryL_candidates = candidates
+            self.step_trace.entryL_candidatesW = [ self.get_entryProbability(l) for l in candidates ]
+
+    def get_entrySampler(self) -> FenwickTree:
+        """ Cached entry distribution over link ids, only updated when the external links or the entry cfg change """
+        key = (tuple(self.cfg.dir_entry), self.cfg.dir_entry_minAlign, self.cfg.debug_skip_entry_area, self.links.external_version)
+        if key != self.entry_sampler_key:
+            # external links repeated would be picked more often by rnd.choices, so keep that as multiplicity
+            weights = self.get_entryProbability_all() * self.links.external_count
+
+            if self.entry_sampler is None:
+                self.entry_sampler = FenwickTree(weights)
+            else:
+                changed = self.entry_sampler.update(weights)
+                if self.log: DEV.log_msg(f"Entry sampler updated: {changed} changed", {"SIM", "ENTRY"})
+            self.entry_sampler_key = key
+
+        return self.entry_sampler
+
+    def get_entryProbability_all(self) -> np.ndarray:
+        """ Vectorized version of get_entryProbability for all links """
+        store = self.links.store
+        water_dir_inv = -normalized(self.cfg.dir_entry)
+        a = store.dir.astype(np.float64) @ water_dir_inv
+        p = self.get_entryAlign_batch(a)
+
+        # weight using face area (normalized)
+        if not self.cfg.debug_skip_entry_area:
+            p *= store.areaFactor
+
+        return p
+
+    def get_entryAlign_batch(self, a:np.ndarray) -> np.ndarray:
+        """ Cut-off and normalization of precomputed alignments, see get_entryAlign """
+        minAlign = self.cfg.dir_entry_minAlign
+        return np.where(a < minAlign, 0.0, (a - minAlign) / (1.0 - minAlign))
+
+    def get_entryProbability(self, l:Link):
+        # link dir align (face normal)
+        a = self.get_entryAlign(l.dir)
+        p = a
+
+        # weight using face area (normalized)
+        if not self.cfg.debug_skip_entry_area:
+            p*= l.areaFactor
+
+        return p
+
+    def get_entryAlign(self, vdir, bothDir=False):
+        # relative position water dir
+        water_dir_inv = -normalized(self.cfg.dir_entry)
+        a = float(np.dot(vdir, water_dir_inv))
+        if bothDir: a = abs(a)
+
+        # cut-off
+        if a < self.cfg.dir_entry_minAlign:
+            return 0
+
+        # normalize including potential negative align
+        a_norm = (a - self.cfg.dir_entry_minAlign) / (1.0 - self.cfg.dir_entry_minAlign)
+        return a_norm
+
+    #-------------------------------------------------------------------
+
+    def get_nextLink(self):
+        # merge neighs, the water could scape to the outer surface
+        views = self.links.store.views
+        candidates = self.links.get_link_neighs_ids(self.currentL.id)
+
+        ## drop prev from candidates? implicit by gravity direction
+        #if self.prevL: candidates -= [self.prevL]
+
+        # candidates not found
+        if not len(candidates):
+            self.currentL = None
+            prob_weights = []
+
+        # rnd.choices may fail due to all prob_weights being null etc
+        else:
+            prob_weights = self.get_nextProbability_batch(candidates)
+            self.prevL = self.currentL
+            try:
+                # NOTE:: passing the cumulative weights keeps rnd.choices semantics (and rng consumption) unchanged
+                picks = rnd.choices(candidates, cum_weights=np.cumsum(prob_weights).tolist())
+                self.currentL = views[picks[0]]
+                self.currentL.picks += 1
+
+            except ValueError as e:
+                self.currentL = None
+
+        self.infiltration_buildPath()
+
+        # TRACE: build next
+        if self.trace_on:
+            self.sub_trace.currentL = self.currentL
+            self.sub_trace.currentL_candidates = [ views[i] for i in candidates ]
+            self.sub_trace.currentL_candidatesW = list(prob_weights)
+
+    def get_nextProbability(self, l:Link):
+        # links hanging in the air are not valid (rare case)
+        if not self.links.solid_link_check(l):
+            return 0
+
+        # relative pos align
+        dpos = l.pos - self.currentL.pos
+        a = self.get_nextAlign(dpos)
+        p = a * self.cfg.link_next_dir_weight
+
+        # weight by link resistance field
+        if l.state == LINK_STATE_ENUM.SOLID:
+            r = self.link_resistance(l)
+            if not self.cfg.debug_skip_next_maxResist:
+                r = min(r, 0.999)
+            p *= 1-r
+
+        # weight the probability of air links
+        if l.state != LINK_STATE_ENUM.SOLID:
+            p *= self.cfg.link_next_exit_avoidance
+
+        return p
+
+    def get_nextProbability_batch(self, ids:np.ndarray) -> np.ndarray:
+        """ Vectorized version of get_nextProbability over a slice of link ids, same semantics """
+        store = self.links.store
+        cells_state = self.links.cont.cells_state
+        key_cells = store.key_cells[ids]
+        state = store.state[ids]
+
+        # links hanging in the air are not valid, walls have negative id so only check c1 for non walls
+        valid = cells_state[key_cells[:,1]] != CELL_STATE_ENUM.AIR
+        notWall = state != LINK_STATE_ENUM.WALL
+        c1 = np.where(notWall, key_cells[:,0], 0)
+        valid |= notWall & (cells_state[c1] != CELL_STATE_ENUM.AIR)
+
+        # relative pos align (zero length deltas align 0 like Vector.normalized)
+        dpos = store.pos[ids].astype(np.float64) - store.pos[self.currentL.id]
+        norm = np.linalg.norm(dpos, axis=1)
+        water_dir_inv = normalized(self.cfg.dir_next)
+        a = np.divide(dpos @ water_dir_inv, norm, out=np.zeros(len(ids)), where=norm > 0)
+        p = self.get_nextAlign_batch(a) * self.cfg.link_next_dir_weight
+
+        # weight by link resistance field
+        solid = state == LINK_STATE_ENUM.SOLID
+        r = np.maximum(store.life[ids], 0.0) * store.resistance[ids] * self.cfg.link_resist_weight
+        if not self.cfg.debug_skip_next_maxResist:
+            r = np.minimum(r, 0.999)
+        p = np.where(solid, p * (1-r), p * self.cfg.link_next_exit_avoidance)
+
+        p[~valid] = 0
+        return p
+
+    def get_nextAlign_batch(self, a:np.ndarray) -> np.ndarray:
+        """ Cut-off and normalization of precomputed alignments, see get_nextAlign """
+        minAlign = self.cfg.dir_next_minAlign
+        return np.where(a < minAlign, 0.0, (a - minAlign) / (1.0 - minAlign))
+
+    def get_nextAlign(self, vdir, bothDir=False):
+        # relative pos align
+        water_dir_inv = normalized(self.cfg.dir_next)
+        a = float(np.dot(normalized(vdir), water_dir_inv))
+        if bothDir: a = abs(a)
+
+        # cut-off
+        if a < self.cfg.dir_next_minAlign:
+            return 0
+
+        # normalize including potential negative align
+        a_norm = (a - self.cfg.dir_next_minAlign) / (1.0 - self.cfg.dir_next_minAlign)
+        return a_norm
+
+    #-------------------------------------------------------------------
+
+    def link_resistance(self, l:Link):
+        # dead link opposes no resistance (but never negative)
+        r = max(l.life, 0.0)
+
+        # mod by the resistance field at its center
+        r *= l.resistance * self.cfg.link_resist_weight
+
+        ## also consider area factor so area size affects the resistance opposed?
+        #if self.cfg.debug_skip_next_area:
+        #    r *= l.areaFactor
+        return r
+
+    def link_degradation(self):
+        d = -1
+        if self.currentL.state == LINK_STATE_ENUM.SOLID:
+
+            # degradation depends on water abs but distributed over the link surface (cancels out area)
+            d = self.water_abs * self.cfg.link_deg / self.currentL.areaFactor
+
+            # apply degradation -> potential break
+            self.currentL.degrade(d)
+
+            if self.link_rnd_break_event():
+                self.currentL.life = -1
+
+            if self.currentL.life <= 0:
+                if self.log: DEV.log_msg(f" *** ({self.step_id}) : link_break_event {self.currentL}", {"SIM", "EVENT"})
+                breaking = self.links.setState_link_check(self.currentL.key_cells, LINK_STATE_ENUM.AIR)
+
+                # stop simulation on break
+                if self.cfg.step_stopBreak:
+                    if "LINK" in self.cfg.step_stopBreak_event:
+                        self.exit_flag = SIM_EXIT_FLAG.STOP_ON_LINK_BREAK
+                    elif "CELL" in self.cfg.step_stopBreak_event:
+                        if breaking:
+                            self.exit_flag = SIM_EXIT_FLAG.STOP_ON_CELL_BREAK
+
+        # TRACE: link deg
+        if self.trace_on:
+            self.sub_trace.currentL_deg = d
+            self.sub_trace.currentL_life = self.currentL.life
+
+    def link_rnd_break_event(self):
+        if self.currentL.life < self.cfg.link_rnd_break_minCheck:
+            minLife = self.currentL.life / self.cfg.link_rnd_break_minCheck
+            if minLife * self.cfg.link_rnd_break_resistProb < rnd.random():
+                if self.log: DEV.log_msg(f" *** ({self.step_id}) : link_rnd_break_event L{self.currentL}", {"SIM", "EVENT"})
+                return True
+        return False
+
+    def water_degradation(self):
+        # check potential full water absorption
+        if not self.water_rnd_abs_event():
+
+            # minimun abs that happens when the water runs through a exterior face or an eroded interior one
+            if self.currentL.state != LINK_STATE_ENUM.SOLID:
+                wa = self.cfg.water_abs_air * self.currentL.areaFactor
+                w = wa
+
+            # interior solid abs takes into account resistance too
+            else:
+                wr = self.link_resistance(self.currentL) * self.cfg.water_deg
+                wa = self.cfg.water_abs_solid * self.currentL.areaFactor
+                w = wa + wr
+
+            # abs water
+            self.water -= w
+            if self.water > 0:
+                self.water_abs = w
+            else:
+                self.water_abs = w + self.water
+                self.water = 0
+
+        # TRACE: water abs
+        if self.trace_on:
+            self.sub_trace.water_abs = self.water_abs
+            self.sub_trace.water = self.water
+
+    def water_rnd_abs_event(self):
+        if self.water < self.cfg.water_rnd_abs_minCheck:
+            minAbsorb = self.water / self.cfg.water_rnd_abs_minCheck
+            if minAbsorb * self.cfg.water_rnd_abs_continueProb < rnd.random():
+                self.exit_flag = SIM_EXIT_FLAG.NO_WATER_RND
+                if self.log: DEV.log_msg(f" *** ({self.step_id}) : water_rnd_abs_event w:{self.water}", {"SIM", "EVENT"})
+
+                # consider how much water was abs
+                self.water_abs = self.cfg.water_rnd_abs_damage * self.water
+                self.water -= self.water_abs
+                return True
+
+        return False
+
+    #-------------------------------------------------------------------
+
+    def check_start(self):
+        # no entry link was found
+        if not self.entryL:
+            self.exit_flag = SIM_EXIT_FLAG.NO_ENTRY_LINK
+
+        return self.check_exit_flag()
+
+    def check_continue(self):
+        if self.exit_flag == SIM_EXIT_FLAG.STILL_RUNNING:
+
+            # no next link was found
+            if not self.currentL:
+                if self.prevL.state == LINK_STATE_ENUM.WALL: self.exit_flag = SIM_EXIT_FLAG.NO_NEXT_LINK_WALL
+                else: self.exit_flag = SIM_EXIT_FLAG.NO_NEXT_LINK
+
+            # no more water
+            elif self.water <= 0:
+                self.exit_flag = SIM_EXIT_FLAG.NO_WATER
+
+            # max iterations when enabled
+            elif self.cfg.step_maxDepth != -1 and self.step_depth >= self.cfg.step_maxDepth-1:
+                self.exit_flag = SIM_EXIT_FLAG.MAX_DEPTH
+
+        # the flag could be potentially set at other steps: link break, water rnd abs...
+        return self.check_exit_flag()
+
+    def check_exit_flag(self):
+        # found msg means exit condition was met
+        if self.exit_flag != SIM_EXIT_FLAG.STILL_RUNNING:
+            # TRACE: keep msg per trace
+            if self.trace_on:
+                self.step_trace.break_flag = self.exit_flag
+
+            # set the log for at least the last iter
+            if self.exit_flag >= SIM_EXIT_FLAG.STOP_ON_LINK_BREAK:
+                self.log = True
+                self.log_trace = self.cfg.debug_log_trace
+
+            return False
+
+        # continue sim when no exit msg recorded
+        return True
\ No newline at end of file
@@ -0,0 +1,161 @@
+import bpy
+import bpy.types as types
+import numpy as np
+import os, shutil, json
+
+from . import handlers
+from .properties_global import MW_global_storage, MW_id_utils
+from .properties_utils import hashProps_rec
+
+from .mw_fract import MW_Fract
+from .mw_cont import MW_Cont
+from .mw_links import MW_Links
+from .mw_sim import MW_Sim
+from .mw_voro_cache import voro_cache
+
+from .utils_dev import DEV
+from .stats import getStats
+
+# NOTE:: the fracture is stored as a folder of plain .npy files, loaded memory mapped (copy on write) so only the touched pages are read
+# NOTE:: still not fully lazy, the links store builds its python keys and views and the cells graph per link on load
+# NOTE:: the voro++ container is not stored here, the container and links are rebuilt from their precalculated arrays (voro cells are cached apart, see mw_voro_cache)
+#-------------------------------------------------------------------
+
+CACHE_VERSION = 3
+""" Bump when the stored arrays change, older caches are ignored """
+
+def get_cache_dir() -> str:
+    """ Folder next to the .blend file, or the session temp folder for unsaved files """
+    if bpy.data.filepath:
+        return os.path.join(os.path.dirname(bpy.data.filepath), ".mw_cache")
+    return os.path.join(bpy.app.tempdir, "mw_cache")
+
+def get_voro_cache_dir() -> str|None:
+    """ Voro containers are keyed by their inputs so they are shared by all the fractures, only stored when the disk cache is enabled """
+    if not MW_global_storage.enable_diskCache:
+        return None
+    return os.path.join(get_cache_dir(), "voro")
+
+def get_cache_path(root: types.Object) -> str:
+    """ Keyed by the file, the root storage id and the generation cfg, so a different cfg never loads a stale fracture """
+    blendName = os.path.splitext(os.path.basename(bpy.data.filepath))[0] or "unsaved"
+    key = hashProps_rec(root.mw_gen)[:16]
+    return os.path.join(get_cache_dir(), f"{blendName}_{root.mw_id.storage_id}_{key}")
+
+load_failed : set[str] = set()
+""" Cache paths (storage id + cfg hash) that failed to load, not read again until a save rewrites them or a file is loaded """
+
+#-------------------------------------------------------------------
+
+def save_fract(fract: MW_Fract, root: types.Object) -> str:
+    """ Store the container, links and sim state arrays, written to a temp folder and then swapped """
+    path = get_cache_path(root)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    arrays = { f"cont_{k}": v for k,v in fract.cont.cache_arrays().items() }
+    arrays.update({ f"links_{k}": v for k,v in fract.links.snapshot(picks=True).items() })
+    # components only stored when uptodate with the state, otherwise recalculated on load
+    links = fract.links
+    if not links.frontier_full and not links.frontier_pending_cells and not links.frontier_pending_links:
+        arrays.update({ f"comps_{k}": v for k,v in links.comps_snapshot().items() })
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({ "version": CACHE_VERSION, "root": root.name, "arrays": sorted(arrays.keys()) }, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    load_failed.discard(path)
+
+    # remove the caches of previous cfgs of the same root, only the last generated one can be loaded
+    prefix = os.path.basename(path).rsplit("_", 1)[0] + "_"
+    for name in os.listdir(os.path.dirname(path)):
+        other = os.path.join(os.path.dirname(path), name)
+        if name.startswith(prefix) and "_" not in name[len(prefix):] and other != path and os.path.isdir(other):
+            shutil.rmtree(other, ignore_errors=True)
+    getStats().logDt(f"saved fract cache: {root.name} -> {path}")
+    return path
+
+def load_fract(root: types.Object) -> MW_Fract|None:
+    """ Rebuild the fracture from the cache of the root (None when there is no valid cache) """
+    path = get_cache_path(root)
+    if path in load_failed or not os.path.isdir(path):
+        return None
+
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION:
+            DEV.log_msg(f"Skip cache version {meta.get('version')}: {path}", {"CACHE", "LOAD"})
+            load_failed.add(path)
+            return None
+
+        data = { name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c") for name in meta["arrays"] }
+        cont_data = { k[5:]: v for k,v in data.items() if k.startswith("cont_") }
+        links_data = { k[6:]: v for k,v in data.items() if k.startswith("links_") }
+        comps_data = { k[6:]: v for k,v in data.items() if k.startswith("comps_") } or None
+
+        fract = MW_Fract()
+        fract.cont = MW_Cont.from_cache(root, cont_data)
+        # the scene cells could have changed since the save, then the components are recalculated
+        if not np.array_equal(fract.cont.cells_state, cont_data["cells_state"]) or fract.cont.deletedId != cont_data["deletedId"].tolist():
+            comps_data = None
+        fract.links = MW_Links(fract.cont, snap=links_data, comps=comps_data)
+        fract.sim = MW_Sim(fract.cont, fract.links)
+        getStats().logDt(f"loaded fract cache: {root.name} <- {path}")
+        return fract
+
+    except Exception as e:
+        DEV.log_msg(f"exception loading cache >> {str(e)}", {"CACHE", "LOAD", "ERROR"})
+        load_failed.add(path)
+        return None
+
+#-------------------------------------------------------------------
+
+def save_fracts_callback(_scene_=None, _name_=None):
+    """ Store all the fractures in memory whose root is still in the scene """
+    if not MW_global_storage.enable_diskCache:
+        return
+    for id, fract in list(MW_global_storage.id_fracts.items()):
+        root = MW_global_storage.id_fracts_obj.get(id)
+        if not fract.links or not fract.links.initialized or root is None:
+            continue
+        try:
+            save_fract(fract, root)
+        except Exception as e:
+            DEV.log_msg(f"exception saving cache >> {str(e)}", {"CACHE", "SAVE", "ERROR"})
+
+    # the saved caches might now hold the roots that missed before
+    MW_global_storage.id_fracts_missed.clear()
+
+def storage_uuid_callback(_scene_=None, _name_=None):
+    """ The storage id counter restarts each session, skip the ids already used by the loaded roots
+        * Also forget the previous misses, the ids now refer to the roots of the new file
+    """
+    MW_global_storage.id_fracts_missed.clear()
+    load_failed.clear()
+    for scene in bpy.data.scenes:
+        for root in MW_id_utils.getSceneRoots(scene):
+            MW_id_utils.storage_uuid = max(MW_id_utils.storage_uuid, root.mw_id.storage_id+1)
+
+#-------------------------------------------------------------------
+# Blender events
+_name = f"{__name__[14:]}" #\t(...{__file__[-32:]})"
+
+def register():
+    DEV.log_msg(f"{_name}", {"ADDON", "INIT", "REG"})
+    MW_global_storage.fract_loader = load_fract
+    voro_cache.disk_dir_fn = get_voro_cache_dir
+    handlers.callback_saveFile_actions.append(save_fracts_callback)
+    handlers.callback_loadFile_actions.append(storage_uuid_callback)
+
+def unregister():
+    DEV.log_msg(f"{_name}", {"ADDON", "INIT", "UN-REG"})
+    MW_global_storage.fract_loader = None
+    voro_cache.disk_dir_fn = None
+    handlers.callback_saveFile_actions.remove(save_fracts_callback)
+    handlers.callback_loadFile_actions.remove(storage_uuid_callback)
+
+DEV.log_msg(f"{_name}", {"ADDON", "PARSED"})
@@ -1,12 +1,13 @@
 import bpy
 import bpy.types as types
 from mathutils import Vector, Matrix
-INF_FLOAT = float("inf")
 import networkx as nx
-import itertools
+import numpy as np
 
 from .mw_cont import MW_Cont, CELL_ERROR_ENUM, CELL_STATE_ENUM, neigh_key_t, neighFaces_key_t
-from .mw_resistance import field_R_current
+from .mw_resistance import field_R_eval_pos
+from .mw_links_store import LinkStore, CSR
+from .mw_core_links import CoreLinks, LINK_STATE_ENUM, Link as CoreLink
 
 from . import utils, utils_trans
 from .utils_trans import VECTORS
@@ -15,261 +16,97 @@ from .stats import getStats
 
 #-------------------------------------------------------------------
 
-class LINK_STATE_ENUM:
-    """ Current links state, preserves some sequentiality """
-    SOLID = 0
-    AIR = 1
-    WALL = 2
-
-    all = { SOLID, AIR, WALL }
-
-    @classmethod
-    def to_str(cls, e:int):
-        if e == cls.SOLID:  return "SOLID"
-        if e == cls.AIR:    return "AIR"
-        if e == cls.WALL:   return "WALL"
-        return "none"
-        #raise ValueError(f"CELL_STATE_ENUM: {e} is not in {cls.all}")
-    @classmethod
-    def from_str(cls, s:str):
-        if s == "SOLID":    return cls.SOLID
-        if s == "AIR":      return cls.AIR
-        if s == "WALL":     return cls.WALL
-        raise ValueError(f"CELL_STATE_ENUM: {s} is not in {set(LINK_STATE_ENUM.to_str(s) for s in cls.all)}")
-
-class Link():
-    """ # OPT:: could use separate array of props? pyhton already slow so ok class?"""
-
-    def __init__(self, key_cells: neigh_key_t, key_faces: neighFaces_key_t,
-                pos_world:Vector, dir_world:Vector, dir_from:int,
-                face_area:float, resistance:float, state=LINK_STATE_ENUM.SOLID):
-        # no directionality but tuple key instead of set
-        self.key_cells : neigh_key_t      = key_cells
-        self.key_faces : neighFaces_key_t = key_faces
-
-        # sim props
-        self.state_initial = state
-        self.reset()
-
-        # properties in world space
-        self.pos = pos_world
-        self.dir = dir_world
-        self.dir_from = dir_from
-        # properties to later normalize or divide by avg
-        self.area = face_area
-        self.areaFactor = 1
-
-        # NOTE:: resistance atm defined by 2D field -> potentially already normalized so no need for factor
-        self.resistance = resistance
-        #self.resistanceFactor = 1 # resistance already normalized
-
-    def reset(self, life=1.0, picks=0, picks_entry=0):
-        """ Reset simulation parameters """
-        self.state = self.state_initial
-        self.life = life
-        self.picks = picks
-        self.picks_entry = picks_entry
-
-    def backupState(self):
-        """ Backup simulation parameters """
-        self.backup_state = self.state
-        self.backup_life = self.life
-        self.backup_picks = self.picks
-        self.backup_picks_entry = self.picks_entry
-
-    def backupState_restore(self):
-        """ Restore simulation parameters with backup """
-        self.state = self.backup_state
-        self.life = self.backup_life
-        self.picks = self.backup_picks
-        self.picks_entry = self.backup_picks_entry
-
-    def __str__(self):
-        #a({self.area:.2f}), p({self.picks},{self.picks_entry}),
-        if self.state == LINK_STATE_ENUM.WALL:
-            return f"W{self.key_cells[0]} entries({self.picks_entry}), dir{self.dir.to_tuple(2)}"
-        elif self.state == LINK_STATE_ENUM.AIR:
-            return f"A{self.key_cells} entries({self.picks_entry}), picks({self.picks}), dir{self.dir.to_tuple(2)}"
-        else:
-            #return f"K{self.key_cells}: life({self.life:.3f}), dir{self.dir.to_tuple(2)}"
-            return f"k{self.key_cells} life({self.life:.3f}), picks({self.picks})"
-
-    #-------------------------------------------------------------------
-
-    def set_broken(self):
-        self.state = LINK_STATE_ENUM.AIR
-        self.life = 0
-        #self.picks = 0
-
-    def flip_dir(self):
-        self.dir = -self.dir
-        if self.dir_from == self.key_cells[0]:
-            self.dir_from = self.key_cells[1]
-        else:
-            self.dir_from = self.key_cells[0]
-
-    def update_resistance(self):
-        self.resistance = field_R_current().get2D(self.pos.x, self.pos.z)
-
-    def degrade(self, deg):
-        """ Degrade link life, no clamping """
-        self.life -= deg
+class Link(CoreLink):
+    """ Blender view of a link: pos/dir as mathutils Vector copies """
+    __slots__ = ()
 
     @property
-    def life_clamped(self):
-        """ Get link life clamped [0,1] """
-        return min( max(self.life, 0), 1)
-
-    def clamp(self):
-        """ Clamp link life [0,1] """
-        self.life = self.life_clamped
-
-    def key_cells_other(self, cell_id):
-        if self.key_cells[0] == cell_id:
-            return self.key_cells[1]
-        assert(self.key_cells[1] == cell_id)
-        return self.key_cells[0]
-
-    def key_faces_other(self, face_id):
-        if self.key_faces[0] == face_id:
-            return self.key_faces[1]
-        assert(self.key_faces[1] == face_id)
-        return self.key_faces[0]
+    def pos(self) -> Vector:
+        return Vector(self.store.pos[self.id])
+    @property
+    def dir(self) -> Vector:
+        return Vector(self.store.dir[self.id])
+    @dir.setter
+    def dir(self, v):
+        self.store.dir[self.id] = v
+
+    def update_resistance(self):
+        self.resistance = field_R_eval_pos(self.store.pos[self.id])[0]
 
 #-------------------------------------------------------------------
 
-class MW_Links():
+class MW_Links(CoreLinks):
+    """ Blender adapter of the links: builds the store from the container faces, the graph logic lives in CoreLinks """
 
-    def __init__(self, cont: MW_Cont):
+    def __init__(self, cont: MW_Cont, snap: dict[str, np.ndarray] = None, comps: dict[str, np.ndarray] = None):
         stats = getStats()
-        self.initialized = False
-        """ Set to true after succesfully computed the link map """
-
-        self.log = True
-        """ Affects some logs, not all"""
-
-        self.cont = cont
-        """ Shortcut to container """
-
-        self.cells_graph = nx.Graph()
-        """ Graph connecting the cells to find connected components, also adds walls with negative indices
-            # NOTE:: edges for a given node are not returned sorted by face, use faceKey inside the link to get the actual face index
-            # NOTE:: adding edges creates nodes, but added edges might swap the indices order! use getKey_swap to make sure
-            # NOTE:: removing nodes from the graphs takes all their edges too (use subgraphs)
-        """
-
-        self.comps = []
-        """ List of sets with connected components cells id """
-        self.comps_subgraph = nx.Graph()    # used to leave cells_graph untouched (edges get removed along nodes)
-        self.comps_len = 1                  # initial expected
-
-        self.air_graph = nx.Graph()
-        """ Used to determine air bubbles inside the model """
-        self.air_comps = []
-        self.air_comps_len = 1
-
-        self.links_graph = nx.Graph()
-        """ Graph connecting links! Links connect with other links from adjacent faces from both cells """
-        self.external : list[Link] = list()
-        """ Dynamic list of external links: AIR/WALL to CELL, mainly used as entry points in the simulation """
-        self.internal : list[Link] = list()
-        """ Dynamic list of internal links: CELL to CELL, mainly used for rendering of the links """
-
-        # OPT:: maybe voro++ face normal/area is faster?
-        self.min_pos = Vector([INF_FLOAT]*3)
-        self.max_pos = Vector([-INF_FLOAT]*3)
-        self.min_area,  self.max_area, self.avg_area = INF_FLOAT, -INF_FLOAT, 1
-        self.min_resistance,  self.max_resistance, self.avg_resistance = INF_FLOAT, -INF_FLOAT, 1
-
-        # FIRST loop to build the global dictionaries
-        for idx_cell in cont.foundId:
-            # skip deleted afterwards
-            if idx_cell in cont.deletedId:
-                continue
-
-            # Will store some constant precalculated global data in the links
-            obj        = cont.cells_objs[idx_cell]
-            me         = cont.cells_meshes[idx_cell]
-            m_toWorld  = utils_trans.get_worldMatrix_unscaled(obj, update=True)
-            mn_toWorld = utils_trans.get_normalMatrix(m_toWorld)
-
-            # iterate all faces including asymmetry placeholders (missing cells already ignored with cont_foundId)
-            for idx_face, idx_neighCell in enumerate(cont.neighs[idx_cell]):
-
-                # skip asymmetric (already prefilled keys_perCell)
-                if idx_neighCell in CELL_ERROR_ENUM.all:
-                    continue
-                if idx_neighCell in cont.deletedId:
-                    continue
-
-                # get link dir props
-                face: types.MeshPolygon = me.polygons[idx_face]
-                normal = mn_toWorld @ face.normal
-                # NOTE:: rotated normals may potentially have a length of 1.0 +- 1e-8 but not worth normalizing
-                #DEV.log_msg(f"face.normal {face.normal} (l: {face.normal.length}) -> world {normal} (l: {normal.length})", cut=False)
-
-                # skip aligned with z for debug model
-                if MW_Links.skip_dir_debugModel(normal):
-                    # could set IGNORED error idx but not worth it
-                    continue
-
-                # get world props, some normalized afterwards
-                pos = m_toWorld @ face.center
-                area = face.area
-                resistance = field_R_current().get2D(pos.x, pos.z)
-
-                if idx_neighCell < 0:
-                    self.update_limits(pos, area, resistance)
-
-                    # link to a wall, wont be repeated
-                    key = (idx_neighCell, idx_cell)
-                    key_faces = (idx_neighCell, idx_face)
-                    l = Link(key, key_faces, pos, normal, idx_cell, area, resistance, LINK_STATE_ENUM.WALL)
+        super().__init__(cont)
+        self.cont : MW_Cont = cont
+
+        # internal links drawn in the scene: link ids in draw order (tube k is link internal_scene_ids[k]), tube endpoints and the drawn life/widths
+        self.internal_scene_ids    : np.ndarray = None
+        self.internal_scene_pairs  : np.ndarray = None
+        self.internal_scene_life   : np.ndarray = None
+        self.internal_scene_widths : np.ndarray = None
+        self.internal_scene_cfg    : tuple = None
+
+        # rebuild from a cached snapshot instead, skips the faces gathering and the neighbours aggregation
+        # NOTE:: the snapshot arrays are referenced (memory mapped copy on write) and links_graph is left empty, only used while building (the sim uses neighs_csr)
+        if snap is not None:
+            self.init_from_snapshot(snap, Link, copy=False, comps=comps)
+            for key in self.store.keys:
+                if key[0] < 0: cont.keys_perWall[key[0]].append(key)
+            stats.logDt(f"links from snapshot: {self.links_len}")
+            return
 
-                    # add to graphs and external
-                    self.cells_graph.add_edge(*key, l=l)
-                    #self.links_graph.add_node(key, l=l)
-                    self.external.append(l)
-                    # also static cont maps
-                    cont.keys_perWall[idx_neighCell].append(key)
-                    cont.keys_perCell[idx_cell][idx_face] = key
+        # a cache loaded cont only keeps the maps flat
+        if not cont.precalculated_maps:
+            cont.precalculations_maps()
 
-                else:
-                    # internal link, check unique between cells (networkx works without swapping the key tho)
-                    key,swap = self.getKey_swap(idx_cell, idx_neighCell)
-                    if self.cells_graph.has_edge(*key):
-                    #if self.links_graph.has_node(key):
-                        continue
-
-                    # only taken into account once! otherwise skewed averages
-                    self.update_limits(pos, area, resistance)
-
-                    # build the link
-                    idx_neighFace = cont.neighs_faces[idx_cell][idx_face]
-                    key_faces = self.getKey(idx_face, idx_neighFace, swap)
-                    l = Link(key, key_faces, pos, normal, idx_cell, area, resistance, LINK_STATE_ENUM.SOLID)
-
-                    # add to graphs and internal
-                    self.cells_graph.add_edge(*key, l=l)
-                    #self.links_graph.add_node(key, l=l)
-                    self.internal.append(l)
-                    # also static cont maps
-                    cont.keys_perCell[idx_cell][idx_face] = key
-                    cont.keys_perCell[idx_neighCell][idx_neighFace] = key
-
-
-        # count the links and calcualte averages
-        self.links_len = self.cells_graph.number_of_edges()
-        if self.links_len:
-            self.avg_area /= float(self.links_len)
-            self.avg_resistance /= float(self.links_len)
+        # FIRST gather the faces of all cells in bulk, already in world space (precalculated from voro++)
+        f_cell, f_face, f_neigh, f_neighFace, f_pos, f_dir, f_area = self.build_faces_arrays(cont)
+        stats.logDt(f"gathered faces arrays: {len(f_cell)}")
 
+        # skip asymmetric (already prefilled keys_perCell) and deleted afterwards
+        valid = ~np.isin(f_neigh, list(CELL_ERROR_ENUM.all)) & ~np.isin(f_neigh, cont.deletedId)
+        # skip aligned with z for debug model (could set IGNORED error idx but not worth it)
+        if DEV.DEBUG_MODEL:
+            valid &= np.abs(f_dir @ np.array(VECTORS.backY)) <= VECTORS.dot_aligned_threshold
+        # links to walls wont be repeated, internal links only taken into account once (from the lower cell id)! otherwise skewed averages
+        wall = f_neigh < 0
+        valid &= wall | (f_cell < f_neigh)
+        sel = np.flatnonzero(valid)
+        wall = wall[sel]
+        f_cell, f_face, f_neigh, f_neighFace = f_cell[sel], f_face[sel], f_neigh[sel], f_neighFace[sel]
+
+        # keys are sorted, walls first (negative ids) so internal ones are (cell, neigh) already
+        l_keys = np.where(wall[:,None], np.stack([f_neigh, f_cell], axis=1), np.stack([f_cell, f_neigh], axis=1))
+        l_state = np.where(wall, LINK_STATE_ENUM.WALL, LINK_STATE_ENUM.SOLID)
+        l_faces = np.where(wall[:,None], np.stack([f_neigh, f_face], axis=1), np.stack([f_face, f_neighFace], axis=1))
+
+        # resistance evaluated for all link positions at once
+        l_pos = f_pos[sel]
+        l_resist = field_R_eval_pos(l_pos)
+
+        # move the data to contiguous arrays, the links are just views over them
+        store = LinkStore(l_keys, l_faces, l_pos, f_dir[sel], f_cell, f_area[sel], l_resist, l_state, view_cls=Link)
+        del f_pos, f_dir, f_area, l_pos, l_resist
+        self.links_len = len(store)
+
+        # add to graphs and fill the static cont maps
+        for lid, (key, key_faces) in enumerate(zip(store.keys, store.key_faces.tolist())):
+            self.cells_graph.add_edge(*key, id=lid)
+            c1, c2 = key
+            if c1 < 0:
+                cont.keys_perWall[c1].append(key)
+                cont.keys_perCell[c2][key_faces[1]] = key
+            else:
+                cont.keys_perCell[c1][key_faces[0]] = key
+                cont.keys_perCell[c2][key_faces[1]] = key
         stats.logDt(f"created link map: {self.links_len}")
-        DEV.log_msg(f"Pos limits: {utils.vec3_to_string(self.min_pos)}, {utils.vec3_to_string(self.max_pos)}", {"CALC", "LINKS", "LIMITS"}, cut=False)
-        DEV.log_msg(f"Area limits: ({self.min_area:.2f},{self.max_area:.2f}) avg:{self.avg_area:.2f}", {"CALC", "LINKS", "LIMITS"}, cut=False)
-        DEV.log_msg(f"Reistance limits: ({self.min_resistance:.2f},{self.max_resistance:.2f}) avg:{self.avg_resistance:.2f}", {"CALC", "LINKS", "LIMITS"}, cut=False)
 
         # SECOND loop to aggregate the links neighbours, only need to iterate cont_foundId
+        aggregated = np.zeros(self.links_len, dtype=bool)
         for idx_cell in cont.foundId:
             # skip deleted afterwards
             if idx_cell in cont.deletedId:
@@ -284,18 +121,14 @@ class MW_Links():
                     continue
 
                 # avoid recalculating link neighs, create a node in links_graph now
-                if self.links_graph.has_node(key):
-                    if "l" in self.links_graph.nodes[key]:
-                        continue
-                l : Link = self.cells_graph.edges[key]["l"]
-                self.links_graph.add_node(key, l=l)
-
-                # calculate area factor relative to avg area (avg wont be zero when there are links_graph.nodes)
-                l.areaFactor = l.area / self.avg_area
-                #l.resistanceFactor = l.resistance / self.avg_resistance
+                lid = store.key_to_id[key]
+                if aggregated[lid]:
+                    continue
+                aggregated[lid] = True
+                self.links_graph.add_node(key)
 
                 # no AIR links
-                if l.state == LINK_STATE_ENUM.WALL:
+                if store.state[lid] == LINK_STATE_ENUM.WALL:
                     # walls only add local faces from the same cell
                     wf_neighs = cont.cells_meshes_FtoF[idx_cell][idx_face]
                     w_neighs = [ keys_perFace[f] for f in wf_neighs ]
@@ -304,8 +137,8 @@ class MW_Links():
                 else:
                     # regular links add both neigh faces from same and the other cell
                     # extract idx and geometry faces neighs
-                    c1, c2 = l.key_cells
-                    f1, f2 = l.key_faces
+                    c1, c2 = key
+                    f1, f2 = store.key_faces[lid]
                     m1_neighs = cont.cells_meshes_FtoF[c1]
                     m2_neighs = cont.cells_meshes_FtoF[c2]
                     f1_neighs = m1_neighs[f1]
@@ -320,387 +153,78 @@ class MW_Links():
 
         stats.logDt("aggregated link neighbours")
 
-        # initial components subgraph calculation
-        self.comps_recalc()
+        # the links graph is static from now on, so freeze its adjacency and finish the core init (limits, comps...)
+        neighs_csr = self.build_neighs_csr(store)
+        self.init_from_store(store, neighs_csr)
+
+        DEV.log_msg(f"Pos limits: {utils.vec3_to_string(self.min_pos)}, {utils.vec3_to_string(self.max_pos)}", {"CALC", "LINKS", "LIMITS"}, cut=False)
+        DEV.log_msg(f"Area limits: ({self.min_area:.2f},{self.max_area:.2f}) avg:{self.avg_area:.2f}", {"CALC", "LINKS", "LIMITS"}, cut=False)
+        DEV.log_msg(f"Reistance limits: ({self.min_resistance:.2f},{self.max_resistance:.2f}) avg:{self.avg_resistance:.2f}", {"CALC", "LINKS", "LIMITS"}, cut=False)
 
         #assert(len(list(self.cells_graph.edges)) == len(list(self.links_graph.nodes)))
         #assert( { getKey_swap(k[0],k[1])[0] for k in self.cells_graph.edges } == set(self.links_graph.nodes))
 
         logType = {"CALC", "LINKS"}
-
-        # init when found at least a link
-        self.initialized = bool(self.links_len)
         if not self.initialized:
             logType |= {"ERROR"}
         DEV.log_msg(f"Found {self.links_len} links: {int(len(self.internal)/2)} internal | {len(self.external)} external", logType)
 
+    def build_faces_arrays(self, cont: MW_Cont) -> tuple[np.ndarray, ...]:
+        """ Concatenated faces of all found cells (except deleted): cell, face, neigh and neigh face ids plus world pos, normal and area
+            * The geometry comes straight from voro++ (see MW_Cont.precalculations_voro), no mesh access
+        """
+        f_neigh = cont.get_faces_neigh()
+        sel = np.flatnonzero(~np.isin(cont.faces_cell, cont.deletedId))
+        return cont.faces_cell[sel], cont.faces_idx[sel], f_neigh[sel], cont.faces_neighFace[sel], cont.faces_pos[sel], cont.faces_dir[sel], cont.faces_area[sel]
+
+    def getLinks_sceneChanged(self, ids:np.ndarray, life:np.ndarray, widths:np.ndarray, cfg:tuple) -> np.ndarray|None:
+        """ Draw indices of the internal links whose life or width differs from the ones applied to the scene
+            * None when the drawn topology is not valid anymore (links moved between internal/external, vis cfg changed or never drawn)
+        """
+        if self.internal_scene_ids is None or cfg != self.internal_scene_cfg or not np.array_equal(ids, self.internal_scene_ids):
+            return None
+        return np.flatnonzero((life != self.internal_scene_life) | (widths != self.internal_scene_widths))
+
+    def setLinks_sceneApplied(self, ids:np.ndarray, life:np.ndarray, widths:np.ndarray, cfg:tuple, pairs:np.ndarray = None):
+        """ Mark the internal links as drawn, pairs only required when the whole mesh was regenerated """
+        if pairs is not None:
+            self.internal_scene_ids = ids.copy()
+            self.internal_scene_pairs = pairs
+            self.internal_scene_cfg = cfg
+        self.internal_scene_life = life.copy()
+        self.internal_scene_widths = widths.copy()
+
+    def setLinks_sceneInvalid(self):
+        """ Forget the drawn links, e.g. after undo/redo restored an older tubes mesh, so the next draw rebuilds it whole """
+        self.internal_scene_ids = None
+        self.internal_scene_pairs = None
+        self.internal_scene_life = None
+        self.internal_scene_widths = None
+
     def add_links_neigs(self, key, newNeighs):
         #self.links_graph.add_edges_from(newNeighs)
         for nn in newNeighs:
             if nn[0] not in CELL_ERROR_ENUM.all:
                 self.links_graph.add_edge(key, nn)
 
-    def update_limits(self, pos, area, resistance):
-        # check min/max pos
-        if self.min_pos.x > pos.x: self.min_pos.x = pos.x
-        elif self.max_pos.x < pos.x: self.max_pos.x = pos.x
-        if self.min_pos.y > pos.y: self.min_pos.y = pos.y
-        elif self.max_pos.y < pos.y: self.max_pos.y = pos.y
-        if self.min_pos.z > pos.z: self.min_pos.z = pos.z
-        elif self.max_pos.z < pos.z: self.max_pos.z = pos.z
-        # area
-        self.avg_area += area
-        if self.min_area > area: self.min_area = area
-        elif self.max_area < area: self.max_area = area
-        # resist
-        self.avg_resistance += resistance
-        if self.min_resistance > resistance: self.min_resistance = resistance
-        elif self.max_resistance < resistance: self.max_resistance = resistance
-
-    #-------------------------------------------------------------------
-
-    def sanitize(self, root):
-        """ Remove deleted cells from the graph and recalculate comps
-            # OPT:: due to potential UNDO/REDO making cells reapear all foundID are added again
-        """
-        # TODO:: undo/redo not fully working + exepcts with deleted cells?
-        cleaned = False
-        if not self.cont.deletedId or self.cont.deletedId == self.cont.deletedId_prev:
-            return cleaned
-        DEV.log_msg(f"Sanitizing links", {"LINKS", "SANITIZE"})
-
-        ## detect changes -> not ok cause removing nodes removes past edges
-        #curr = set(self.cont.deletedId)
-        #prev = set(self.cont.deletedId_prev)
-        #newDeleted = curr - prev
-        #newAdded = prev - curr
-        ## add / remove cells
-        #self.cells_graph.add_nodes_from(newAdded)
-        #self.cells_graph.remove_nodes_from(newDeleted)
-
-        # recalculate the components
-        self.comps_recalc()
-        return cleaned
-
-    def comps_recalc(self, recalcGraph = True):
-        """ Recalc cell connected componentes, return true when new split """
-        if self.log: DEV.log_msg(f"Recalc COMPS", {"COMPS"})
-        prevLen = self.comps_len
-
-        # recalc subgraph
-        if recalcGraph:
-            self.comps_recalc_subgraph()
-        # OPT:: shared statemaps across methods, or keep uptodate
-        # OPT:: too much link/id interchange and requery too..
-
-        # recount components
-        self.comps_count()
-        newSplit = prevLen != self.comps_len
-        if newSplit:
-            getStats().logDt(f"calculated COMPS: [new SPLIT] from {prevLen}")
-
-        # potential detach of cells
-        if newSplit and self.comps_len > 1:
-            self.comps_detach_frontier()
-            self.comps_count()
-
-        # recalc frontier even for no new splits -> cells turned to AIR changes the front
-        self.comps_recalc_frontier()
-
-        return newSplit
-
-    def comps_recalc_subgraph(self):
-        """ Recalculate component subgraph """
-        if self.log: DEV.log_msg(f"Recalc COMPS subgraph", {"COMPS"})
-
-        # create a subgraph with no air, no missing cells and no additional walls
-        stateMap = self.cont.getCells_splitID_state()
-        valid = stateMap[CELL_STATE_ENUM.SOLID] + stateMap[CELL_STATE_ENUM.CORE]
-        # copy the read only subgraph, cannot copy and remove because there are extra edges from virtual wall cells
-        self.comps_subgraph : nx.Graph = self.cells_graph.subgraph(valid).copy()
-
-        # remove missing links too
-        stateMap_links = self.get_link_splitID_state()
-        removed_links = stateMap_links[LINK_STATE_ENUM.AIR] # + stateMap_links[LINK_STATE_ENUM.WALL] already dropped with stateMap not AIR
-        self.comps_subgraph.remove_edges_from(removed_links)
-
-        ## TEST:: subgraphs
-        #stateMap = self.cont.getCells_splitID_state()
-        #air_graph : nx.Graph = self.cells_graph.subgraph(stateMap[CELL_STATE_ENUM.AIR]+self.cont.wallsId)
-        #comps = list(nx.connected_components(air_graph))
-        #stateMap_links = self.get_link_splitID_state()
-        #airlinks_subgraph_view : nx.Graph = self.links_graph.subgraph(stateMap_links[LINK_STATE_ENUM.WALL] + stateMap_links[LINK_STATE_ENUM.AIR])
-        #comps_links = list(nx.connected_components(airlinks_subgraph_view))
-
-    def comps_count(self):
-        self.comps = list(nx.connected_components(self.comps_subgraph))
-        self.comps_len = len(self.comps)
-        getStats().logDt(f"count COMPS: {self.comps_len}")
-
-    def comps_recalc_frontier(self):
-        """ Check new internal and external links, also changes cells state to air """
-        if self.log: DEV.log_msg(f"Recalc FRONT", {"COMPS"})
-
-        self.internal.clear()
-        self.external.clear()
-
-        if DEV.SKIP_BUBBLE_CHECK:
-            # all solid are internal
-            stateMap_links = self.get_link_split_state()
-            self.internal = stateMap_links[LINK_STATE_ENUM.SOLID]
-            # external pick only the ones with at least a solid at the other side
-            for l in stateMap_links[LINK_STATE_ENUM.WALL] + stateMap_links[LINK_STATE_ENUM.AIR]:
-                if self.solid_link_check(l):
-                    self.external.append(l)
-
-        else:
-            # build air graph connecting all external walls -> detecting air bubbles
-            stateMap = self.cont.getCells_splitID_state()
-            self.air_recalc_graph(stateMap)
-            self.air_comps_count()
-
-            # iterate solid cells split their link by state (contain the frontier)
-            solids = stateMap[CELL_STATE_ENUM.SOLID] + stateMap[CELL_STATE_ENUM.CORE]
-            for cell_id in solids:
-                links = self.get_cell_links(cell_id)
-                for l in links:
-                    if l.state == LINK_STATE_ENUM.SOLID:
-                        self.internal.append(l)
-                    else:
-                        # check that the component of the air link is the same as wall comp id
-                        cell_id_other = l.key_cells_other(cell_id)
-                        if cell_id_other in self.air_comps[self.air_comps_wall_id]:
-                            self.external.append(l)
-                        else:
-                            self.internal.append(l) # internal broken link in a bubble!
-
-    def air_recalc_graph(self, stateMap):
-        self.air_graph = nx.Graph()
-        self.air_graph.add_edges_from( self.cont.wallsId_edges )
-
-        # now add air links and connect only the valid edges
-        self.air_graph.add_nodes_from( stateMap[CELL_STATE_ENUM.AIR] )
-        for cell_id in stateMap[CELL_STATE_ENUM.AIR]:
-            links = self.get_cell_linksKeys(cell_id)
-            for lk in links:
-                if self.air_graph.has_node(lk[0]) and self.air_graph.has_node(lk[1]):
-                    self.air_graph.add_edge(*lk)
-
-    def air_comps_count(self):
-        self.air_comps = list(nx.connected_components(self.air_graph))
-        self.air_comps_len = len(self.air_comps)
-
-        # find wall comp
-        self.air_comps_wall_id = -1
-        sampleWall = self.cont.wallsId[0]
-        for i,comp in enumerate(self.air_comps):
-            if sampleWall in comp:
-                self.air_comps_wall_id = i
-                break
-        assert(self.air_comps_wall_id != -1)
-
-        getStats().logDt(f"count AIR COMPS: {self.air_comps_len}")
-
-    def comps_detach_frontier(self):
-        if self.log: DEV.log_msg(f"Recalc DETACH", {"COMPS"})
-
-        # split by core comps
-        cores, nonCores = [],[]
-        for i, comp_cells in enumerate(self.comps):
-            # iterate cells and check for any mark as core
-            foundCore = False
-            for cell_id in comp_cells:
-                if self.cont.cells_state[cell_id] == CELL_STATE_ENUM.CORE:
-                    cores.append(i)
-                    foundCore = True
-                    break
-            # no cell was core
-            if not foundCore:
-                nonCores.append(i)
-
-        # all core, do nothing
-        if not nonCores:
-            return
-
-        # list of candidate comps (not individual cells)
-        candidates = [ self.comps[i] for i in nonCores ]
-        new_air_cells = []
-
-        # if there was at least a single non core one, then flatten the list of candidates and remove all
-        if len(nonCores) != len(self.comps):
-            new_air_cells = list(itertools.chain.from_iterable(candidates))
-
-        # otherwise remove the smaller candidate
-        else:
-            candidates = sorted(candidates, key=len)
-            new_air_cells = list(itertools.chain.from_iterable(candidates[:-1]))
-
-        # set links as air which will trigger link removeal etc
-        self.setState_cells_check(new_air_cells, LINK_STATE_ENUM.AIR, False)
-
-    #-------------------------------------------------------------------
-
-    def solid_link_check(self, l):
-        """ Check if any of the referenced cells is solid (or core) """
-        c1,c2 = l.key_cells
+    def build_neighs_csr(self, store: LinkStore) -> CSR:
+        """ Build the CSR neighbour index preserving the networkx neighbours order """
+        adj = self.links_graph.adj
+        key_to_id = store.key_to_id
+        neighs = [ [ key_to_id[k] for k in adj.get(key, ()) ] for key in store.keys ]
+        neighs_csr = CSR.from_lists(neighs)
+        getStats().logDt(f"built links neighs CSR: {len(neighs_csr.indices)} entries")
+        return neighs_csr
+
+    def update_limits(self):
+        """ Same as the core but min/max pos as Vector """
+        super().update_limits()
+        self.min_pos = Vector(self.min_pos)
+        self.max_pos = Vector(self.max_pos)
 
-        # the second ID is always a cell ID
-        s2 = self.cont.cells_state[c2]
-        if s2 != CELL_STATE_ENUM.AIR:
-            return True
-
-        # walls have negative id and there is no cell associated, so s1 only check for non walls
-        if l.state != LINK_STATE_ENUM.WALL:
-            s1 = self.cont.cells_state[c1]
-            if s1 != CELL_STATE_ENUM.AIR:
-                return True
-
-        return False
-
-    def setState_link_check(self, key, state:LINK_STATE_ENUM, recalc=True):
-        """ Set state, modify graph, returns True when recalc """
-        if self.log: DEV.log_msg(f"Check link AIR {key}", {"COMPS", "LINK"})
-        l = self.get_link(key)
-
-        # ignore already set
-        if l.state == state:
-            return False
-
-        # broke the link? change graph etc
-        if state == LINK_STATE_ENUM.AIR:
-            # ignore walls and break solid links
-            if l.state == LINK_STATE_ENUM.WALL:
-                return False
-            l.set_broken()
-
-            # remove link edges, alredy removed when coming from an setState_cell_check
-            self.comps_subgraph.remove_edges_from([l.key_cells])
-
-            # potentially flip normals so than visualization goes towards outside
-            if self.cont.cells_state[l.dir_from] != CELL_STATE_ENUM.SOLID:
-                l.flip_dir()
-
-        # link back to solid
-        else:
-            # reset even wall links (number of picks), but for those nothing else to do
-            l.reset()
-            if l.state == LINK_STATE_ENUM.WALL:
-                return False
-
-            # readd the link, cells should be added beforehand
-            self.comps_subgraph.add_edges_from([l.key_cells])
-
-        breaking = False
-        if recalc:
-            # recalc on link break only when a path between cells ceases to exist
-            c1,c2 = l.key_cells
-            if DEV.SKIP_PATH_CHECK: breaking = True
-            else: breaking = not nx.has_path(self.comps_subgraph, c1, c2)
-            if breaking:
-                self.comps_recalc(False)
-
-        return breaking
-
-    def setState_cell_check(self, idx, state:CELL_STATE_ENUM, recalc = True):
-        """ Set state, modify graph and also set links, returns True when recalc """
-        if self.log: DEV.log_msg(f"Check cell AIR {idx}", {"COMPS", "CELL"})
-        cell_state = self.cont.cells_state[idx]
-
-        # ignore already set
-        if cell_state == state:
-            return False
-        self.cont.setCell_state(idx, state)
-
-        # cell to air? change graph and also set the links
-        if state == CELL_STATE_ENUM.AIR:
-            # remove cell and attached link
-            self.comps_subgraph.remove_nodes_from([idx]) # direcly removes edges tho
-            for key in self.get_cell_linksKeys(idx):
-                self.setState_link_check(key, LINK_STATE_ENUM.AIR, False)
-
-        # cell back to solid
-        else:
-            # add cell back and recover links
-            self.comps_subgraph.add_nodes_from([idx])
-            for key in self.get_cell_linksKeys(idx):
-                self.setState_link_check(key, LINK_STATE_ENUM.SOLID, False)
-
-        if recalc:
-            self.comps_recalc(False)
-        return recalc
-
-    def setState_cells_check(self, idx_list, state:CELL_STATE_ENUM, recalc_afterAll = True):
-        """ Set state, modify graph and also set links, returns True when recalc """
-        for idx in idx_list:
-            self.setState_cell_check(idx, state, False)
-
-        # recalc without building the graph as setState_cell_check already removes/adds missing nodes
-        if recalc_afterAll:
-            self.comps_recalc(False)
-
-    #-------------------------------------------------------------------
-
-    def get_link(self, key:neigh_key_t) -> Link:
-        return self.links_graph.nodes[key]["l"]
-    def get_links(self, keys:list[neigh_key_t]) -> list [Link]:
-        return [self.links_graph.nodes[k]["l"] for k in keys ]
-
-    def get_link_neighsId(self, key:neigh_key_t) -> list[neigh_key_t]:
-        """ The links neighs ID unordered by face or anything """
-        return list(self.links_graph.neighbors(key))
-    def get_link_neighs(self, key:neigh_key_t) -> list[Link]:
-        """ The links neighs unordered by face or anything """
-        return [ self.get_link(k) for k in self.get_link_neighsId(key) ]
-
-    def get_cell_linksKeys(self, idx:int) -> list[Link]:
-        """ The links ID from a given cell with properly sorted keys """
-        return [ self.getKey_swap(k[0],k[1])[0] for k in self.cells_graph.edges(idx) ]
-
-    def get_cell_links(self, idx:int) -> list[Link]:
-        """ The links from a given cell """
-        return self.get_links(self.get_cell_linksKeys(idx))
-
-    def get_link_splitID_state(self):
-        """ Split links ID by state
-            # OPT:: store and only update?
-        """
-        stateMap = {
-            state : [] for state in LINK_STATE_ENUM.all
-        }
-
-        for key in self.links_graph.nodes():
-            l = self.get_link(key)
-            stateMap[l.state].append(key)
-
-        return stateMap
-
-    def get_link_split_state(self):
-        """ Split links by state
-            # OPT:: store and only update? + same code almost
-        """
-        stateMap = {
-            state : [] for state in LINK_STATE_ENUM.all
-        }
-
-        for key in self.links_graph.nodes():
-            l = self.get_link(key)
-            stateMap[l.state].append(l)
-
-        return stateMap
-
-    #-------------------------------------------------------------------
-
-    # key is always sorted numerically -> negative walls id go at the beginning
-    # tuples are inmutable so need to return a new one
-    @staticmethod
-    def getKey_swap(k1,k2) -> tuple[neigh_key_t,bool]:
-        swap = k1 > k2
-        key = (k1, k2) if not swap else (k2, k1)
-        return key,swap
-    @staticmethod
-    def getKey(k1,k2, swap) -> neigh_key_t:
-        key = (k1, k2) if not swap else (k2, k1)
-        return key
+    def update_resistance(self):
+        """ Query again the resistance field for all links """
+        self.store.resistance[:] = field_R_eval_pos(self.store.pos)
 
     # debug model is basically 2D
     @staticmethod
@@ -0,0 +1,214 @@
+import numpy as np
+
+# NOTE:: no blender imports here, the store is plain numpy so it can be shared/serialized
+#-------------------------------------------------------------------
+
+class LinkStore:
+    """ Structure of arrays holding all the links properties, indexed by a dense link id
+        * The Link class is just a thin view over a single index of these arrays
+        * Keys are kept as a python list of tuples too, cheaper than building them on each access
+        * The static arrays are copied unless copy is False, then arrays with the right dtype are referenced (e.g. memory mapped)
+    """
+
+    def __init__(self, key_cells, key_faces, pos, dir, dir_from, area, resistance, state, view_cls=None, copy=True):
+        self.len = len(key_cells)
+        array = np.array if copy else np.asarray
+
+        # static props: tuple keys are kept both as arrays and python tuples (dict lookups)
+        self.key_cells  = array(key_cells, dtype=np.int32).reshape(-1, 2)
+        self.keys       : list[tuple[int,int]] = [ (k1, k2) for k1,k2 in self.key_cells.tolist() ]
+        self.key_to_id  : dict[tuple[int,int], int] = { k: i for i,k in enumerate(self.keys) }
+        self.key_faces  = array(key_faces, dtype=np.int32).reshape(-1, 2)
+
+        # properties in world space (mathutils uses single precision anyway)
+        self.pos        = array(pos, dtype=np.float32).reshape(-1, 3)
+        self.dir        = array(dir, dtype=np.float32).reshape(-1, 3)
+        self.dir_from   = array(dir_from, dtype=np.int32)
+        # properties to later normalize or divide by avg
+        self.area       = array(area, dtype=np.float32)
+        self.areaFactor = np.ones(self.len, dtype=np.float32)
+        self.resistance = array(resistance, dtype=np.float32)
+
+        # sim props
+        self.state_initial = array(state, dtype=np.int8)
+        self.state         = self.state_initial.copy()
+        self.life          = np.ones(self.len, dtype=np.float64)
+        self.picks         = np.zeros(self.len, dtype=np.int32)
+        self.picks_entry   = np.zeros(self.len, dtype=np.int32)
+        self.backupState()
+
+        # one view per link so identity checks and lists of links keep working
+        self.views = [ view_cls(self, i) for i in range(self.len) ] if view_cls else []
+
+    def __len__(self):
+        return self.len
+
+    def get_id(self, key:tuple[int,int]) -> int:
+        return self.key_to_id[key]
+
+    def get_view(self, key:tuple[int,int]):
+        return self.views[self.key_to_id[key]]
+
+    #-------------------------------------------------------------------
+
+    def reset(self, life=1.0, picks=0, picks_entry=0):
+        """ Reset simulation parameters of all links """
+        self.state[:] = self.state_initial
+        self.life.fill(life)
+        self.picks.fill(picks)
+        self.picks_entry.fill(picks_entry)
+
+    def backupState(self):
+        """ Backup simulation parameters of all links """
+        self.backup_state       = self.state.copy()
+        self.backup_life        = self.life.copy()
+        self.backup_picks       = self.picks.copy()
+        self.backup_picks_entry = self.picks_entry.copy()
+
+    def backupState_restore(self):
+        """ Restore simulation parameters with backup (arrays are copied in place, views stay valid) """
+        self.state[:]       = self.backup_state
+        self.life[:]        = self.backup_life
+        self.picks[:]       = self.backup_picks
+        self.picks_entry[:] = self.backup_picks_entry
+
+    #-------------------------------------------------------------------
+
+    def split_state(self, states) -> dict[int, np.ndarray]:
+        """ Split links id by state """
+        return { s: np.flatnonzero(self.state == s) for s in states }
+
+    def life_clamped(self, ids=None) -> np.ndarray:
+        """ Get links life clamped [0,1] """
+        life = self.life if ids is None else self.life[ids]
+        return np.clip(life, 0, 1)
+
+#-------------------------------------------------------------------
+
+class CSR:
+    """ Frozen compressed sparse row adjacency: the neighbours of i are indices[offsets[i]:offsets[i+1]] """
+
+    def __init__(self, offsets:np.ndarray, indices:np.ndarray):
+        self.offsets = offsets
+        self.indices = indices
+
+    @classmethod
+    def from_lists(cls, neighs:list[list[int]], dtype=np.int32):
+        counts = np.fromiter((len(n) for n in neighs), dtype=np.int64, count=len(neighs))
+        offsets = np.zeros(len(neighs)+1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        indices = np.fromiter((i for n in neighs for i in n), dtype=dtype, count=int(offsets[-1]))
+        return cls(offsets, indices)
+
+    @classmethod
+    def from_shared_keys(cls, rows:np.ndarray, keys:np.ndarray, n:int):
+        """ Symmetric adjacency between the rows sharing a key (e.g. faces sharing an edge), neighbours sorted
+            # NOTE:: only consecutive rows per key are paired, enough for manifold meshes (two faces per edge)
+        """
+        order = np.argsort(keys, kind="stable")
+        k, r = keys[order], rows[order].astype(np.int64)
+        shared = np.flatnonzero((k[1:] == k[:-1]) & (r[1:] != r[:-1]))
+        a, b = r[shared], r[shared+1]
+        pairs = np.unique(np.concatenate([a*n + b, b*n + a]))
+        src, dst = pairs // n, pairs % n
+        offsets = np.zeros(n+1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+        return cls(offsets, dst.astype(np.int32))
+
+    def split(self, bases:np.ndarray) -> list["CSR"]:
+        """ Split in blocks of rows [bases[i], bases[i+1]) with indices relative to the block, expects no links between blocks """
+        blocks = []
+        for i in range(len(bases)-1):
+            b0, b1 = int(bases[i]), int(bases[i+1])
+            o = self.offsets[b0:b1+1]
+            blocks.append(CSR(o - o[0], self.indices[o[0]:o[-1]] - b0))
+        return blocks
+
+    @classmethod
+    def merge(cls, blocks:list["CSR"]) -> "CSR":
+        """ Inverse of split: rows of the blocks concatenated with indices shifted by the block start """
+        bases = np.zeros(len(blocks)+1, dtype=np.int64)
+        np.cumsum([ len(b) for b in blocks ], out=bases[1:])
+        offsets = np.zeros(int(bases[-1])+1, dtype=np.int64)
+        if blocks:
+            np.cumsum(np.concatenate([ np.diff(b.offsets) for b in blocks ]), out=offsets[1:])
+        indices = np.concatenate([ b.indices + b0 for b,b0 in zip(blocks, bases[:-1].tolist()) ]).astype(np.int32) if blocks else np.empty(0, np.int32)
+        return cls(offsets, indices)
+
+    def __len__(self):
+        return len(self.offsets)-1
+
+    def __getitem__(self, i:int) -> np.ndarray:
+        """ Slice view without copies """
+        return self.indices[self.offsets[i]:self.offsets[i+1]]
+
+    def degree(self, i:int) -> int:
+        return int(self.offsets[i+1] - self.offsets[i])
+
+#-------------------------------------------------------------------
+
+class FenwickTree:
+    """ Binary indexed tree over non negative weights: O(log n) point updates and weighted sampling
+        * The tree is a python list, scalar access is way faster than indexing numpy arrays
+    """
+
+    def __init__(self, weights:np.ndarray):
+        self.build(weights)
+
+    def build(self, weights:np.ndarray):
+        """ Vectorized O(n) construction: each node i holds the sum of the lowbit(i) weights ending at i """
+        self.weights = np.array(weights, dtype=np.float64)
+        self.n = len(self.weights)
+        cumsum = np.zeros(self.n+1, dtype=np.float64)
+        np.cumsum(self.weights, out=cumsum[1:])
+        idx = np.arange(1, self.n+1)
+        tree = np.zeros(self.n+1, dtype=np.float64)
+        tree[1:] = cumsum[idx] - cumsum[idx - (idx & -idx)]
+        self.tree : list[float] = tree.tolist()
+        self.total = float(cumsum[-1])
+        self.positive = int(np.count_nonzero(self.weights > 0))
+        self.bit_top = 1 << (self.n.bit_length()-1) if self.n else 0
+
+    def set(self, i:int, w:float):
+        """ Point update of the weight at index i """
+        delta = w - self.weights[i]
+        if delta == 0: return
+        self.positive += int(w > 0) - int(self.weights[i] > 0)
+        self.weights[i] = w
+        self.total += delta
+        tree = self.tree
+        j = i+1
+        while j <= self.n:
+            tree[j] += delta
+            j += j & -j
+
+    def update(self, weights:np.ndarray, rebuild_ratio=0.125):
+        """ Update only the changed weights, rebuild when too many changed """
+        changed = np.flatnonzero(weights != self.weights)
+        if len(changed) > self.n * rebuild_ratio:
+            self.build(weights)
+        else:
+            for i in changed.tolist():
+                self.set(i, float(weights[i]))
+        return len(changed)
+
+    def sample(self, u:float) -> int:
+        """ Index of the weight where u*total falls in the cumulative distribution, -1 when all null """
+        if self.positive == 0: return -1
+        target = u * self.total
+        tree = self.tree
+        pos = 0
+        bit = self.bit_top
+        while bit:
+            nxt = pos + bit
+            if nxt <= self.n and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            bit >>= 1
+
+        # float accumulation may land outside or on a null weight, fallback to the closest valid one
+        pos = min(pos, self.n-1)
+        if self.weights[pos] <= 0:
+            valid = np.flatnonzero(self.weights > 0)
+            pos = int(valid[min(np.searchsorted(valid, pos), len(valid)-1)])
+        return pos
@@ -0,0 +1,184 @@
+import bpy
+import gpu
+from gpu_extras.batch import batch_for_shader
+import numpy as np
+
+from . import handlers
+from .properties_global import MW_global_selected, MW_global_storage
+from .properties import MW_vis_cfg
+from .mw_fract import MW_Fract
+
+from . import utils_scene
+from .utils_mat import COLORS
+from .utils_dev import DEV
+from .stats import getStats
+
+# NOTE:: alternative to the links mesh objects (mw_setup.gen_linksMesh*): no scene data is created, so no undo memory or depsgraph evaluation
+# NOTE:: the buffers are flat arrays in world space rebuilt from the store arrays, the gpu batches are uploaded from them directly
+#-------------------------------------------------------------------
+
+def get_links_internal_lines(fract: MW_Fract, depth=0.0) -> tuple[np.ndarray, np.ndarray]:
+    """ Face to face segments of the internal links: link ids and (N*2,3) vertex buffer, link k is the line [2k, 2k+1] """
+    links = fract.links
+    store = links.store
+    ids = np.flatnonzero(links.internal_count)
+
+    # point from face to face, pick a valid dir and add a bit of additional depth
+    rows = fract.cont.getFaces_rows(store.key_cells[ids], store.key_faces[ids])
+    pairs = fract.cont.faces_pos[rows].astype(np.float32)
+    pdir = pairs[:,1] - pairs[:,0]
+    plen = np.linalg.norm(pdir, axis=1, keepdims=True)
+    pdir = np.where(plen > 1e-6, pdir / np.maximum(plen, 1e-6), store.dir[ids])
+    pairs[:,0] -= pdir*depth*0.5
+    pairs[:,1] += pdir*depth*0.5
+    return ids, pairs.reshape(-1, 3)
+
+def get_links_neighs_lines(fract: MW_Fract) -> np.ndarray:
+    """ Segments between the positions of neighbouring links (internal or external), each pair only once """
+    links = fract.links
+    shown = (links.internal_count > 0) | (links.external_count > 0)
+    csr = links.neighs_csr
+    src = np.repeat(np.arange(len(csr)), np.diff(csr.offsets))
+    dst = csr.indices
+    sel = shown[src] & (~shown[dst] | (src < dst))
+    return np.stack([links.store.pos[src[sel]], links.store.pos[dst[sel]]], axis=1).reshape(-1, 3)
+
+def get_colors_lerp(u: np.ndarray, c1, c2, repeats=1) -> np.ndarray:
+    """ RGBA per value lerped between two colors (alpha from c1), repeated per vertex """
+    u = np.clip(np.asarray(u, dtype=np.float32), 0, 1)[:,None]
+    cols = np.array(c1, dtype=np.float32) * (1-u) + np.array(c2, dtype=np.float32) * u
+    cols[:,3] = c1[3]
+    return np.repeat(cols, repeats, axis=0)
+
+#-------------------------------------------------------------------
+
+class LinksOverlay:
+    """ Viewport overlay of the links with gpu batches built from flat numpy buffers
+        * Internal links as lines colored by life, external links as points, optional neighs and last path
+    """
+    line_width = 2.0
+    point_size = 6.0
+
+    def __init__(self):
+        self.handle = None
+        self.batches : dict[str, tuple] = {}
+        self.root : bpy.types.Object = None
+        self.storage_id = -1
+
+    def get_shader(self) -> gpu.types.GPUShader:
+        # NOTE:: builtin shaders dropped the 2D_/3D_ prefix in 3.4
+        return gpu.shader.from_builtin("FLAT_COLOR" if bpy.app.version >= (3, 4, 0) else "3D_FLAT_COLOR")
+
+    def build(self, fract: MW_Fract, cfg: MW_vis_cfg):
+        """ Rebuild all batches from the current array state """
+        shader = self.get_shader()
+        links = fract.links
+        store = links.store
+        self.batches = {}
+        self.root = fract.cont.root
+        self.storage_id = self.root.mw_id.storage_id
+
+        def add(name, prim, coords, colors, size):
+            if not len(coords): return
+            batch = batch_for_shader(shader, prim, {"pos": np.ascontiguousarray(coords, dtype=np.float32), "color": np.ascontiguousarray(colors, dtype=np.float32)})
+            self.batches[name] = (batch, prim, size)
+
+        if cfg.links__show:
+            ids, coords = get_links_internal_lines(fract, cfg.links_depth)
+            add("internal", "LINES", coords, get_colors_lerp(store.life_clamped(ids), COLORS.dark, COLORS.red, 2), self.line_width)
+
+        if cfg.wall_links__show:
+            ids = np.flatnonzero(links.external_count)
+            u = store.picks_entry[ids] / max(1, int(store.picks_entry[ids].max())) if len(ids) else ids
+            add("external", "POINTS", store.pos[ids], get_colors_lerp(u, COLORS.pink, COLORS.white), self.point_size)
+
+        if cfg.neighs__show:
+            coords = get_links_neighs_lines(fract)
+            add("neighs", "LINES", coords, np.tile(np.array(COLORS.green, dtype=np.float32), (len(coords), 1)), 1.0)
+
+        sim = fract.sim
+        if cfg.path__show and sim and sim.step_path:
+            path_ids = np.fromiter((store.key_to_id[k] for k,w in sim.step_path), dtype=np.int64, count=len(sim.step_path))
+            water = np.fromiter((w for k,w in sim.step_path), dtype=np.float32, count=len(sim.step_path))
+            pos = store.pos[path_ids]
+
+            # prev point might be an initial point from outside
+            start = pos[0] - cfg.path_outside_start * np.array(sim.cfg.dir_entry, dtype=np.float32)
+            coords = np.stack([np.concatenate([start[None], pos[:-1]]), pos], axis=1).reshape(-1, 3)
+            add("path", "LINES", coords, get_colors_lerp(water, COLORS.dark, COLORS.sky, 2), self.line_width*2)
+
+        self.handler_add()
+        getStats().logDt(f"built links overlay: {list(self.batches.keys())}")
+
+    def clear(self):
+        self.batches = {}
+        self.root = None
+        self.storage_id = -1
+        self.handler_remove()
+
+    #-------------------------------------------------------------------
+
+    def draw(self):
+        if not self.batches: return
+        # the root might have been deleted without purging its fract (the handler is removed on the next clear)
+        if utils_scene.needsSanitize(self.root): return
+        shader = self.get_shader()
+        gpu.state.depth_test_set("LESS_EQUAL")
+        gpu.state.blend_set("ALPHA")
+        shader.bind()
+        for batch, prim, size in self.batches.values():
+            if prim == "POINTS": gpu.state.point_size_set(size)
+            else: gpu.state.line_width_set(size)
+            batch.draw(shader)
+        gpu.state.depth_test_set("NONE")
+        gpu.state.blend_set("NONE")
+        gpu.state.line_width_set(1.0)
+        gpu.state.point_size_set(1.0)
+
+    def handler_add(self):
+        if self.handle is None:
+            self.handle = bpy.types.SpaceView3D.draw_handler_add(self.draw, (), "WINDOW", "POST_VIEW")
+        tag_redraw()
+
+    def handler_remove(self):
+        if self.handle is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(self.handle, "WINDOW")
+            self.handle = None
+        tag_redraw()
+
+def tag_redraw():
+    """ Redraw the 3D views, the handler does not trigger a redraw on its own """
+    wm = bpy.context.window_manager
+    if not wm: return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D": area.tag_redraw()
+
+links_overlay = LinksOverlay()
+""" Global links overlay, the draw handler is only added while there is something to draw """
+
+def clear_callback(_scene_=None, _name_=None):
+    """ A new file never has the overlay of the previous one """
+    links_overlay.clear()
+
+def clear_freeFract_callback(id:int):
+    """ Clear when the fract drawn is freed (deleted or purged) """
+    if id == links_overlay.storage_id:
+        links_overlay.clear()
+
+#-------------------------------------------------------------------
+# Blender events
+_name = f"{__name__[14:]}" #\t(...{__file__[-32:]})"
+
+def register():
+    DEV.log_msg(f"{_name}", {"ADDON", "INIT", "REG"})
+    handlers.callback_loadFile_actions.append(clear_callback)
+    MW_global_storage.callback_freeFract_actions.append(clear_freeFract_callback)
+
+def unregister():
+    DEV.log_msg(f"{_name}", {"ADDON", "INIT", "UN-REG"})
+    handlers.callback_loadFile_actions.remove(clear_callback)
+    MW_global_storage.callback_freeFract_actions.remove(clear_freeFract_callback)
+    links_overlay.clear()
+
+DEV.log_msg(f"{_name}", {"ADDON", "PARSED"})
@@ -1,5 +1,9 @@
+import bpy
 from math import sin,cos
+import itertools
+import numpy as np
 from .preferences import getPrefs
+from .utils_dev import DEV
 # HACK:: simple way to avoid circular import
 #from .properties import MW_resistance_cfg
 
@@ -20,6 +24,19 @@ def user_out_cfg(r):
     if cfg.out_round: r = round(r)
     return r
 
+# array versions: resolve the config once and evaluate with numpy ufuncs
+def user_in_cfg_many(xs:np.ndarray, ys:np.ndarray, cfg):
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if cfg.in_flipX: xs = -xs
+    if cfg.in_flipY: ys = -ys
+    return xs,ys
+
+def user_out_cfg_many(r:np.ndarray, cfg):
+    if cfg.out_inv: r = 1-r
+    if cfg.out_round: r = np.round(r)
+    return r
+
 class LAYERS_SIDE:
     def get2D(x, y):
         x,y = user_in_cfg(x,y)
@@ -27,6 +44,13 @@ class LAYERS_SIDE:
         r = (0.5 * r + 0.5) # normalize
         return user_out_cfg(r)
 
+    def get2D_many(xs, ys):
+        cfg = getPrefs().resist_cfg
+        xs,ys = user_in_cfg_many(xs,ys, cfg)
+        r = np.sin(-1 * xs + 0.5 * ys)
+        r = (0.5 * r + 0.5)
+        return user_out_cfg_many(r, cfg)
+
 class LAYERS_STACK:
     def get2D(x, y):
         x,y = user_in_cfg(x,y)
@@ -34,6 +58,13 @@ class LAYERS_STACK:
         r = (0.5 * r + 0.5) # normalize
         return user_out_cfg(r)
 
+    def get2D_many(xs, ys):
+        cfg = getPrefs().resist_cfg
+        xs,ys = user_in_cfg_many(xs,ys, cfg)
+        r = np.sin(1 * ys + -0.15 * xs)
+        r = (0.5 * r + 0.5)
+        return user_out_cfg_many(r, cfg)
+
 class POCKETS:
     def get2D(x, y):
         x,y = user_in_cfg(x,y)
@@ -41,20 +72,130 @@ class POCKETS:
         r = (r+2.0) / 4.0 # normalize
         return user_out_cfg(r)
 
+    def get2D_many(xs, ys):
+        cfg = getPrefs().resist_cfg
+        xs,ys = user_in_cfg_many(xs,ys, cfg)
+        r = np.sin(xs) + np.cos(ys)
+        r = (r+2.0) / 4.0
+        return user_out_cfg_many(r, cfg)
+
+#-------------------------------------------------------------------
+
+def interp_grid(grid:np.ndarray, coords:np.ndarray, chunk=1<<20) -> np.ndarray:
+    """ Multilinear interpolation (bilinear 2D, trilinear 3D) at continuous index coords (n, grid.ndim)
+        * Coords are clamped to the grid, works over memory mapped grids only reading the touched cells
+    """
+    shape = np.array(grid.shape)
+    out = np.empty(len(coords), dtype=np.float64)
+    for start in range(0, len(coords), chunk):
+        c = np.clip(coords[start:start+chunk], 0, shape-1)
+        i0 = np.minimum(np.floor(c).astype(np.int64), np.maximum(shape-2, 0))
+        i1 = np.minimum(i0+1, shape-1)
+        t = c - i0
+
+        r = np.zeros(len(c), dtype=np.float64)
+        for corner in itertools.product((0,1), repeat=grid.ndim):
+            idx = tuple( (i1 if k else i0)[:,d] for d,k in enumerate(corner) )
+            w = np.prod([ t[:,d] if k else 1-t[:,d] for d,k in enumerate(corner) ], axis=0)
+            r += w * grid[idx]
+        out[start:start+chunk] = r
+    return out
+
+class GRID:
+    """ Sampled field from a numpy grid file (.npy) memory mapped, not loaded fully in RAM
+        * 2D grids are indexed [x,z] (like get2D inputs) and 3D volumes [x,y,z], both span the world bounds grid_min/max
+        * Values are expected normalized [0,1]
+    """
+    grid : np.ndarray = None
+    bmin : np.ndarray = None
+    bmax : np.ndarray = None
+    path = ""
+
+    def load(path:str, bmin, bmax):
+        if path != GRID.path or GRID.grid is None:
+            grid = np.load(path, mmap_mode="r")
+            if grid.ndim not in (2,3):
+                raise ValueError(f"GRID field: expected a 2D or 3D grid, got shape {grid.shape}")
+            GRID.grid = grid
+            GRID.path = path
+        GRID.bmin = np.array(bmin, dtype=np.float64)
+        GRID.bmax = np.array(bmax, dtype=np.float64)
+
+    def load_cfg(cfg):
+        GRID.load(bpy.path.abspath(cfg.grid_path), cfg.grid_min, cfg.grid_max)
+
+    def to_coords(pos:np.ndarray) -> np.ndarray:
+        """ World pos (n, 3) to grid index coords """
+        axes = [0,2] if GRID.grid.ndim == 2 else [0,1,2]
+        bmin, bmax = GRID.bmin[axes], GRID.bmax[axes]
+        size = np.where(bmax > bmin, bmax - bmin, 1.0)
+        return (pos[:, axes] - bmin) / size * (np.array(GRID.grid.shape) - 1)
+
+    def get3D_many(pos:np.ndarray):
+        cfg = getPrefs().resist_cfg
+        pos = np.array(pos, dtype=np.float64).reshape(-1,3)
+        pos[:,0], pos[:,2] = user_in_cfg_many(pos[:,0], pos[:,2], cfg)
+        r = interp_grid(GRID.grid, GRID.to_coords(pos))
+        return user_out_cfg_many(r, cfg)
+
+    def get2D_many(xs, ys):
+        # the volume is sampled at the mid height of the bounds
+        xs = np.asarray(xs, dtype=np.float64)
+        pos = np.zeros((len(xs), 3))
+        pos[:,0], pos[:,1], pos[:,2] = xs, 0.5*(GRID.bmin[1] + GRID.bmax[1]), ys
+        return GRID.get3D_many(pos)
+
+    def get2D(x, y):
+        return float(GRID.get2D_many([x], [y])[0])
+
+#-------------------------------------------------------------------
+
+def field_R_eval_pos(pos:np.ndarray) -> np.ndarray:
+    """ Evaluate the current field at world positions (n, 3), volumes use the full position and 2D fields only (x,z) """
+    field = field_R_current()
+    if hasattr(field, "get3D_many"):
+        return field.get3D_many(pos)
+    pos = np.asarray(pos).reshape(-1,3)
+    return field.get2D_many(pos[:,0], pos[:,2])
+
 # field selector
 _fields_map = {
     "LAYERS_SIDE": LAYERS_SIDE,
     "LAYERS_STACK": LAYERS_STACK,
     "POCKETS": POCKETS,
+    "GRID": GRID,
 }
 _field_R_current = LAYERS_SIDE
+_field_R_error = ""
 
 def field_R_current_switch():
-    global _field_R_current, _fields_map
+    """ Switch to the field selected in the cfg
+        * When the GRID file fails to load the cfg goes back to the field in use (the default one if that was a GRID too)
+    """
+    global _field_R_current, _fields_map, _field_R_error
     cfg = getPrefs().resist_cfg
     names = cfg.field.copy()
     field_name = names.pop()
+
+    # sampled fields need the grid mapped
+    if field_name == "GRID":
+        try:
+            GRID.load_cfg(cfg)
+        except (OSError, ValueError) as e:
+            prev_name = next( name for name,field in _fields_map.items() if field is _field_R_current )
+            if prev_name == "GRID": prev_name = "LAYERS_SIDE"
+            DEV.log_msg(f"GRID field not loaded, back to {prev_name}: {e}", {"RESIST", "ERROR"})
+            # NOTE:: triggers the prop update again, that switches to the previous field and clears the error
+            cfg.field = {prev_name}
+            _field_R_error = f"GRID not loaded: {e}"
+            return
+
     _field_R_current = _fields_map[field_name]
+    _field_R_error = ""
+
+def field_R_error() -> str:
+    """ Last error switching the field, empty when the selected field is in use """
+    return _field_R_error
 
 def field_R_current():
     global _field_R_current
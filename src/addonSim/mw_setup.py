@@ -3,6 +3,7 @@ import bpy.types as types
 import bmesh
 from mathutils import Vector, Matrix
 from math import radians
+import numpy as np
 
 from .preferences import getPrefs
 from .properties_global import (
@@ -18,10 +19,11 @@ from .mw_cont import MW_Cont, VORO_Container, CELL_STATE_ENUM, CELL_ERROR_ENUM
 from .mw_links import MW_Links
 from .mw_sim import MW_Sim, SIM_EXIT_FLAG
 from .mw_fract import MW_Fract # could import all from here
-from .mw_resistance import field_R_current
+from .mw_resistance import field_R_eval_pos
 
 from . import utils, utils_scene, utils_trans, utils_mat, utils_mesh
 from . import sv_geom_primitives
+from . import mw_overlay
 from .utils_mat import GRADIENTS, COLORS
 from .utils_dev import DEV
 from .stats import getStats
@@ -221,6 +223,66 @@ def gen_cellsObjects(fract: MW_Fract, root: types.Object, context: types.Context
     getStats().logDt("generated cells objects")
     return cells
 
+def gen_cellsMesh_single(fract: MW_Fract, root: types.Object, context: types.Context, flipN = False) -> types.Object:
+    """ Generate all cells in a single mesh written in bulk with foreach_set
+        * Faces follow the cont faces order (foundId), with per face cell_id and cell_state attributes
+        * The state also selects the material slot, one per state
+    """
+    prefs = getPrefs()
+    vis_cfg : MW_vis_cfg= root.mw_vis
+    cont = fract.cont
+
+    # gather the voro cells, vertices already in world position
+    verts, faces = [], []
+    for idx_cell in cont.foundId:
+        cell = cont.voro_cont[idx_cell]
+        verts.append(np.array(cell.vertices(), dtype=np.float32).reshape(-1,3))
+        faces.append(cell.face_vertices())
+    baseVerts = np.concatenate([[0], np.cumsum([ len(v) for v in verts ])])
+
+    # maybe reorient faces
+    l_vert = np.fromiter(( v + baseVerts[i] for i,fs in enumerate(faces) for f in fs for v in (f[::-1] if flipN else f) ), dtype=np.int32)
+    l_count = np.fromiter(( len(f) for fs in faces for f in fs ), dtype=np.int32)
+    l_start = (np.cumsum(l_count) - l_count).astype(np.int32)
+
+    # build the mesh directly from the arrays
+    mesh = bpy.data.meshes.new(prefs.names.cells)
+    mesh.vertices.add(int(baseVerts[-1]))
+    mesh.vertices.foreach_set("co", np.concatenate(verts).ravel())
+    mesh.loops.add(len(l_vert))
+    mesh.loops.foreach_set("vertex_index", l_vert)
+    mesh.polygons.add(len(l_count))
+    mesh.polygons.foreach_set("loop_start", l_start)
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set("loop_total", l_count)
+    mesh.update(calc_edges=True)
+
+    # per face cell attributes
+    mesh.attributes.new("cell_id", "INT", "FACE").data.foreach_set("value", cont.faces_cell)
+    mesh.attributes.new("cell_state", "INT", "FACE")
+
+    # one material slot per state, indexed by the state itself
+    mats = {
+        CELL_STATE_ENUM.SOLID: utils_mat.gen_colorMat(vis_cfg.cell_color, name=prefs.names.cells),
+        CELL_STATE_ENUM.CORE: utils_mat.gen_colorMat(vis_cfg.cell_color_core, name=prefs.names.cells_core),
+        CELL_STATE_ENUM.AIR: utils_mat.gen_colorMat(vis_cfg.cell_color_air, name=prefs.names.cells_air),
+    }
+    for state in sorted(mats.keys()):
+        mesh.materials.append(mats[state])
+
+    obj_cells = utils_scene.gen_child(root, prefs.names.cells, context, mesh, keepTrans=False)
+    getStats().logDt(f"generated single mesh cells: {len(cont.foundId)} cells, {len(l_count)} faces")
+    return obj_cells
+
+def update_cellsState_single(cont: MW_Cont):
+    """ Write the state of all cells to the single mesh faces in bulk (attribute and material slot) """
+    mesh = cont.cells_singleMesh.data
+    faces_state = cont.cells_state[cont.faces_cell].astype(np.int32)
+    mesh.attributes["cell_state"].data.foreach_set("value", faces_state)
+    mesh.polygons.foreach_set("material_index", faces_state)
+    mesh.update()
+    cont.setCells_stateApplied()
+
 def gen_cells_LEGACY(voro_cont: VORO_Container, root: types.Object, context: types.Context):
     root_cells = utils_scene.gen_child(root, getPrefs().names.cells, context, None, keepTrans=False)
 
@@ -272,6 +334,11 @@ def set_cellsState(cont: MW_Cont, root: types.Object, cells: list[types.Object],
     prefs = getPrefs()
     assert(state in CELL_STATE_ENUM.all)
 
+    # single mesh cells are not objects, so there is no selection to iterate
+    if cont.cells_singleMesh is not None:
+        DEV.log_msg(f"Cells state by selection not available with single mesh cells", {"SETUP", "CELLS"})
+        return []
+
     # take respective parent object
     if state == CELL_STATE_ENUM.SOLID:
         root_cells = utils_scene.get_child(root, prefs.names.cells)
@@ -294,6 +361,7 @@ def set_cellsState(cont: MW_Cont, root: types.Object, cells: list[types.Object],
         # set the parent and its mat
         cell.active_material = root_cells.active_material
         cell.parent = root_cells
+        cont.cells_state_scene[cell.mw_id.cell_id] = state
 
         # actually change the internal state (potentially done by links backend to trigger more detachmensts instead)
         if apply:
@@ -302,18 +370,27 @@ def set_cellsState(cont: MW_Cont, root: types.Object, cells: list[types.Object],
     return cells_id
 
 def update_cellsState(cont: MW_Cont, root: types.Object):
-    """ Iterate all cells and update scene to match the internal state """
+    """ Update the scene to match the internal state, only the cells changed since the last update """
     prefs = getPrefs()
+    changed = cont.getCells_stateChanged()
+    if not len(changed):
+        return
+
+    # single mesh is updated in bulk
+    if cont.cells_singleMesh is not None:
+        update_cellsState_single(cont)
+        return
 
     # take respective parent object
     root_cells = utils_scene.get_child(root, prefs.names.cells)
     root_core = utils_scene.get_child(root, prefs.names.cells_core)
     root_air = utils_scene.get_child(root, prefs.names.cells_air)
 
-    # iterate just the valid ones
-    ok, broken, error = cont.getCells_splitID_needsSanitize()
-    for idx in ok:
+    # iterate just the changed valid ones
+    for idx in changed.tolist():
         cell = cont.cells_objs[idx]
+        if cell in CELL_ERROR_ENUM.all or utils_scene.needsSanitize(cell):
+            continue
         state = cont.cells_state[idx]
         #state = cell.mw_id.cell_state
 
@@ -331,17 +408,34 @@ def update_cellsState(cont: MW_Cont, root: types.Object):
             cell.parent = root_air
             cell.mw_id.cell_state = state
 
+    cont.setCells_stateApplied(changed)
+    getStats().logDt(f"updated cells state: {len(changed)} changed")
+
 #-------------------------------------------------------------------
 
 DEV.RELOAD_FLAGS["rnd_links"] = False
 
 def gen_linksAll(context: types.Context):
     if not MW_global_selected.fract.links or not MW_global_selected.fract.links.initialized:
+        mw_overlay.links_overlay.clear()
         return
 
     #vis_cfg : MW_vis_cfg = MW_global_selected.root.mw_vis
     vis_cfg : MW_vis_cfg = getPrefs().mw_vis
 
+    # overlay mode draws straight from the arrays, so remove the mesh objects instead
+    if vis_cfg.links_overlay:
+        gen_linksDelete()
+        mw_overlay.links_overlay.build(MW_global_selected.fract, vis_cfg)
+    else:
+        mw_overlay.links_overlay.clear()
+        gen_linksMeshAll(context, vis_cfg)
+
+    # water dir
+    if vis_cfg.water_dir__show:
+        gen_arrow_dir(MW_global_selected.root, context)
+
+def gen_linksMeshAll(context: types.Context, vis_cfg: MW_vis_cfg):
     # regenerate the mesh
     if vis_cfg.links__show:
         gen_linksMesh(MW_global_selected.fract, MW_global_selected.root, context)
@@ -362,10 +456,6 @@ def gen_linksAll(context: types.Context):
             paths = utils_scene.get_child(MW_global_selected.root, getPrefs().names.water_paths)
             if paths: utils_scene.delete_objectRec(paths)
 
-    # water dir
-    if vis_cfg.water_dir__show:
-        gen_arrow_dir(MW_global_selected.root, context)
-
 def gen_linksDelete():
     prefs = getPrefs()
     links_ALL = utils_scene.get_children(MW_global_selected.root, prefs.names.links_ALL+prefs.names.water_ALL)
@@ -385,27 +475,50 @@ def gen_linksMesh(fract: MW_Fract, root: types.Object, context: types.Context):
 
     # NOTE:: some just used to create some vis, so disabled for final implementation
     numLinks = len(fract.links.internal)
-    points       : list[Vector]               = [None]*numLinks
     verts        : list[tuple[Vector,Vector]] = [None]*numLinks
-    id_life      : list[tuple[int,float]]     = [None]*numLinks
-    lifeWidths   : list[float]                = [None]*numLinks
     #id_resist    : list[tuple[int,float]]     = [None]*numLinks
     #dirX_dirZ    : list[tuple[float,float]]   = [None]*numLinks
     #id_area      : list[tuple[int,float]]     = [None]*numLinks
 
-    if DEV.DEBUG_GEODATA_PICKS:
-        id_picks   : list[tuple[int,int]]     = [None]*numLinks
     if DEV.DEBUG_GEODATA:
         k1_k2 : list[tuple[int,int]]          = [None]*numLinks
         f1_f2 : list[tuple[int,int]]          = [None]*numLinks
 
-    # iterate the global map and store vert pairs for the tube mesh generation
-    for id, l in enumerate(fract.links.internal):
-        id_normalized = id / float(numLinks) if not DEV.DEBUG_GEODATA_ID_RAW else id
+    # query props directly from the links store arrays
+    store = fract.links.store
+    ids = fract.links.get_ids(fract.links.internal)
+
+    # lerp the width
+    life = store.life_clamped(ids)
+    if cfg.links_width__mode == {"UNIFORM"}:
+        lifeWidths = cfg.links_width_broken * (1-life) + cfg.links_width_base * life
+    elif cfg.links_width__mode == {"BINARY"}:
+        lifeWidths = np.where(life<1, cfg.links_width_broken, cfg.links_width_base)
 
-        # original center
-        points[id]= l.pos
+    # NOTE:: the tubes topology only changes when links move between internal/external, otherwise rewrite just the changed ones
+    name = prefs.names.links
+    resFaces = utils_mesh.get_resFaces_fromCurveRes(cfg.wall_links_res)
+    vis_cfg = (resFaces, cfg.links_depth, cfg.links_smoothShade, DEV.DEBUG_GEODATA, DEV.DEBUG_GEODATA_ID_RAW)
+    changed = fract.links.getLinks_sceneChanged(ids, life, lifeWidths, vis_cfg) if not DEV.DEBUG_GEODATA_PICKS else None
+    obj_links = utils_scene.get_child(root, name)
+    if changed is not None and obj_links and obj_links.data:
+        mesh : types.Mesh = obj_links.data
+        if len(mesh.vertices) == numLinks*resFaces*2 and "id_life" in mesh.uv_layers:
+            update_linksMesh(fract, mesh, ids, life, lifeWidths, changed, resFaces, vis_cfg)
+            return obj_links
+
+    ids_normalized = np.arange(numLinks, dtype=np.float32)
+    if not DEV.DEBUG_GEODATA_ID_RAW: ids_normalized /= float(numLinks)
+
+    # original center
+    points = store.pos[ids].tolist()
+    id_life = list(zip(ids_normalized.tolist(), life.tolist()))
 
+    if DEV.DEBUG_GEODATA_PICKS:
+        id_picks = list(zip(ids_normalized.tolist(), store.picks[ids].tolist()))
+
+    # iterate the global map and store vert pairs for the tube mesh generation
+    for id, l in enumerate(fract.links.internal):
         # point from face to face
         p1,p2 = fract.cont.getFaces_pos(l.key_cells, l.key_faces)
 
@@ -421,30 +534,20 @@ def gen_linksMesh(fract: MW_Fract, root: types.Object, context: types.Context):
         p2 += pdir*cfg.links_depth*0.5
         verts[id]= (p1, p2)
 
-        # lerp the width
-        life = l.life_clamped
-        if cfg.links_width__mode == {"UNIFORM"}:
-            lifeWidths[id]= cfg.links_width_broken * (1-life) + cfg.links_width_base * life
-        elif cfg.links_width__mode == {"BINARY"}:
-            lifeWidths[id]= cfg.links_width_broken if life<1 else cfg.links_width_base
-
         # query props
-        id_life[id]= (id_normalized, life)
         #id_resist[id]= (id_normalized, l.resistance)
         #dirX_dirZ[id]=(abs(pdir.x), abs(pdir.z))
         #id_area[id] = (id_normalized, (l.area-fract.links.min_area) / (fract.links.max_area-fract.links.min_area))
 
-        if DEV.DEBUG_GEODATA_PICKS:
-            id_picks[id]= (id_normalized, l.picks)
         # query info keys
         if DEV.DEBUG_GEODATA:
             k1_k2[id] = l.key_cells
             f1_f2[id] = l.key_faces
 
-    # single mesh with tubes
-    name = prefs.names.links
-    resFaces = utils_mesh.get_resFaces_fromCurveRes(cfg.wall_links_res)
-    mesh = utils_mesh.get_tubeMesh_pairsQuad(verts, lifeWidths, name, 1.0, resFaces, cfg.links_smoothShade)
+    # single mesh with tubes, keep the endpoints to later update single tubes
+    pairs = np.array(verts, dtype=np.float64).reshape(-1, 2, 3)
+    mesh = utils_mesh.get_tubeMesh_pairsQuad_np(pairs, lifeWidths, name, 1.0, resFaces, cfg.links_smoothShade)
+    fract.links.setLinks_sceneApplied(ids, life, lifeWidths, vis_cfg, pairs)
 
     # potentially reuse child and clean mesh
     obj_links = utils_scene.gen_childReuse(root, name, context, mesh, keepTrans=True)
@@ -478,6 +581,25 @@ def gen_linksMesh(fract: MW_Fract, root: types.Object, context: types.Context):
     getStats().logDt("generated internal links mesh object")
     return obj_links
 
+def update_linksMesh(fract: MW_Fract, mesh: types.Mesh, ids: np.ndarray, life: np.ndarray, lifeWidths: np.ndarray, changed: np.ndarray, resFaces: int, vis_cfg: tuple):
+    """ Rewrite only the tubes and the id_life corners of the changed internal links, the mesh keeps its topology and material
+        * The tube of the drawn link k owns the verts [k*resFaces*2, (k+1)*resFaces*2) and the corners [k*resFaces*4, (k+1)*resFaces*4)
+    """
+    links : MW_Links = fract.links
+    if len(changed):
+        uv = mesh.uv_layers["id_life"]
+        id_life = np.empty(len(mesh.loops)*2, dtype=np.float32)
+        uv.data.foreach_get("uv", id_life)
+        id_life = id_life.reshape(len(ids), resFaces*4, 2)
+        id_life[changed, :, 1] = life[changed, None]
+        uv.data.foreach_set("uv", id_life.ravel())
+
+        # also updates the mesh
+        utils_mesh.update_tubeMesh_pairsQuad_np(mesh, changed, links.internal_scene_pairs[changed], lifeWidths[changed], 1.0, resFaces)
+
+    links.setLinks_sceneApplied(ids, life, lifeWidths, vis_cfg)
+    getStats().logDt(f"updated internal links mesh: {len(changed)} changed")
+
 def gen_linksMesh_air(fract: MW_Fract, root: types.Object, context: types.Context, picksToo = False):
     prefs = getPrefs()
     cfg : MW_vis_cfg = root.mw_vis
@@ -547,7 +669,7 @@ def gen_linksMesh_air(fract: MW_Fract, root: types.Object, context: types.Contex
     # two mesh with tubes to represent entry picks / regular traverse picks
     resFaces = utils_mesh.get_resFaces_fromCurveRes(cfg.wall_links_res)
     name_entry = prefs.names.links_air_entry
-    mesh_entry = utils_mesh.get_tubeMesh_pairsQuad(verts_entry, None, name_entry, w2, resFaces, cfg.links_smoothShade)
+    mesh_entry = utils_mesh.get_tubeMesh_pairsQuad_np(verts_entry, None, name_entry, w2, resFaces, cfg.links_smoothShade)
 
     # potentially reuse child and clean mesh
     obj_linksAir_entry = utils_scene.gen_childReuse(root, name_entry, context, mesh_entry, keepTrans=True)
@@ -572,7 +694,7 @@ def gen_linksMesh_air(fract: MW_Fract, root: types.Object, context: types.Contex
     if picksToo:
         # regen obj and mesh
         name_picks = prefs.names.links_air
-        mesh_picks = utils_mesh.get_tubeMesh_pairsQuad(verts, None, name_picks, w2, resFaces, cfg.links_smoothShade)
+        mesh_picks = utils_mesh.get_tubeMesh_pairsQuad_np(verts, None, name_picks, w2, resFaces, cfg.links_smoothShade)
         obj_linksAir_picks = utils_scene.gen_childReuse(root, name_picks, context, mesh_picks, keepTrans=True)
         MW_id_utils.setMetaChild(obj_linksAir_picks)
         # attrs
@@ -638,7 +760,7 @@ def gen_linksMesh_neighs(fract: MW_Fract, root: types.Object, context: types.Con
     # single mesh with tubes
     name = prefs.names.links_neighs
     resFaces = utils_mesh.get_resFaces_fromCurveRes(cfg.neighs_res)
-    mesh = utils_mesh.get_tubeMesh_pairsQuad(verts, None, name, cfg.neighs_width, resFaces, cfg.links_smoothShade)
+    mesh = utils_mesh.get_tubeMesh_pairsQuad_np(verts, None, name, cfg.neighs_width, resFaces, cfg.links_smoothShade)
 
     # potentially reuse child and clean mesh
     obj_neighs = utils_scene.gen_childReuse(root, name, context, mesh, keepTrans=True)
@@ -693,7 +815,7 @@ def gen_linksMesh_path(fract: MW_Fract, root: types.Object, context: types.Conte
         if l_prev:
             p1 = l_prev.pos
         else:
-            p1 = p2 + cfg.path_outside_start * -sim.cfg.dir_entry
+            p1 = p2 + cfg.path_outside_start * -Vector(sim.cfg.dir_entry)
 
         verts[depth] = (p1, p2)
 
@@ -721,7 +843,7 @@ def gen_linksMesh_path(fract: MW_Fract, root: types.Object, context: types.Conte
 
         # last point outside
         p1 = l_prev.pos
-        p2 = p1 + cfg.path_outside_start * sim.cfg.dir_next
+        p2 = p1 + cfg.path_outside_start * Vector(sim.cfg.dir_next)
         verts.append((p1, p2))
 
         # use new next id
@@ -739,7 +861,7 @@ def gen_linksMesh_path(fract: MW_Fract, root: types.Object, context: types.Conte
     # single mesh with tubes
     name = getPrefs().names.water_paths
     resFaces = utils_mesh.get_resFaces_fromCurveRes(cfg.path_res)
-    mesh = utils_mesh.get_tubeMesh_pairsQuad(verts, waterWidths, name, 1.0, resFaces, cfg.links_smoothShade)
+    mesh = utils_mesh.get_tubeMesh_pairsQuad_np(verts, waterWidths, name, 1.0, resFaces, cfg.links_smoothShade)
 
     # potentially reuse child and clean mesh
     if cfg.path_lastOnly:
@@ -903,12 +1025,15 @@ def gen_field_R(root: types.Object, context: types.Context, res = 8, smooth = Fa
 
     # Encode resistance in world pos as UV and use texture for vis
     numCornerVerts = len(mesh.loops)
-    id_resist : list[tuple[int,float]] = [None]*numCornerVerts
-    mToWorld = obj_field.matrix_world
-    for id, l in enumerate(mesh.loops):
-        id_normalized = id / float(numCornerVerts)
-        v = mToWorld @ mesh.vertices[l.vertex_index].co
-        id_resist[id]= (id_normalized, field_R_current().get2D(v.x, v.z))
+    co = np.empty(len(mesh.vertices)*3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    loops_v = np.empty(numCornerVerts, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops_v)
+    mToWorld = np.array(obj_field.matrix_world)
+    v = co.reshape(-1,3)[loops_v] @ mToWorld[:3,:3].T + mToWorld[:3,3]
+    id_normalized = np.arange(numCornerVerts) / float(numCornerVerts)
+    resist = field_R_eval_pos(v)
+    id_resist : list[tuple[int,float]] = list(zip(id_normalized.tolist(), resist.tolist()))
 
     # reset instead of creating!
     utils_mat.set_meshUV(mesh, mesh.uv_layers.get("id_resist"), id_resist)
@@ -0,0 +1,200 @@
+import numpy as np
+import hashlib
+import os
+from collections import OrderedDict
+
+from .utils_dev import DEV
+
+# NOTE:: no blender nor voro++ imports here, the cached cells are plain numpy arrays with the same interface used from the tess cells
+#-------------------------------------------------------------------
+
+class VoroCell:
+    """ View over a single cell of VoroContData, mimics the subset of the tess Cell interface used by the addon
+        # NOTE:: methods return new python lists like tess does, the callers modify them (e.g. neighbors)
+    """
+    __slots__ = ("data", "row", "id")
+
+    def __init__(self, data: "VoroContData", row: int, id: int):
+        self.data = data
+        self.row = row
+        self.id = id
+
+    @property
+    def pos(self) -> tuple:
+        return tuple(self.data.pos[self.row].tolist())
+
+    def centroid(self) -> tuple:
+        return tuple(self.data.centroid[self.row].tolist())
+    def centroid_local(self) -> tuple:
+        return tuple((self.data.centroid[self.row] - self.data.pos[self.row]).tolist())
+
+    def _verts(self) -> np.ndarray:
+        o = self.data.v_offsets
+        return self.data.verts[o[self.row]:o[self.row+1]]
+    def vertices(self) -> list[tuple]:
+        return [ tuple(v) for v in self._verts().tolist() ]
+    def vertices_local(self) -> list[tuple]:
+        return [ tuple(v) for v in (self._verts() - self.data.pos[self.row]).tolist() ]
+    def vertices_local_centroid(self) -> list[tuple]:
+        return [ tuple(v) for v in (self._verts() - self.data.centroid[self.row]).tolist() ]
+
+    def face_vertices(self) -> list[list[int]]:
+        d = self.data
+        f0, f1 = d.f_offsets[self.row], d.f_offsets[self.row+1]
+        lo = d.l_offsets[f0:f1+1].tolist()
+        loops = d.loops[lo[0]:lo[-1]].tolist()
+        return [ loops[a-lo[0]:b-lo[0]] for a,b in zip(lo[:-1], lo[1:]) ]
+
+    def neighbors(self) -> list[int]:
+        o = self.data.f_offsets
+        return self.data.neighs[o[self.row]:o[self.row+1]].tolist()
+
+class VoroContData:
+    """ Cells geometry and neighbours of a voro++ container as flat arrays, mimics the tess Container interface used by the addon
+        * Iterating yields VoroCell or None for the missing cells, same as the container
+        * Vertices per found cell (v_offsets), faces per found cell (f_offsets) and loops per face (l_offsets)
+    """
+
+    names = ("found", "pos", "centroid", "v_offsets", "verts", "f_offsets", "l_offsets", "loops", "neighs", "limitWalls", "walls_cont_idx")
+
+    def __init__(self, found, pos, centroid, v_offsets, verts, f_offsets, l_offsets, loops, neighs, limitWalls, walls_cont_idx):
+        self.found = np.asarray(found, dtype=bool)
+        self.pos = np.asarray(pos, dtype=np.float64).reshape(-1,3)
+        self.centroid = np.asarray(centroid, dtype=np.float64).reshape(-1,3)
+        self.v_offsets = np.asarray(v_offsets, dtype=np.int64)
+        self.verts = np.asarray(verts, dtype=np.float64).reshape(-1,3)
+        self.f_offsets = np.asarray(f_offsets, dtype=np.int64)
+        self.l_offsets = np.asarray(l_offsets, dtype=np.int64)
+        self.loops = np.asarray(loops, dtype=np.int32)
+        self.neighs = np.asarray(neighs, dtype=np.int32)
+        self.limitWalls = np.asarray(limitWalls, dtype=np.int32)
+        self.walls_cont_idx = np.asarray(walls_cont_idx, dtype=np.int32).tolist()
+
+        self.rows = np.full(len(self.found), -1, dtype=np.int64)
+        self.rows[self.found] = np.arange(int(self.found.sum()))
+        self.cells = [ VoroCell(self, int(r), i) if r >= 0 else None for i,r in enumerate(self.rows.tolist()) ]
+
+    @classmethod
+    def from_voro(cls, voro_cont):
+        """ Copy the cells of a tess container, single pass over the found ones """
+        found = np.array([ c is not None for c in voro_cont ], dtype=bool)
+        cells = [ c for c in voro_cont if c is not None ]
+        verts = [ c.vertices() for c in cells ]
+        faces = [ c.face_vertices() for c in cells ]
+        neighs = [ c.neighbors() for c in cells ]
+
+        v_offsets = np.concatenate([[0], np.cumsum([ len(v) for v in verts ])])
+        f_offsets = np.concatenate([[0], np.cumsum([ len(f) for f in faces ])])
+        l_counts = [ len(f) for fs in faces for f in fs ]
+        l_offsets = np.concatenate([[0], np.cumsum(l_counts)])
+        return cls(
+            found,
+            [ c.pos for c in cells ] or np.empty((0,3)),
+            [ c.centroid() for c in cells ] or np.empty((0,3)),
+            v_offsets,
+            np.concatenate([ np.asarray(v, dtype=np.float64).reshape(-1,3) for v in verts ]) if verts else np.empty((0,3)),
+            f_offsets,
+            l_offsets,
+            np.fromiter(( i for fs in faces for f in fs for i in f ), dtype=np.int32, count=int(l_offsets[-1])),
+            np.fromiter(( n for ns in neighs for n in ns ), dtype=np.int32, count=int(f_offsets[-1])),
+            voro_cont.get_conainerId_limitWalls(),
+            voro_cont.walls_cont_idx,
+        )
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        return { name: np.asarray(getattr(self, name)) for name in self.names }
+
+    def get_conainerId_limitWalls(self) -> list[int]:
+        return self.limitWalls.tolist()
+
+    def __len__(self):
+        return len(self.cells)
+    def __iter__(self):
+        return iter(self.cells)
+    def __getitem__(self, i):
+        return self.cells[i]
+
+#-------------------------------------------------------------------
+
+class VoroCache:
+    """ Content addressed cache of voro++ results: the key hashes the exact container inputs
+        * In memory with LRU eviction, optionally also stored on disk as .npz (disk_dir_fn returns the folder or None)
+        * The disk entries are evicted by LRU too, using the file mtime (touched on each disk hit)
+    """
+
+    def __init__(self, max_entries = 4, max_disk_entries = 16):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.entries : OrderedDict[str, VoroContData] = OrderedDict()
+        self.disk_dir_fn = None
+        self.hits, self.misses = 0, 0
+
+    @staticmethod
+    def get_key(points, bb, faces4D, precision:int, legacy = False) -> str:
+        """ Hash of the inputs, float bits included so any change in the points misses """
+        h = hashlib.sha1()
+        for arr in (points, bb, faces4D):
+            arr = np.ascontiguousarray([ tuple(v) for v in arr ], dtype=np.float64)
+            h.update(str(arr.shape).encode())
+            h.update(arr.tobytes())
+        h.update(f"precision={precision};legacy={legacy}".encode())
+        return h.hexdigest()
+
+    def get_path(self, key:str) -> str|None:
+        disk_dir = self.disk_dir_fn() if self.disk_dir_fn else None
+        return os.path.join(disk_dir, f"voro_{key}.npz") if disk_dir else None
+
+    def get(self, key:str) -> VoroContData|None:
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+        path = self.get_path(key)
+        if path and os.path.isfile(path):
+            try:
+                with np.load(path) as f:
+                    data = VoroContData(*( f[name] for name in VoroContData.names ))
+                os.utime(path)
+                self.put(key, data, disk=False)
+                self.hits += 1
+                return data
+            except Exception as e:
+                DEV.log_msg(f"exception loading voro cache >> {str(e)}", {"CACHE", "CONT", "ERROR"})
+
+        self.misses += 1
+        return None
+
+    def put(self, key:str, data:VoroContData, disk = True):
+        self.entries[key] = data
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+        path = self.get_path(key) if disk else None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                np.savez(path, **data.arrays())
+                self.evict_disk(os.path.dirname(path))
+            except Exception as e:
+                DEV.log_msg(f"exception saving voro cache >> {str(e)}", {"CACHE", "CONT", "ERROR"})
+
+    def evict_disk(self, disk_dir:str):
+        """ Remove the least recently used files beyond max_disk_entries """
+        files = [ os.path.join(disk_dir, name) for name in os.listdir(disk_dir) if name.startswith("voro_") and name.endswith(".npz") ]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files)-self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                DEV.log_msg(f"exception evicting voro cache >> {str(e)}", {"CACHE", "CONT", "ERROR"})
+
+    def clear(self):
+        self.entries.clear()
+
+voro_cache = VoroCache()
+""" Global cache used by MW_Cont.build_voro """
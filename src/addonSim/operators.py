@@ -240,9 +240,15 @@ class MW_gen_OT(_StartRefresh_OT):
             mw_setup.gen_cells_LEGACY(cont.voro_cont, obj_root, self.context)
             return self.end_op("DEV.LEGACY_CONT_GEN stop...")
 
-        # precalculate/query neighs and other data with generated cells mesh
-        cells = mw_setup.gen_cellsObjects(fract, obj_root, self.context, scale=obj_root.mw_vis.cell_scale, flipN=cfg.debug_flipCellNormals)
-        cont.precalculations(cells)
+        # precalculate neighs, faces geometry and maps from voro, then reference the generated cells mesh
+        cont.precalculations_voro()
+        if cfg.cells_singleMesh:
+            obj_cells = mw_setup.gen_cellsMesh_single(fract, obj_root, self.context, flipN=cfg.debug_flipCellNormals)
+            cont.precalculations_singleMesh(obj_cells)
+            mw_setup.update_cellsState_single(cont)
+        else:
+            cells = mw_setup.gen_cellsObjects(fract, obj_root, self.context, scale=obj_root.mw_vis.cell_scale, flipN=cfg.debug_flipCellNormals)
+            cont.precalculations(cells)
         if not cont.precalculated:
             return self.end_op_error("error during container precalculations!")
 
@@ -338,8 +344,13 @@ class MW_gen_recalc_OT(_StartRefresh_OT):
         if not cont.initialized:
             return self.end_op_error("found no cont or cells... recalc different params?")
 
-        # precalculate/query neighs and other data
-        cont.precalculations(obj_cells_root.children)
+        # precalculate/query neighs and other data (single mesh cells store the cell_id per face)
+        if obj_cells_root.type == "MESH" and "cell_id" in obj_cells_root.data.attributes:
+            cont.precalculations_singleMesh(obj_cells_root)
+        else:
+            cont.precalculations(obj_cells_root.children)
+        if not cont.precalculated:
+            return self.end_op_error("error during container precalculations!")
 
         # calculate links and store in the external storage
         fract.links = links = MW_Links(cont)
@@ -481,9 +492,7 @@ class MW_gen_field_r_OT(_StartRefresh_OT):
         # update links R
         if  MW_global_selected.fract and MW_global_selected.fract.links:
             links :MW_Links = MW_global_selected.fract.links
-            for key in links.links_graph.nodes():
-                l = links.get_link(key)
-                l.update_resistance()
+            links.update_resistance()
 
         return self.end_op()
 
@@ -576,7 +585,7 @@ class MW_sim_step_OT(_StartRefresh_OT):
                 DEV.log_msg("INVALID ROOT: skipped run", {'SIM'})
                 return self.end_op_refresh(skipLog=True)
 
-            sim.cfg = MW_global_selected.root.mw_sim
+            sim.set_cfg(MW_global_selected.root.mw_sim)
 
             # restore state to get constructive results withing the mod last op panel
             sim.backup_state_restore()
@@ -584,24 +593,22 @@ class MW_sim_step_OT(_StartRefresh_OT):
         # steps
         sim_cfg : MW_sim_cfg= self.cfg
         DEV.log_msg(f"step_infiltrations({sim_cfg.step_infiltrations}), step_maxDepth({sim_cfg.step_maxDepth}), step_stopBreak({sim_cfg.step_stopBreak})", {'SIM'})
-        for step_id in range(sim_cfg.step_infiltrations):
-            # still alive msg
-            if sim_cfg.debug_log_everyIters and step_id%sim_cfg.debug_log_everyIters == 0:
-                DEV.log_msg(f"// ({step_id}) running...", {'SIM'})
-
-            log_step = sim_cfg.debug_log and step_id+1 > sim_cfg.step_infiltrations-sim_cfg.debug_log_lastIters
-            if not sim_cfg.debug_util_uniformDeg: sim.step(log_step)
-            else: sim.step_degradeAll() # alternative see erosion on all
+        if sim_cfg.debug_util_uniformDeg:
+            # alternative see erosion on all
+            for step_id in range(sim_cfg.step_infiltrations):
+                sim.step_degradeAll()
+        else:
+            # batch mode only logs the last iterations and keeps the last path
+            log_lastIters = sim_cfg.debug_log_lastIters if sim_cfg.debug_log else 0
+            sim.run_batch(sim_cfg.step_infiltrations, keep_paths=1, log_lastIters=log_lastIters, log_everyIters=sim_cfg.debug_log_everyIters)
 
             # no entry link due to direction
             if sim.exit_flag == SIM_EXIT_FLAG.NO_ENTRY_LINK:
                 return self.end_op_error("No entry link found... (probably due dir_entry)")
 
-            # skip the rest of steps
-            if sim.exit_flag >= SIM_EXIT_FLAG.STOP_ON_LINK_BREAK:
-                break
-
         getStats().logDt("completed simulation steps")
+        if prefs.sim_checkpoint_OT_auto:
+            sim.checkpoint_save(delta=prefs.sim_checkpoint_OT_delta)
 
         # redraw links and cells
         mw_setup.update_cellsState(MW_global_selected.fract.cont, MW_global_selected.root)
@@ -686,6 +693,85 @@ class MW_sim_undoLast_OT(_StartRefresh_OT):
         mw_setup.gen_linksAll(context)
         return self.end_op()
 
+def checkpoint_items(self, context):
+    """ Checkpoints of the selected fracture sim
+        # NOTE:: blender requires the python strings of dynamic items to stay referenced, so keep the list in the module
+    """
+    global _checkpoint_items
+    sim : MW_Sim = MW_global_selected.fract.sim if MW_global_selected.fract else None
+    if sim and sim.checkpoints:
+        _checkpoint_items = [ (name, name, f"step {cp.step_id}") for name,cp in sim.checkpoints.items() ]
+    else:
+        _checkpoint_items = [ ('NONE', "No checkpoints", "Store one first") ]
+    return _checkpoint_items
+_checkpoint_items = []
+
+class MW_sim_checkpoint_save_OT(_StartRefresh_OT):
+    bl_idname = "mw.sim_checkpoint_save"
+    bl_label = "Simulation save checkpoint"
+    bl_description = "Store the current simulation state as a named checkpoint (links and cells)"
+
+    bl_options = {'INTERNAL'}
+
+    def __init__(self) -> None:
+        super().__init__()
+        # config some base class log flags...
+
+    @classmethod
+    def poll(cls, context):
+        return MW_global_selected.root and MW_global_selected.fract and MW_global_selected.fract.sim
+
+    def execute(self, context: types.Context):
+        self.start_op()
+        sim : MW_Sim = MW_global_selected.fract.sim
+        name = sim.checkpoint_save(delta=getPrefs().sim_checkpoint_OT_delta)
+        return self.end_op(f"saved {name}")
+
+class MW_sim_checkpoint_OT(_StartRefresh_OT):
+    bl_idname = "mw.sim_checkpoint"
+    bl_label = "Simulation jump to checkpoint"
+    bl_description = "Restore a stored checkpoint, pick another one in the edit last operation panel"
+
+    bl_options = {'REGISTER', 'UNDO'}
+
+    checkpoint: props.EnumProperty(
+        name="Checkpoint", description="Stored simulation state",
+        items=checkpoint_items,
+    )
+
+    def __init__(self) -> None:
+        super().__init__()
+        # config some base class log flags...
+        self.invoke_log = True
+
+    def draw(self, context: types.Context):
+        super().draw(context)
+        self.layout.prop(self, "checkpoint")
+
+    @classmethod
+    def poll(cls, context):
+        return MW_global_selected.root and MW_global_selected.fract and MW_global_selected.fract.sim and MW_global_selected.fract.sim.checkpoints
+
+    def invoke(self, context, event):
+        # start from the last one stored
+        sim : MW_Sim = MW_global_selected.fract.sim
+        self.checkpoint = next(reversed(sim.checkpoints))
+        return super().invoke(context, event)
+
+    def execute(self, context: types.Context):
+        self.start_op()
+        sim : MW_Sim = MW_global_selected.fract.sim
+        if self.checkpoint not in sim.checkpoints:
+            return self.end_op_error(f"checkpoint not found: {self.checkpoint}")
+
+        # arrays copied back in place and the comps restored, no recalculation
+        sim.checkpoint_restore(self.checkpoint)
+
+        # redraw links and cells
+        mw_setup.update_cellsState(MW_global_selected.fract.cont, MW_global_selected.root)
+        mw_setup.gen_linksAll(context)
+        return self.end_op()
+
 #-------------------------------------------------------------------
 
 class MW_util_comps_OT(_StartRefresh_OT):
@@ -877,6 +963,8 @@ classes = [
     MW_sim_reset_OT,
     MW_sim_resetCFG_OT,
     MW_sim_undoLast_OT,
+    MW_sim_checkpoint_save_OT,
+    MW_sim_checkpoint_OT,
 
     MW_util_comps_OT,
     MW_util_bool_OT,
@@ -12,6 +12,7 @@ from .mw_fract import MW_Fract
 from .mw_cont import MW_Cont, CELL_STATE_ENUM
 from .mw_links import MW_Links, LINK_STATE_ENUM
 from .mw_sim import MW_Sim, SIM_EXIT_FLAG
+from .mw_resistance import field_R_error
 
 from . import operators as ops
 from . import operators_dm as ops_utils
@@ -162,6 +163,8 @@ class MW_gen_PT(types.Panel):
         # resistance edit
         res_cfg = prefs.resist_cfg
         open, box = ui.draw_propsToggle_custom(res_cfg, prefs.resist_PT_meta_inspector, layout, text="Resistance...")
+        if field_R_error():
+            layout.label(text=field_R_error(), icon="ERROR")
 
     def draw_debug(self, context: types.Context, layout: types.UILayout):
         prefs = getPrefs()
@@ -180,12 +183,15 @@ class MW_gen_PT(types.Panel):
             col_rowSplit = boxLinks.row().split(factor=col_split)
             col_rowSplit.label(text=f"Storage: {len(MW_global_storage.id_fracts)}", icon="FORCE_CURVE")
             col_rowSplit.prop(prefs, "prefs_autoPurge")
+            col_rowSplit = boxLinks.row().split(factor=col_split)
+            col_rowSplit.label(text="Disk cache", icon="DISK_DRIVE")
+            col_rowSplit.prop(prefs, "prefs_diskCache")
 
             col = boxLinks.column()
             for id, fract in MW_global_storage.id_fracts.items():
                 obj = MW_global_storage.id_fracts_obj[id]
                 icon = "X" if utils_scene.needsSanitize(obj) else "CHECKMARK"
-                col.label(text=f"{id}: {len(fract.cont.voro_cont if fract.cont else -1)} cells + {fract.links.links_len if fract.links else -1} links", icon=icon)
+                col.label(text=f"{id}: {len(fract.cont.cells_state) if fract.cont else -1} cells + {fract.links.links_len if fract.links else -1} links", icon=icon)
 
             # more stuff
             col = box.column()
@@ -241,7 +247,7 @@ class MW_gen_PT(types.Panel):
                     boxCont.label(text=f"-CONT-  root: {cont.root.name if not utils_scene.needsSanitize(cont.root) else '~'}", icon="CON_PIVOT")
                     cell_sample = cont.cells_objs[0].name if not utils_scene.needsSanitize(cont.cells_objs[0]) else '~'
                     mesh_sample = cont.cells_meshes[0].name if not utils_scene.needsSanitize(cont.cells_meshes[0]) else '~'
-                    boxCont.label(text=f"  samples [{len(cont.cells_objs)}],  c: {cell_sample}, m: {mesh_sample}")
+                    boxCont.label(text=f"  samples [{len(cont.cells_objs)}],  c: {cell_sample}, m: {mesh_sample}{' (single)' if cont.cells_singleMesh else ''}")
                 if links:
                     boxLinks = box.box().column()
                     linksText = f"-LINKS-  comps: {links.comps_len}"
@@ -302,6 +308,15 @@ class MW_sim_PT(types.Panel):
         col_rowSplit.operator(ops.MW_sim_reset_OT.bl_idname, text="RESET", icon="ORPHAN_DATA")
         col_rowSplit.operator(ops.MW_sim_resetCFG_OT.bl_idname, text="config")
 
+        # checkpoints
+        sim = MW_global_selected.fract.sim if MW_global_selected.fract else None
+        col_rowSplit = col.row().split(factor=col_split)
+        col_rowSplit.operator(ops.MW_sim_checkpoint_save_OT.bl_idname, text="SAVE", icon="BOOKMARKS")
+        row = col_rowSplit.row().split()
+        row.operator(ops.MW_sim_checkpoint_OT.bl_idname, text=f"JUMP ({len(sim.checkpoints) if sim else 0})")
+        row.prop(prefs, "sim_checkpoint_OT_auto", icon="REC", text="")
+        row.prop(prefs, "sim_checkpoint_OT_delta", icon="MOD_DATA_TRANSFER", text="")
+
         # inspect root or selected?
         if root:
             #open, box = ui.draw_propsToggle_custom(root.mw_sim, prefs.sim_PT_meta_inspector, col, text="Parameters", propFilter="-step,-debug")
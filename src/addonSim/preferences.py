@@ -268,6 +268,16 @@ class MW_prefs(bpy.types.AddonPreferences):
         update= prefs_autoPurge_update
     )
 
+    def prefs_diskCache_update(self, context):
+        MW_global_storage.enable_diskCache = self.prefs_diskCache
+        MW_global_storage.id_fracts_missed.clear()
+
+    prefs_diskCache: props.BoolProperty(
+        name="disk cache", description="Store the fractures (when saving the file) and the voro containers on disk, reload them from there instead of recalculating",
+        default=MW_global_storage.enable_diskCache_default,
+        update= prefs_diskCache_update
+    )
+
     #-------------------------------------------------------------------
 
     # edit some DEV params
@@ -309,6 +319,14 @@ class MW_prefs(bpy.types.AddonPreferences):
         name="sim", description="Generate links mesh after every simulation",
         default=True,
     )
+    sim_checkpoint_OT_auto: props.BoolProperty(
+        name="auto", description="Store a checkpoint after every simulation (named by the step)",
+        default=False,
+    )
+    sim_checkpoint_OT_delta: props.BoolProperty(
+        name="delta", description="Store only the changes against the previous checkpoint",
+        default=True,
+    )
 
     gen_duplicate_OT_hidePrev: props.BoolProperty(
         name="hide", description="Hide the original fractured object after duplication",
@@ -115,6 +115,10 @@ class MW_gen_cfg(types.PropertyGroup):
         name="Flip final cell normals", description="Seems like they end up reversed due to voro face ordering",
         default=True,
     )
+    cells_singleMesh: props.BoolProperty(
+        name="Single mesh cells", description="Generate all cells in a single mesh (per face cell_id/cell_state attributes) instead of an object per cell. Scales to large cell counts, but cells cannot be selected/edited as objects",
+        default=False,
+    )
 
     #-------------------------------------------------------------------
 
@@ -381,6 +385,13 @@ class MW_vis_cfg(types.PropertyGroup):
     # debug one are non-dynamic, only affects subsequent runs but get written to root too
     # OPT:: most could be easily dynamic but probably not worth it or jus regen all mesh
 
+    links_overlay: props.BoolProperty(
+        name="Links overlay",
+        description="Draw the links as a viewport overlay (gpu lines/points) instead of generating mesh objects",
+        default=False,
+        update= lambda self, context: mw_setup_props.getRoot_checkProxy_None(self, "mw_vis", "links_overlay")
+    )
+
     links__show: props.BoolProperty(
         name=prefix_show+"Links",
         description="Show regular links on visualization update",
@@ -565,6 +576,7 @@ class MW_resistance_cfg(types.PropertyGroup):
             ('LAYERS_SIDE',  "SIDE",    "Sideways resistance layers, with a bit of inclination"),
             ('LAYERS_STACK', "STACK",   "Stacked resistance layers, with a bit of inclination"),
             ('POCKETS',      "POCKETS", "Repeating pockets of resistance"),
+            ('GRID',         "GRID",    "Sampled from a 2D raster or 3D volume grid file (.npy), memory mapped"),
         ),
         default={'LAYERS_SIDE'},
         options={'ENUM_FLAG'},
@@ -589,6 +601,28 @@ class MW_resistance_cfg(types.PropertyGroup):
         default=False,
     )
 
+    # sampled grid field
+    grid_path: props.StringProperty(
+        name="Grid file", description="Numpy .npy grid, 2D indexed [x,z] or 3D indexed [x,y,z]. Memory mapped so it can be larger than RAM",
+        subtype='FILE_PATH',
+        default="",
+        update= lambda self, context: MW_resistance_cfg.switchField()
+    )
+    grid_min: props.FloatVectorProperty(
+        name="Grid min", description="World position of the first grid sample",
+        subtype='XYZ',
+        size=3,
+        default=(-10, -10, -10),
+        update= lambda self, context: MW_resistance_cfg.switchField()
+    )
+    grid_max: props.FloatVectorProperty(
+        name="Grid max", description="World position of the last grid sample",
+        subtype='XYZ',
+        size=3,
+        default=(10, 10, 10),
+        update= lambda self, context: MW_resistance_cfg.switchField()
+    )
+
     # visuals
     vis__show: props.BoolProperty(
         name=prefix_show+"R field",
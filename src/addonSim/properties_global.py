@@ -187,11 +187,12 @@ class MW_id_utils:
 
 class MW_global_storage:
     """  Blender properties are quite limited, ok for editting in the UI but for just data use python classes.
-        # NOTE:: atm this storage is lost on file or module reload... could store in a .json as part of the .blend
+        # NOTE:: this storage is lost on file or module reload, fracts are stored on disk when saving the file (see mw_fract_cache)
     """
 
     id_fracts       = dict() # id:int -> MW_fract
     id_fracts_obj   = dict() # id:int -> Object
+    id_fracts_missed = set() # id:int whose fract_loader found nothing, not retried until a save, file load or regen
 
     @classmethod
     def addFract(cls, fract, obj):
@@ -203,6 +204,7 @@ class MW_global_storage:
             DEV.log_msg(f"Replacing found fract", {"GLOBAL", "STORAGE", "ERROR"})
         cls.id_fracts[id] = fract
         cls.id_fracts_obj[id] = obj
+        cls.id_fracts_missed.discard(id)
         return id
 
     @classmethod
@@ -216,6 +218,11 @@ class MW_global_storage:
     @classmethod
     def getFract(cls, obj):
         id = MW_id_utils.getStorageId_assert(obj)
+        # lazily try the disk cache when not in memory (e.g. after loading a file or a purge)
+        if id not in cls.id_fracts and id not in cls.id_fracts_missed and cls.enable_diskCache and cls.fract_loader:
+            fract = cls.fract_loader(obj)
+            if fract: cls.addFract(fract, obj)
+            else: cls.id_fracts_missed.add(id)
         return cls.getFract_fromID(id)
 
     @classmethod
@@ -226,6 +233,7 @@ class MW_global_storage:
     @classmethod
     def freeFract_fromID(cls, id):
         DEV.log_msg(f"Free: {id}", {"GLOBAL", "STORAGE"})
+        cls.callback_freeFract_actions.dispatch([id])
         try:
             # delete the fract and only pop the obj
             fract = cls.id_fracts.pop(id)
@@ -256,10 +264,19 @@ class MW_global_storage:
 
     #-------------------------------------------------------------------
 
+    callback_freeFract_actions = handlers.Actions()
+    """ Function actions to be called before freeing a fract: c(id) """
+
     # callback triggers
     enable_autoPurge_default = False
     enable_autoPurge = enable_autoPurge_default
 
+    # disk cache, see mw_fract_cache
+    enable_diskCache_default = False
+    enable_diskCache = enable_diskCache_default
+    fract_loader = None
+    """ Function obj -> fract|None called when a root has no fract in memory """
+
     @classmethod
     def getFracts_splitID_needsSanitize(cls):
         """ Detect broken references to scene objects """
@@ -285,7 +302,9 @@ class MW_global_storage:
 
     @classmethod
     def recoverFracts(cls, broken = None):
-        """ Try to recover objects that might have pop back into the scene """
+        """ Try to recover objects that might have pop back into the scene
+            # NOTE:: roots whose fract is not in memory at all (purged or file reloaded) are loaded lazily from the disk cache by getFract
+        """
         if broken is None:
             ok, broken = cls.getFracts_splitID_needsSanitize()
         DEV.log_msg(f"Check recover {len(broken)}: {broken}", {"GLOBAL", "STORAGE", "SANITIZE"})
@@ -321,7 +340,10 @@ class MW_global_storage:
 
         # potentially recalculate some parts of the fract
         for id in ok:
-            cls.id_fracts[id].sanitize(cls.id_fracts_obj[id])
+            fract = cls.id_fracts[id]
+            fract.sanitize(cls.id_fracts_obj[id])
+            # the scene links mesh might be an older one now (undo/redo), not the last drawn
+            if fract.links: fract.links.setLinks_sceneInvalid()
 
     @classmethod
     def sanitizeFracts_callback(cls, _scene_=None, _undo_name_=None):
@@ -1,6 +1,7 @@
 import bpy
 import bpy.types as types
 import bpy.props as props
+import hashlib
 
 from .utils_dev import DEV
 
@@ -267,4 +268,26 @@ def resetProps_rec(src, propFilter:str=None, groupFilter:str=None, recFilter = F
     group_names = getProps_groups(src, groupFilter)
     for group_name in group_names:
         filter = groupFilter if recFilter else ""
-        resetProps_rec(getattr(src, group_name), propFilter, filter, recFilter)
\ No newline at end of file
+        resetProps_rec(getattr(src, group_name), propFilter, filter, recFilter)
+
+#-------------------------------------------------------------------
+
+def hashProps_rec(src, propFilter:str=None) -> str:
+    """ Stable hash of the values of all properties recursive (same props as copyProps_groups_rec), e.g. to key caches by config """
+    h = hashlib.sha1()
+    def hash_rec(data):
+        props_names = getProps_namesFiltered(data, propFilter) if propFilter else getProps_names(data)
+        for prop_name in sorted(props_names):
+            val = getattr(data, prop_name)
+            # enum flags are sets and vectors are bpy arrays, both need a stable repr
+            if isinstance(val, set): val = sorted(val)
+            elif not isinstance(val, (str, int, float, bool)):
+                try: val = tuple(val)
+                except TypeError: val = repr(val)
+            h.update(f"{prop_name}={val!r};".encode())
+        for group_name in sorted(getProps_groups(data)):
+            h.update(f"{group_name}{{".encode())
+            hash_rec(getattr(data, group_name))
+            h.update(b"}")
+    hash_rec(src)
+    return h.hexdigest()
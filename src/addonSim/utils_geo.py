@@ -2,7 +2,9 @@
 
 import bpy.types as types
 from mathutils import Vector, Matrix
+import numpy as np
 from .unionfind import UnionFind
+from .mw_links_store import CSR
 
 
 #-------------------------------------------------------------------
@@ -99,6 +101,34 @@ def map_FtoF(me: types.Mesh):
 
     return FtoF
 
+def map_FtoF_arrays(me: types.Mesh) -> CSR:
+    """ Vectorized FtoF as a CSR (neighbours sorted by face id), loops read with foreach_get and paired by edge
+        # NOTE:: same as map_FtoF, expects the mesh to be manifold
+    """
+    return map_FtoF_batch([me])[0]
+
+def map_FtoF_batch(meshes: list[types.Mesh]) -> list[CSR]:
+    """ Vectorized FtoF of multiple meshes in a single concatenated pass, returns a CSR per mesh """
+    # per loop face and edge, offset to global ids so all meshes are paired at once
+    numFaces = np.array([ len(me.polygons) for me in meshes ], dtype=np.int64)
+    numEdges = np.array([ len(me.edges) for me in meshes ], dtype=np.int64)
+    baseFaces = np.concatenate([[0], np.cumsum(numFaces)])
+    baseEdges = np.concatenate([[0], np.cumsum(numEdges)])
+    l_face, l_edge = [], []
+    for i,me in enumerate(meshes):
+        loop_edges = np.empty(len(me.loops), dtype=np.int64)
+        me.loops.foreach_get("edge_index", loop_edges)
+        loop_total = np.empty(len(me.polygons), dtype=np.int64)
+        me.polygons.foreach_get("loop_total", loop_total)
+        # NOTE:: polygons loops are contiguous and in order
+        l_face.append(np.repeat(np.arange(len(me.polygons)), loop_total) + baseFaces[i])
+        l_edge.append(loop_edges + baseEdges[i])
+    l_face = np.concatenate(l_face) if l_face else np.empty(0, np.int64)
+    l_edge = np.concatenate(l_edge) if l_edge else np.empty(0, np.int64)
+
+    # faces sharing an edge are neighbours, then split back per mesh (local face ids)
+    return CSR.from_shared_keys(l_face, l_edge, int(baseFaces[-1])).split(baseFaces)
+
 def map_VtoF_EtoF_VtoE(me: types.Mesh):
     """ Returns multiple mappings of the mesh (that complement blenders)
         # NOTE:: basically the same performance as the general method
@@ -232,6 +262,21 @@ def centroid_verts_weighted(coords: list[Vector], weights: list[float]):
     return c
 
 
+#-------------------------------------------------------------------
+## QUERIES arrays
+
+def get_faces_arrays(me: types.Mesh) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Faces center, normal and area in local space as numpy arrays, read in bulk with foreach_get """
+    n = len(me.polygons)
+    centers = np.empty(n*3, dtype=np.float32)
+    normals = np.empty(n*3, dtype=np.float32)
+    areas = np.empty(n, dtype=np.float32)
+    me.polygons.foreach_get("center", centers)
+    me.polygons.foreach_get("normal", normals)
+    me.polygons.foreach_get("area", areas)
+    return centers.reshape(-1, 3), normals.reshape(-1, 3), areas
+
+
 #-------------------------------------------------------------------
 ## QUERIES mesh
 
@@ -159,10 +159,34 @@ class ATTRS:
         else                        : raise TypeError(f"{atype} not in {ATTRS.attrs_atype}")
         return name
 
+    @staticmethod
+    def get_width_inType(atype:str):
+        """ Number of components of the type (None for strings) """
+        if   atype in ("FLOAT_COLOR", "BYTE_COLOR"): return 4
+        elif atype == "FLOAT_VECTOR": return 3
+        elif atype == "FLOAT2"      : return 2
+        elif atype == "STRING"      : return None
+        else                        : return 1
+
+    @staticmethod
+    def get_dtype_inType(atype:str):
+        """ Numpy dtype matching the foreach_set buffer of the type """
+        if   atype in ("INT", "INT8"): return np.int32
+        elif atype in ("BOOL", "BOOLEAN"): return bool
+        else: return np.float32
+
+    @staticmethod
+    def get_width_inData(dataAttr):
+        """ Number of components of the data access attr """
+        if isinstance(dataAttr, types.Attribute): return ATTRS.get_width_inType(dataAttr.data_type)
+        elif isinstance(dataAttr, types.MeshUVLoopLayer): return 2
+        else: return 4
+
     @staticmethod
     def get_attrName_inData(dataAttr):
         """ Map the data type to the data access attr """
-        if isinstance(dataAttr, types.MeshLoopColorLayer): return "uv"
+        if isinstance(dataAttr, types.MeshLoopColorLayer): return "color"
+        elif isinstance(dataAttr, types.MeshUVLoopLayer): return "uv"
         elif isinstance(dataAttr, types.Attribute):
             return ATTRS.get_attrName_inType(dataAttr.data_type)
         else: raise TypeError(f"{dataAttr.name} could not be mapped")
@@ -184,6 +208,20 @@ class ATTRS:
         else                        : raise TypeError(f"{atype} not in {ATTRS.attrs_atype}")
         return rnd
 
+    @staticmethod
+    def get_rnd_inType_np(atype:str, count:int, minC = 0.0, maxC = 1.0, alpha = COLORS._default_alpha) -> np.ndarray:
+        """ Vectorized get_rnd_inType: flat buffer with count random values of the type (not for strings) """
+        width = ATTRS.get_width_inType(atype)
+        if   atype in ("BOOL", "BOOLEAN"): return np.random.uniform(minC, maxC, count).round().astype(bool)
+        elif atype == "INT"  : return np.round(minC + np.random.uniform(0, 1, count) * maxC).astype(np.int32)
+        elif atype == "INT8" : return np.round(np.random.uniform(0, 1, count) * 256).astype(np.int32)
+
+        rnd = np.random.uniform(minC, maxC, (count, width)).astype(np.float32)
+        if atype in ATTRS.attrsColor_atype:
+            rnd[:,3] = alpha
+            if atype == "BYTE_COLOR": rnd *= 256
+        return rnd.ravel()
+
     @staticmethod
     def get_periodic_inType(atype:str, minC = 0.0, maxC = 1.0, period_id:int = None, period = 2, alpha = COLORS._default_alpha):
         """ Get periodic value in the type (building a ramp from 0-1 in period)"""
@@ -214,7 +252,33 @@ class ATTRS:
 
 #-------------------------------------------------------------------
 # NOTE:: all similar functions but then access different paths in the mesh/data e.g. uv.data[i].uv,vc.data[i].color,attr.data[i].value
-# NOTE:: set random functions do the same iteration to avoid allocating twice the memory in a tmp list, could change for less code dupe
+# NOTE:: the values are expanded to the whole layer with numpy and written with a single foreach_set, only strings go element by element
+
+def get_values_repeated(values, val_repeats:int, count:int, width:int, dtype=np.float32) -> np.ndarray:
+    """ Flat buffer for count elements: each value repeated val_repeats times in order, then the pattern periodically repeated """
+    assert val_repeats > 0, "val_repeats must be at least 1"
+    pattern = np.repeat(np.asarray(values, dtype=dtype).reshape(-1, width), val_repeats, axis=0)
+    if not len(pattern): return np.zeros(count*width, dtype=dtype)
+    return np.tile(pattern, (-(-count // len(pattern)), 1))[:count].ravel()
+
+def get_corners_faceId(mesh: types.Mesh) -> tuple[np.ndarray, np.ndarray]:
+    """ Corner ids of all faces in face order together with the face each one belongs to """
+    numFaces = len(mesh.polygons)
+    starts, totals = np.empty(numFaces, dtype=np.int32), np.empty(numFaces, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    mesh.polygons.foreach_get("loop_total", totals)
+    faces = np.repeat(np.arange(numFaces), totals)
+    firsts = np.repeat(np.cumsum(totals) - totals, totals)
+    corners = np.repeat(starts, totals) + np.arange(len(faces)) - firsts
+    return corners, faces
+
+def set_dataValues_str(source, data, dataAttrName:str, val_base:list, val_repeats = 1):
+    """ Element by element fallback for types without buffer access (strings) """
+    gen_repIndices = [i for i in range(len(val_base)) for _ in range(val_repeats)]
+    for i, datum in enumerate(source):
+        data[i].__setattr__(dataAttrName, val_base[gen_repIndices[i % len(gen_repIndices)]])
+
+#-------------------------------------------------------------------
 
 def gen_meshUV(mesh: types.Mesh, uv_base:Vector|list[Vector] = None, name="UV_map", val_repeats = 1) -> types.MeshUVLoopLayer:
     """ Add a UV layer to the mesh: 2D float PER loop corner """
@@ -223,22 +287,14 @@ def gen_meshUV(mesh: types.Mesh, uv_base:Vector|list[Vector] = None, name="UV_ma
     return uv
 
 def set_meshUV(mesh: types.Mesh, uv: types.MeshUVLoopLayer|str, uv_base:Vector|list[Vector], val_repeats = 1):
+    """ Input values repeated val_repeats each and then periodically over all corners """
     if isinstance(uv, str): uv = mesh.uv_layers[uv]
     uv_base = utils.assure_list(uv_base)
-
-    # input repetition options on top of periodically repeat val_base over source extent
-    assert val_repeats > 0, "val_repeats must be at least 1"
-    gen_repIndices = [i for i in range(len(uv_base)) for _ in range(val_repeats)]
-
-    for i, datum in enumerate(mesh.loops):
-        i_value = gen_repIndices[i % len(gen_repIndices)]
-        val = uv_base[i_value]
-        uv.data[i].uv = val
+    uv.data.foreach_set("uv", get_values_repeated(uv_base, val_repeats, len(mesh.loops), 2))
 
 def set_meshUV_rnd(mesh: types.Mesh, uv: types.MeshUVLoopLayer|str, minC=0.0, maxC=1.0):
     if isinstance(uv, str): uv = mesh.uv_layers[uv]
-    for i, faceL in enumerate(mesh.loops):
-        uv.data[i].uv = ATTRS.get_deferred_inType("FLOAT2", minC, maxC, i)
+    uv.data.foreach_set("uv", ATTRS.get_rnd_inType_np("FLOAT2", len(mesh.loops), minC, maxC))
 
 def set_meshUV_active(mesh: types.Mesh, uv: types.MeshUVLoopLayer|str):
     if isinstance(uv, str): uv = mesh.uv_layers[uv]
@@ -263,18 +319,11 @@ def gen_meshVC_legacy(mesh: types.Mesh, color_base:Vector|list[Vector] = None, j
 def set_meshVC_legacy(mesh: types.Mesh, vc: types.MeshLoopColorLayer|str, color_base:Vector|list[Vector], joinFaces=True):
     if isinstance(vc, str): vc = mesh.vertex_colors[vc]
     color_base = utils.assure_list(color_base)
-    if joinFaces:
-        for i, face in enumerate(mesh.polygons):
-            c = color_base[i % len(color_base)]
-            for j, loopID in enumerate(face.loop_indices):
-                vc.data[loopID].color = c
-    else:
-        for i, faceL in enumerate(mesh.loops):
-            c = color_base[i % len(color_base)]
-            vc.data[i].color = c
+    if joinFaces: set_meshAttr_perFace(mesh, vc, color_base)
+    else: vc.data.foreach_set("color", get_values_repeated(color_base, 1, len(mesh.loops), 4))
 
 def set_meshVC_legacy_rnd(mesh: types.Mesh, vc: types.MeshLoopColorLayer|str, minC=0.0, maxC=1.0, alpha=1.0, joinFaces=True):
-    rndValues = [ ATTRS.get_deferred_inType("FLOAT_COLOR", minC, maxC, i, alpha) for i, faceL in enumerate(mesh.loops) ]
+    rndValues = ATTRS.get_rnd_inType_np("FLOAT_COLOR", len(mesh.loops), minC, maxC, alpha)
     set_meshVC_legacy(mesh, vc, rndValues, joinFaces)
 
 #-------------------------------------------------------------------
@@ -295,15 +344,12 @@ def set_meshVC(mesh: types.Mesh, vc: types.Attribute|str, color_base:Vector|list
     if isinstance(vc, str): vc = mesh.color_attributes[vc]
     color_base = utils.assure_list(color_base)
     source = ATTRS.get_src_inDomain(mesh, vc.domain)
-    for i, datum in enumerate(source):
-        c = color_base[i % len(color_base)]
-        vc.data[i].color = c
+    vc.data.foreach_set("color", get_values_repeated(color_base, 1, len(source), 4))
 
 def set_meshVC_rnd(mesh: types.Mesh, vc: types.Attribute|str, minC=0.0, maxC=1.0, alpha=1.0, joinFaces=True):
     if isinstance(vc, str): vc = mesh.color_attributes[vc]
     source = ATTRS.get_src_inDomain(mesh, vc.domain)
-    for i, datum in enumerate(source):
-        vc.data[i].color = ATTRS.get_deferred_inType("FLOAT_COLOR", minC, maxC, i, alpha)
+    vc.data.foreach_set("color", ATTRS.get_rnd_inType_np("FLOAT_COLOR", len(source), minC, maxC, alpha))
 
 #-------------------------------------------------------------------
 
@@ -321,15 +367,12 @@ def set_meshAC(mesh: types.Mesh, ac: types.Attribute|str, color_base:Vector|list
     if isinstance(ac, str): ac = mesh.attributes[ac]
     color_base = utils.assure_list(color_base)
     source = ATTRS.get_src_inDomain(mesh, ac.domain)
-    for i, datum in enumerate(source):
-        c = color_base[i % len(color_base)]
-        ac.data[i].color = c
+    ac.data.foreach_set("color", get_values_repeated(color_base, 1, len(source), 4))
 
 def set_meshAC_rnd(mesh: types.Mesh, ac: types.Attribute|str, minC=0.0, maxC=1.0, alpha=1.0):
     if isinstance(ac, str): ac = mesh.attributes[ac]
     source = ATTRS.get_src_inDomain(mesh, ac.domain)
-    for i, datum in enumerate(source):
-        ac.data[i].color = ATTRS.get_deferred_inType(ac.data_type, minC, maxC, i, alpha)
+    ac.data.foreach_set("color", ATTRS.get_rnd_inType_np(ac.data_type, len(source), minC, maxC, alpha))
 
 #-------------------------------------------------------------------
 
@@ -350,14 +393,13 @@ def set_meshAttr(mesh: types.Mesh, attr: types.Attribute|str, val_base, val_repe
     source = ATTRS.get_src_inDomain(mesh, attr.domain)
     # data attribute access depends on the type...
     dataAttrName = ATTRS.get_attrName_inData(attr)
+    width = ATTRS.get_width_inType(attr.data_type)
+    if width is None:
+        set_dataValues_str(source, attr.data, dataAttrName, val_base, val_repeats)
+        return
 
-    # input repetition options on top of periodically repeat val_base over source extent
-    assert val_repeats > 0, "val_repeats must be at least 1"
-    gen_repIndices = [i for i in range(len(val_base)) for _ in range(val_repeats)]
-    for i, datum in enumerate(source):
-        i_value = gen_repIndices[i % len(gen_repIndices)]
-        val = val_base[i_value]
-        attr.data[i].__setattr__(dataAttrName, val)
+    values = get_values_repeated(val_base, val_repeats, len(source), width, ATTRS.get_dtype_inType(attr.data_type))
+    attr.data.foreach_set(dataAttrName, values)
 
 def set_meshAttr_rnd(mesh: types.Mesh, attr: types.Attribute|str, minC=0.0, maxC=1.0):
     """ Set randomized property values """
@@ -365,9 +407,12 @@ def set_meshAttr_rnd(mesh: types.Mesh, attr: types.Attribute|str, minC=0.0, maxC
     source = ATTRS.get_src_inDomain(mesh, attr.domain)
     # data attribute access depends on the type...
     dataAttrName = ATTRS.get_attrName_inData(attr)
-    for i, datum in enumerate(source):
-        val = ATTRS.get_deferred_inType(attr.data_type, minC, maxC, i)
-        attr.data[i].__setattr__(dataAttrName, val)
+    if ATTRS.get_width_inType(attr.data_type) is None:
+        rndValues = [ ATTRS.get_deferred_inType(attr.data_type, minC, maxC, i) for i in range(len(source)) ]
+        set_dataValues_str(source, attr.data, dataAttrName, rndValues)
+        return
+
+    attr.data.foreach_set(dataAttrName, ATTRS.get_rnd_inType_np(attr.data_type, len(source), minC, maxC))
 
 def set_meshAttr_perFace(mesh: types.Mesh, dataAttr, values, val_repeats = 1):
     """ Generalized method to set a property per face to corners of a mesh.
@@ -375,15 +420,15 @@ def set_meshAttr_perFace(mesh: types.Mesh, dataAttr, values, val_repeats = 1):
     """
     values = utils.assure_list(values)
     dataAttrName = ATTRS.get_attrName_inData(dataAttr)
+    width = ATTRS.get_width_inData(dataAttr)
+    dtype = ATTRS.get_dtype_inType(dataAttr.data_type) if isinstance(dataAttr, types.Attribute) else np.float32
 
-    # input repetition options on top of periodically repeat val_base over source extent
-    gen_repIndices = [i for i in range(len(values)) for _ in range(val_repeats)]
-    assert val_repeats > 0, "val_repeats must be at least 1"
-    for i, face in enumerate(mesh.polygons):
-        i_value = gen_repIndices[i % len(gen_repIndices)]
-        val = values[i_value]
-        for j, loopID in enumerate(face.loop_indices):
-            dataAttr.data[loopID].__setattr__(dataAttrName, val)
+    # input repetition options on top of periodically repeat val_base over faces, then copied to all the corners of each face
+    faceValues = get_values_repeated(values, val_repeats, len(mesh.polygons), width, dtype).reshape(-1, width)
+    corners, faces = get_corners_faceId(mesh)
+    cornerValues = np.empty((len(mesh.loops), width), dtype=dtype)
+    cornerValues[corners] = faceValues[faces]
+    dataAttr.data.foreach_set(dataAttrName, cornerValues.ravel())
 
 #-------------------------------------------------------------------
 
@@ -417,6 +462,7 @@ def gen_test_colors(obj, mesh, alpha, matName):
 #-------------------------------------------------------------------
 
 class GRADIENTS:
+    """ Color functions evaluated over pixel coordinates: scalars return a Vector, coordinate grids return RGBA arrays (grid shape, 4) """
     _default_res = 128
 
     @staticmethod
@@ -425,29 +471,21 @@ class GRADIENTS:
 
     @staticmethod
     def lerp_colors(u, c1 = COLORS.black, c2=COLORS.white):
-        """ Alpha is not lerped (preserved from c1), return as new vector """
-        cc1 = c1.xyz*(1-u)
-        cc2 = c2.xyz*u
-        c = Vector(cc1+cc2)
-        utils.clamp_inplace(c) # already done by blender?
-        c = c.to_4d()
-        c.w = c1.w
-        return c
-
+        """ Alpha is not lerped (preserved from c1), return as new vector (or array for array u) """
         # NOTE:: alpha is not lerped in regular viewport when coming from textures!
-        cc1 = c1*(1-u)
-        cc2 = c2*u
-        c = cc1+cc2
-        utils.clamp_inplace(c) # already done by blender?
-        return c
+        uu = np.asarray(u, dtype=np.float32)[...,None]
+        c = np.clip(np.array(c1.xyz, dtype=np.float32)*(1-uu) + np.array(c2.xyz, dtype=np.float32)*uu, 0, 1)
+        c = np.concatenate([c, np.full(uu.shape, c1.w, dtype=np.float32)], axis=-1)
+        return Vector(c) if np.ndim(u) == 0 else c
 
     @staticmethod
     def lerp_colors_trio(u, c1=COLORS.warm, c2=COLORS.white_cw, c3 = COLORS.cool):
-        """ Alpha is not lerped (preserved from c1), return as new vector """
-        if u < 0.5:
-            return GRADIENTS.lerp_colors(u / 0.5, c1, c2)
-        else:
-            return GRADIENTS.lerp_colors( (u-0.5) / 0.5, c2, c3)
+        """ Alpha is not lerped (preserved from c1), return as new vector (or array for array u) """
+        if np.ndim(u) == 0:
+            if u < 0.5: return GRADIENTS.lerp_colors(u / 0.5, c1, c2)
+            else: return GRADIENTS.lerp_colors( (u-0.5) / 0.5, c2, c3)
+        u = np.asarray(u, dtype=np.float32)
+        return np.where((u < 0.5)[...,None], GRADIENTS.lerp_colors(u / 0.5, c1, c2), GRADIENTS.lerp_colors( (u-0.5) / 0.5, c2, c3))
 
     red          = lambda p, h: GRADIENTS.lerp_colors(GRADIENTS.lerp_u(p, max_val=h), c2=COLORS.red)
     green        = lambda p, h: GRADIENTS.lerp_colors(GRADIENTS.lerp_u(p, max_val=h), c2=COLORS.green)
@@ -456,14 +494,20 @@ class GRADIENTS:
     blue_red     = lambda p, h: GRADIENTS.lerp_colors(GRADIENTS.lerp_u(p, max_val=h), c1=COLORS.blue, c2=COLORS.red)
     cool_warm    = lambda p, h: GRADIENTS.lerp_colors_trio(1-GRADIENTS.lerp_u(p, max_val=h))
 
+    _lerp_common_fns = {}
     def lerp_common(c = COLORS.red, end = COLORS.black):
-        return lambda p, h: GRADIENTS.lerp_colors(GRADIENTS.lerp_u(p, max_val=h), c2=c, c1=end)
+        # NOTE:: the same function object is returned for the same colors, so the generated images cache can match it
+        key = (tuple(c), tuple(end))
+        if key not in GRADIENTS._lerp_common_fns:
+            GRADIENTS._lerp_common_fns[key] = lambda p, h: GRADIENTS.lerp_colors(GRADIENTS.lerp_u(p, max_val=h), c2=c, c1=end)
+        return GRADIENTS._lerp_common_fns[key]
 
     def chess_2D_board(x, y, w, h):
-        flip = y < h * 0.5
-        if x <  w * 0.5:
-            return COLORS.black if not flip else COLORS.white
-        else: return COLORS.white if not flip else COLORS.black
+        flip = np.asarray(y < h * 0.5)
+        left = np.asarray(x < w * 0.5)
+        black = (left != flip)
+        c = np.where(black[...,None], np.array(COLORS.black, dtype=np.float32), np.array(COLORS.white, dtype=np.float32))
+        return Vector(c) if black.ndim == 0 else c
 
     def red_2D_green(x, y, w, h):
         c1 = GRADIENTS.lerp_colors(GRADIENTS.lerp_u(x, max_val=w), c2=COLORS.red)
@@ -474,6 +518,13 @@ class GRADIENTS:
         c2 =  GRADIENTS.lerp_colors(GRADIENTS.lerp_u(y, max_val=h), c2=COLORS.blue)
         return c1 + c2
 
+    @staticmethod
+    def eval_pixels(colorFn, width:int, height:int) -> np.ndarray:
+        """ Evaluate colorFn: x, y, w, h once over the whole pixel grid, flat RGBA buffer (0,0 at bottom left, row major) """
+        ys, xs = np.mgrid[0:height, 0:width]
+        pixels = np.asarray(colorFn(xs, ys, width, height), dtype=np.float32)
+        return np.ascontiguousarray(np.broadcast_to(pixels, (height, width, 4))).ravel()
+
 def gen_textureMat_DEVfix():
     DEV.FIX_IMAGES_QUEUE = False # avoid rec
     global _gen_textureMat_queue
@@ -483,9 +534,13 @@ def gen_textureMat_DEVfix():
     DEV.FIX_IMAGES_QUEUE = True
 
 _gen_textureMat_queue = []
-def gen_textureMat(uv_layer:str, name:str, width=GRADIENTS._default_res, height=GRADIENTS._default_res*0.5, colorFn = GRADIENTS.red_2D_green, forceNew = False):
-    """ generate a 2D image and use colorFn: x, y, w, h to define the color of each pixel
+_gen_textureMat_cache : dict[tuple, np.ndarray] = {}
+""" Generated pixels keyed by (colorFn, width, height), the functions are module level or memoized so they can be matched """
+
+def gen_textureMat(uv_layer:str, name:str, width=GRADIENTS._default_res, height=GRADIENTS._default_res*0.5, colorFn = GRADIENTS.red_2D_green, forceNew = False, cacheKey = None):
+    """ generate a 2D image and use colorFn: x, y, w, h to define the color of each pixel (evaluated once over coordinate grids)
         # NOTE:: tries to shared prev image by matching name (skipped with forceNew)
+        # NOTE:: the pixels are cached by (cacheKey or colorFn, resolution) so regenerating the image is just the upload
     """
     if DEV.FIX_IMAGES_QUEUE:
         global _gen_textureMat_queue
@@ -503,26 +558,14 @@ def gen_textureMat(uv_layer:str, name:str, width=GRADIENTS._default_res, height=
         height=int(height)
         image = bpy.data.images.new(name=name_image, width=width, height=height, alpha=True)
 
-        # Create a NumPy array to store the image data
-        pixels = np.empty(width * height * 4, dtype=np.float32)
-        for y in range(height):
-            for x in range(width):
-                # 0,0 at bottom left
-                #if y < 5: c = COLORS.black
-                #elif x < 5: c = COLORS.white
-                #else: c = COLORS.gray
-
-                c = colorFn(x, y, width, height)
-
-                # Set the pixel values (RGBA)
-                index = (y * width + x) * 4
-                pixels[index]     = c[0]
-                pixels[index + 1] = c[1]
-                pixels[index + 2] = c[2]
-                pixels[index + 3] = c[3]
-
-        # Flatten the NumPy array and assign it to the image
-        image.pixels = pixels.tolist()
+        key = (cacheKey or colorFn, width, height)
+        pixels = _gen_textureMat_cache.get(key)
+        if pixels is None:
+            pixels = GRADIENTS.eval_pixels(colorFn, width, height)
+            _gen_textureMat_cache[key] = pixels
+
+        # direct upload of the buffer
+        image.pixels.foreach_set(pixels)
         image.update()
         image.pack()
         #image.make_local()
@@ -560,4 +603,4 @@ def gen_textureMat(uv_layer:str, name:str, width=GRADIENTS._default_res, height=
 def gen_gradientMat(uv_layer:str, name:str, width=GRADIENTS._default_res, height=GRADIENTS._default_res*0.5, colorFn = GRADIENTS.red, forceNew = False):
     """ 1D gradient, but use a 2D image with height to visualize better the UV coords """
     gradient = lambda x,y,w,h: colorFn(y, h)
-    return gen_textureMat(uv_layer, name, width, height, gradient, forceNew)
\ No newline at end of file
+    return gen_textureMat(uv_layer, name, width, height, gradient, forceNew, cacheKey=("gradient", colorFn))
\ No newline at end of file
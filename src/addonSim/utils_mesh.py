@@ -2,6 +2,7 @@ import bpy
 import bpy.types as types
 from mathutils import Vector, Matrix
 from math import pi as PI, cos, sin, radians
+import numpy as np
 
 from . import utils_trans
 
@@ -134,6 +135,63 @@ def get_tubeMesh_pairsQuad(src_verts_pairs:list[tuple[Vector]], src_scale:list[f
     if smoothShade: set_smoothShading(me)
     return me
 
+def get_tubeMesh_pairsQuad_np(src_verts_pairs:np.ndarray|list[tuple[Vector]], src_scale:np.ndarray|list[float] = None, name ="tube-mesh", radii=0.05, resFaces=4, smoothShade = True):
+    """ Vectorized get_tubeMesh_pairsQuad: same vertex and face layout, all rings broadcasted at once and written with foreach_set
+        * src_verts_pairs can be a list of Vector pairs or an (N,2,3) array
+        * Pair k owns the verts [k*resFaces*2, (k+1)*resFaces*2) and the faces [k*resFaces, (k+1)*resFaces)
+    """
+    assert (resFaces >= 2)
+    verts = get_tubeVerts_pairs_np(src_verts_pairs, src_scale, radii, resFaces)
+    numPairs = len(verts)
+
+    # faces quads -> ccw so normals towards outside, the last one connects back to the first sample
+    vs_id = np.arange(numPairs)[:,None]*resFaces*2 + np.arange(resFaces)[None,:]*2
+    vs_next = np.arange(numPairs)[:,None]*resFaces*2 + ((np.arange(resFaces)+1) % resFaces)[None,:]*2
+    faces = np.stack([vs_id, vs_next, vs_next+1, vs_id+1], axis=2).reshape(-1)
+    numFaces = numPairs*resFaces
+
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(numPairs*resFaces*2)
+    me.vertices.foreach_set("co", verts.astype(np.float32).ravel())
+    me.loops.add(numFaces*4)
+    me.loops.foreach_set("vertex_index", faces.astype(np.int32))
+    me.polygons.add(numFaces)
+    me.polygons.foreach_set("loop_start", np.arange(0, numFaces*4, 4, dtype=np.int32))
+    if bpy.app.version < (4, 0, 0):
+        me.polygons.foreach_set("loop_total", np.full(numFaces, 4, dtype=np.int32))
+    me.update(calc_edges=True)
+
+    # apply smooth shading
+    if smoothShade: me.polygons.foreach_set("use_smooth", np.ones(numFaces, dtype=bool))
+    return me
+
+def get_tubeVerts_pairs_np(src_verts_pairs:np.ndarray|list[tuple[Vector]], src_scale:np.ndarray|list[float] = None, radii=0.05, resFaces=4) -> np.ndarray:
+    """ Ring verts of each pair as an (N, resFaces*2, 3) array, interleaved in the same order as get_ringVerts_interleaved """
+    pairs = np.asarray(src_verts_pairs, dtype=np.float64).reshape(-1, 2, 3)
+    numPairs = len(pairs)
+
+    # one stable basis per pair, radius scaled per pair
+    u,v = utils_trans.getPerpendicularBase_stable_many(pairs[:,1] - pairs[:,0])
+    r = radii * np.asarray(src_scale, dtype=np.float64) if src_scale is not None else np.full(numPairs, radii)
+    angles = np.arange(resFaces) * (PI * 2 / resFaces)
+    offsets = r[:,None,None] * (np.cos(angles)[None,:,None] * u[:,None,:] + np.sin(angles)[None,:,None] * v[:,None,:])
+
+    # (pair, ring sample, pair endpoint) flattened per pair
+    verts = pairs[:,None,:,:] + offsets[:,:,None,:]
+    return verts.reshape(numPairs, resFaces*2, 3)
+
+def update_tubeMesh_pairsQuad_np(me: types.Mesh, pairs_idx:np.ndarray, src_verts_pairs:np.ndarray, src_scale:np.ndarray = None, radii=0.05, resFaces=4):
+    """ INPLACE: rewrite only the rings of the given pairs of a mesh generated by get_tubeMesh_pairsQuad_np (same topology)
+        * src_verts_pairs and src_scale only contain the pairs to update, in the same order as pairs_idx
+    """
+    if not len(pairs_idx): return
+    co = np.empty(len(me.vertices)*3, dtype=np.float32)
+    me.vertices.foreach_get("co", co)
+    co = co.reshape(-1, resFaces*2, 3)
+    co[pairs_idx] = get_tubeVerts_pairs_np(src_verts_pairs, src_scale, radii, resFaces)
+    me.vertices.foreach_set("co", co.ravel())
+    me.update()
+
 def get_tubeMesh_AAtriFan(src_verts:list[Vector], src_edges:list[tuple[int]], src_scale:list[float] = None, name ="tube-mesh", radii=0.05, resFaces=4, smoothShade = True):
     """ extrudes AA sampled circle points around the vertices using a triangle fan"""
     assert (resFaces >= 2)
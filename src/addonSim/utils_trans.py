@@ -1,4 +1,5 @@
 import bpy.types as types
+import numpy as np
 from mathutils import Vector, Matrix, Quaternion
 
 from . import utils
@@ -74,6 +75,29 @@ def getPerpendicularBase_stable(n:Vector, normalize=True):
     if normalize: perp2.normalize()
     return perp, perp2
 
+def getPerpendicularBase_stable_many(n:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Vectorized getPerpendicularBase_stable over an (N,3) array of directions, always normalized
+        * Same branches: cross with the least aligned axis, null vectors produce null bases (no warning)
+    """
+    n = np.asarray(n, dtype=np.float64).reshape(-1, 3)
+    x, y, z = n[:,0], n[:,1], n[:,2]
+    Ax, Ay, Az = np.abs(x), np.abs(y), np.abs(z)
+    zero = np.zeros_like(x)
+
+    # same branch order as the scalar version: perp_x, perp_z or the fallback perp_y (first and last branches match)
+    use_x = (Ax < Ay) & (Ax < Az)
+    use_z = ~(Ax < Ay) & (Ay < Az)
+    perp = np.stack([-y, x, zero], axis=1)
+    perp[use_x] = np.stack([zero, -z, y], axis=1)[use_x]
+    perp[use_z] = np.stack([z, zero, -x], axis=1)[use_z]
+
+    def normalized(a):
+        l = np.linalg.norm(a, axis=1, keepdims=True)
+        return np.divide(a, l, out=np.zeros_like(a), where=l > 0)
+    perp = normalized(perp)
+    perp2 = normalized(np.cross(n, perp))
+    return perp, perp2
+
 #-------------------------------------------------------------------
 
 def transform_points(points: list[Vector] |  list[list], matrix) -> list[Vector]:
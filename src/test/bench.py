@@ -25,7 +25,7 @@ def bench_meshMaps(stats, me):
 
         t = """ maps dict based """
         stats.reset()
-        for n in range(n):
+        for _ in range(n):
             ret1 = utils_geo.map_VtoF_EtoF_VtoE_dictBased(me)
         stats.logFull(t)
         if delete: del ret1
@@ -33,14 +33,14 @@ def bench_meshMaps(stats, me):
         t = """ maps general method """
         stats.reset()
         query = { "VtoF": True, "EtoF": True, "VtoE": True }
-        for n in range(n):
+        for _ in range(n):
             ret3 = utils_geo.get_meshDicts(me, queries_dict=query, queries_default=False)
         stats.logFull(t)
         if delete: del ret3
 
         t = """ maps pre-alloc list based """
         stats.reset()
-        for n in range(n):
+        for _ in range(n):
             ret2 = utils_geo.map_VtoF_EtoF_VtoE(me)
         stats.logFull(t)
         if delete: del ret2
@@ -69,7 +69,7 @@ def bench_meshMaps_FtoF(stats, me):
     n = 50
     delete = False
 
-    ret1, ret2 = None, None
+    ret1, ret2, ret3, ret4 = None, None, None, None
     for i in range(nRep):
         print()
         print(f"rep {i}")
@@ -77,21 +77,208 @@ def bench_meshMaps_FtoF(stats, me):
         t = """ maps general method """
         stats.reset()
         query = { "FtoF": True }
-        for n in range(n):
+        for _ in range(n):
             ret1 = utils_geo.get_meshDicts(me, queries_dict=query, queries_default=False)
         stats.logFull(t)
         if delete: del ret1
 
         t = """ maps specific method """
         stats.reset()
-        for n in range(n):
+        for _ in range(n):
             ret2 = utils_geo.map_FtoF(me)
         stats.logFull(t)
         if delete: del ret2
 
+        t = """ maps vectorized CSR """
+        stats.reset()
+        for _ in range(n):
+            ret3 = utils_geo.map_FtoF_arrays(me)
+        stats.logFull(t)
+        if delete: del ret3
+
+        t = """ maps vectorized CSR batched (all reps in one pass) """
+        stats.reset()
+        ret4 = utils_geo.map_FtoF_batch([me]*n)
+        stats.logFull(t)
+        if delete: del ret4
+
     if not delete:
         t = """ assert equal results"""
         stats.reset()
         assert(ret1["FtoF"] == ret2)
+        assert(ret2 == [ set(ret3[f].tolist()) for f in range(len(ret3)) ])
+        assert(all( r.indices.tolist() == ret3.indices.tolist() and r.offsets.tolist() == ret3.offsets.tolist() for r in ret4 ))
+        stats.logFull(t)
+    pass
+
+def bench_tubeMesh_pairsQuad(stats, numPairs=20000, resFaces=8):
+    stats.reset()
+    from addonSim import utils_mesh
+    importlib.reload(utils_mesh)
+    import bpy
+    import numpy as np
+    from mathutils import Vector
+
+    # random pairs, mixed lengths and orientations
+    rng = np.random.default_rng(0)
+    pairs_np = rng.uniform(-1, 1, (numPairs, 2, 3))
+    pairs = [ (Vector(p0), Vector(p1)) for p0,p1 in pairs_np.tolist() ]
+    scale = rng.uniform(0.5, 1.5, numPairs).tolist()
+    stats.logFull(f"bench_tubeMesh_pairsQuad: {numPairs} pairs x {resFaces} faces")
+    print()
+    nRep = 2
+
+    me1, me2 = None, None
+    for i in range(nRep):
+        print()
+        print(f"rep {i}")
+        if me1: bpy.data.meshes.remove(me1)
+        if me2: bpy.data.meshes.remove(me2)
+
+        t = """ tube mesh from_pydata """
+        stats.reset()
+        me1 = utils_mesh.get_tubeMesh_pairsQuad(pairs, scale, "bench_tube", 0.05, resFaces, True)
         stats.logFull(t)
-    pass
\ No newline at end of file
+
+        t = """ tube mesh numpy foreach_set """
+        stats.reset()
+        me2 = utils_mesh.get_tubeMesh_pairsQuad_np(pairs_np, scale, "bench_tube_np", 0.05, resFaces, True)
+        stats.logFull(t)
+
+    t = """ assert equal results"""
+    stats.reset()
+    co1, co2 = np.empty(len(me1.vertices)*3), np.empty(len(me2.vertices)*3)
+    me1.vertices.foreach_get("co", co1)
+    me2.vertices.foreach_get("co", co2)
+    assert(np.allclose(co1, co2, atol=1e-5))
+    assert([ tuple(p.vertices) for p in me1.polygons ] == [ tuple(p.vertices) for p in me2.polygons ])
+    stats.logFull(t)
+    bpy.data.meshes.remove(me1)
+    bpy.data.meshes.remove(me2)
+    pass
+
+def bench_voroCache(stats, numPoints=5000):
+    stats.reset()
+    from addonSim import mw_voro_cache
+    importlib.reload(mw_voro_cache)
+    import numpy as np
+    from tess import Container
+
+    # random points inside a unit box
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1, 1, (numPoints, 3)).tolist()
+    bb = [(-1.1,-1.1,-1.1), (1.1,1.1,1.1)]
+    cache = mw_voro_cache.VoroCache()
+    stats.logFull(f"bench_voroCache: {numPoints} points")
+    print()
+
+    t = """ voro++ container """
+    stats.reset()
+    voro_cont = Container(points=points, limits=bb)
+    stats.logFull(t)
+
+    t = """ copy to flat arrays + key """
+    stats.reset()
+    key = cache.get_key(points, bb, [], 0)
+    cache.put(key, mw_voro_cache.VoroContData.from_voro(voro_cont))
+    stats.logFull(t)
+
+    t = """ cache hit (key + lookup) """
+    stats.reset()
+    data = cache.get(cache.get_key(points, bb, [], 0))
+    stats.logFull(t)
+
+    t = """ assert equal results"""
+    stats.reset()
+    for c1, c2 in zip(voro_cont, data):
+        if c1 is None:
+            assert(c2 is None)
+            continue
+        assert(c1.neighbors() == c2.neighbors())
+        assert(c1.face_vertices() == c2.face_vertices())
+        assert(np.allclose(c1.vertices(), c2.vertices()))
+    stats.logFull(t)
+    pass
+
+def bench_simCheckpoints(stats, sim, steps=200, n=20):
+    stats.reset()
+    import numpy as np
+
+    # two states apart so restoring actually changes the arrays
+    sim.backup_state()
+    sim.checkpoint_save("bench_a")
+    sim.run_batch(steps, keep_paths=0)
+    sim.checkpoint_save("bench_b", delta=True)
+    life_b = sim.links.store.life.copy()
+    stats.logFull(f"bench_simCheckpoints: {len(sim.links.store)} links, {steps} steps apart")
+    print()
+
+    t = """ backup restore (comps_recalc) """
+    stats.reset()
+    for i in range(n):
+        sim.backup_state_restore()
+    stats.logFull(t)
+    life_a = sim.links.store.life.copy()
+
+    t = """ checkpoints restore (comps_restore) """
+    stats.reset()
+    for i in range(n):
+        sim.checkpoint_restore("bench_b")
+        sim.checkpoint_restore("bench_a")
+    stats.logFull(t)
+
+    t = """ assert equal results"""
+    stats.reset()
+    assert(np.array_equal(sim.links.store.life, life_a))
+    sim.checkpoint_restore("bench_b")
+    assert(np.array_equal(sim.links.store.life, life_b))
+    sim.checkpoint_remove("bench_a")
+    sim.checkpoint_remove("bench_b")
+    stats.logFull(t)
+    pass
+
+def bench_fractCache(stats, root, n=5):
+    """ Save and load the fracture of the root, run it with a single mesh root and with a cell objects root """
+    stats.reset()
+    from addonSim import mw_fract_cache
+    importlib.reload(mw_fract_cache)
+    from addonSim.properties_global import MW_global_storage
+    import numpy as np
+
+    fract = MW_global_storage.getFract(root)
+    singleMesh = fract.cont.cells_singleMesh is not None
+    stats.logFull(f"bench_fractCache: {len(fract.links.store)} links, singleMesh {singleMesh}")
+    print()
+
+    t = """ save """
+    stats.reset()
+    for _ in range(n):
+        mw_fract_cache.save_fract(fract, root)
+    stats.logFull(t)
+
+    t = """ load """
+    stats.reset()
+    for _ in range(n):
+        loaded = mw_fract_cache.load_fract(root)
+    stats.logFull(t)
+
+    t = """ assert equal results"""
+    stats.reset()
+    assert(loaded is not None)
+    assert(loaded.cont.precalculated)
+    assert((loaded.cont.cells_singleMesh is not None) == singleMesh)
+    assert(np.array_equal(loaded.cont.cells_state, fract.cont.cells_state))
+    assert(np.array_equal(loaded.cont.faces_cell, fract.cont.faces_cell))
+    assert(np.array_equal(loaded.links.store.life, fract.links.store.life))
+    assert(np.array_equal(loaded.links.store.key_cells, fract.links.store.key_cells))
+    assert(np.array_equal(loaded.links.comps_snapshot()["comps_label"], fract.links.comps_snapshot()["comps_label"]))
+    stats.logFull(t)
+
+    t = """ rebuild links from the loaded cont (restores the cells maps) """
+    stats.reset()
+    from addonSim.mw_links import MW_Links
+    links = MW_Links(loaded.cont)
+    assert(np.array_equal(links.store.key_cells, fract.links.store.key_cells))
+    assert(np.array_equal(links.neighs_csr.indices, fract.links.neighs_csr.indices))
+    stats.logFull(t)
+    pass